@@ -1,12 +1,36 @@
 import os
+import sys
 import pandas as pd
 import logging
-import re
-from textblob import TextBlob
-from collections import Counter
-import fitz  # PyMuPDF
-import docx  # python-docx
-from sqlalchemy import create_engine, text
+import sqlite3
+from sqlalchemy import bindparam, create_engine, text
+
+# Tambahkan root proyek ke sys.path agar 'scripts.utils' bisa diimpor juga saat file ini dijalankan mandiri
+_PROJECT_ROOT_FOR_IMPORTS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PROJECT_ROOT_FOR_IMPORTS not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT_FOR_IMPORTS)
+
+from scripts.utils.lake_partitions import list_partition_files
+from scripts.utils.lake_classification import KEYWORD_MAP, classify_file
+from scripts.utils.batch_sentiment import analyze_texts
+from scripts.utils.sentiment_cache import analyze_texts_cached, connect_cache
+from scripts.utils.document_extraction import extract_documents
+from scripts.utils.lake_search import connect_index, page_entries, tweet_entries, update_index
+from scripts.utils.financial_extractors import (
+    FINANCIAL_EXTRACTORS, detect_document_type, extract_records, parse_record_amounts
+)
+from scripts.utils.sensor_aggregation import SENSOR_PARTIAL_COLUMNS, aggregate_sensor_files, reduce_sensor_partials
+from scripts.utils.lake_catalog import (
+    catalog_exists, connect_catalog, object_hashes, query_objects, set_status, STATUS_ANALYZED, STATUS_FAILED
+)
+from scripts.utils.lake_manifest import compute_file_hash
+from scripts.utils.staging_tables import (
+    SOURCE_COLUMN, load_checkpoint, save_checkpoint, read_staging_table, write_staging_table, staging_table_exists,
+    source_values
+)
+from scripts.utils.processed_staging import (
+    FINANCIAL_SUMMARY, SENSOR_SUMMARY, SOCIAL_SUMMARY, merge_summary, summary_exists, write_summary
+)
 
 # --- Konfigurasi Logging ---
 logging.basicConfig(
@@ -19,7 +43,10 @@ try:
     SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
     PROJECT_ROOT = os.path.join(SCRIPT_DIR, '..')
     RAW_DATA_LAKE_DIR = os.path.join(PROJECT_ROOT, 'raw_data_lake')
+    CURATED_LAKE_DIR = os.path.join(PROJECT_ROOT, 'curated_data_lake')
     PROCESSED_STAGING_DIR = os.path.join(PROJECT_ROOT, 'processed_staging')
+    # Cache analisis, terpisah dari processed_staging/ agar tidak ikut dibersihkan saat analisis penuh
+    ANALYSIS_CACHE_DIR = os.path.join(PROJECT_ROOT, 'analysis_cache')
     
     os.makedirs(PROCESSED_STAGING_DIR, exist_ok=True)
     logging.info("Path directories configured successfully.")
@@ -46,246 +73,491 @@ except Exception as e:
     logging.critical(f"FATAL: Could not connect to staging database. Error: {e}")
     exit()
 
+# --- Konfigurasi Analisis Inkremental ---
+# Partial agregat sensor per (source_file, date, zone_id); ringkasan harian dihitung dari tabel ini
+SENSOR_PARTIALS_TABLE = 'warehouse_sensor_partials'
+# Jumlah proses untuk agregasi sensor (map-reduce per shard file); 1 = satu proses saja
+SENSOR_MAX_WORKERS = os.cpu_count() or 1
+# Cache hasil sentimen per teks tweet (SQLite di analysis_cache/), dibatasi jumlah entrinya (LRU)
+SENTIMENT_CACHE_MAX_ENTRIES = 500_000
+# Jumlah proses untuk ekstraksi teks PDF/DOCX yang belum ada di cache teks dokumen
+DOCUMENT_MAX_WORKERS = os.cpu_count() or 1
+# Urutan kolom output; source_file (path relatif objek lake) adalah kunci penggantian baris per file
+SOCIAL_SUMMARY_COLUMNS = [
+    'tweet_text', 'sentiment_score', 'sentiment_category', 'top_words_json',
+    'date_processed', 'original_filename', 'source_file'
+]
+FINANCIAL_SUMMARY_COLUMNS = [
+    'original_filename', 'company_name', 'report_year', 'report_type',
+    'extracted_revenue', 'extracted_net_profit', 'source_file'
+]
+
 # --- FUNGSI-FUNGSI PEMROSESAN DATA ---
 
-def process_sensor_data(file_list, processed_dir, db_engine):
-    """Menerima daftar file sensor, mengagregasi, menyimpan ke CSV DAN memuat ke DB Staging."""
+def _lake_rel_path(file_path):
+    """Path relatif objek terhadap raw_data_lake/ (dengan '/'), dipakai sebagai kunci lineage dan checkpoint."""
+    return os.path.relpath(file_path, RAW_DATA_LAKE_DIR).replace(os.sep, '/')
+
+
+def sum_sensor_partials(db_engine, dates):
+    """
+    Partial sensor yang tersimpan di tabel partial, dijumlahkan per (date, zone_id) oleh PostgreSQL
+    hanya untuk tanggal di dates. Hasilnya siap untuk reduce_sensor_partials.
+    """
+    if not dates:
+        return pd.DataFrame(columns=SENSOR_PARTIAL_COLUMNS)
+    stmt = text(f"""
+        SELECT date, zone_id,
+               SUM(temperature_sum)::double precision AS temperature_sum,
+               SUM(temperature_count)::bigint AS temperature_count,
+               SUM(humidity_sum)::double precision AS humidity_sum,
+               SUM(humidity_count)::bigint AS humidity_count
+        FROM {SENSOR_PARTIALS_TABLE}
+        WHERE date IN :dates
+        GROUP BY date, zone_id
+    """).bindparams(bindparam('dates', expanding=True))
+    with db_engine.connect() as conn:
+        return pd.read_sql(stmt, conn, params={'dates': sorted(dates)})
+
+
+def merge_processed_summary(df, dataset, processed_dir, key_column, replaced_keys, rebuild):
+    """
+    Mode inkremental: baris ringkasan di processed_staging dengan key_column di replaced_keys diganti df.
+    Jika ringkasannya belum ada, ditulis lengkap sekali dari rebuild() (DataFrame seluruh ringkasan).
+    """
+    if summary_exists(processed_dir, dataset):
+        merge_summary(df, dataset, processed_dir, key_column, replaced_keys)
+    else:
+        logging.info(f"{dataset} not found in processed_staging, writing it in full.")
+        write_summary(rebuild(), dataset, processed_dir)
+
+
+def process_sensor_data(file_list, processed_dir, db_engine, curated_dir=None, incremental=False, retired_sources=(),
+                        max_workers=None):
+    """
+    Menerima daftar file sensor, mengagregasi, menyimpan ke CSV DAN memuat ke DB Staging.
+    Data dibaca per potongan dan langsung diringkas menjadi partial sum/count, sehingga riwayat
+    sensor tidak perlu muat di memori. Dengan max_workers > 1 (default SENSOR_MAX_WORKERS) file
+    dibagi ke beberapa proses dan partial-nya digabung di sini.
+
+    incremental=True: hanya file_list yang dibaca; partial lama dari file tersebut (dan dari
+    retired_sources, objek yang sudah hilang dari lake) diganti di tabel partial, lalu ringkasan
+    harian dihitung ulang (di PostgreSQL) hanya untuk tanggal yang tersentuh dan digabung ke output.
+    """
     logging.info(f"--- Processing {len(file_list)} Warehouse Sensor file(s) ---")
+    table_name = 'warehouse_daily_sensor_summary'
     try:
-        df_list = [pd.read_csv(f) for f in file_list]
-        df = pd.concat(df_list, ignore_index=True)
+        partials = aggregate_sensor_files(
+            file_list, RAW_DATA_LAKE_DIR, curated_dir,
+            max_workers=SENSOR_MAX_WORKERS if max_workers is None else max_workers,
+        )
 
-        if df.empty:
+        if partials.empty and not incremental:
             logging.warning("Warehouse sensor data is empty after reading files. No summary generated.")
             return
 
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df['date'] = df['timestamp'].dt.date
-        summary_df = df.groupby(['date', 'zone_id']).agg(
-            avg_temperature_c=('temperature_c', 'mean'),
-            avg_humidity_percent=('humidity_percent', 'mean')
-        ).reset_index()
-        summary_df['avg_temperature_c'] = summary_df['avg_temperature_c'].round(2)
-        summary_df['avg_humidity_percent'] = summary_df['avg_humidity_percent'].round(2)
+        if incremental:
+            replaced = {_lake_rel_path(f) for f in file_list} | set(retired_sources)
+            # Tanggal tersentuh: tanggal partial baru + tanggal partial lama yang akan diganti
+            touched_dates = set(partials['date']) | source_values(SENSOR_PARTIALS_TABLE, 'date', replaced, db_engine)
+            write_staging_table(partials, SENSOR_PARTIALS_TABLE, db_engine, replaced_sources=replaced)
+
+            def rebuild():
+                return reduce_sensor_partials(read_staging_table(SENSOR_PARTIALS_TABLE, db_engine))
+
+            if not staging_table_exists(table_name, db_engine):
+                write_staging_table(rebuild(), table_name, db_engine)
+            summary_df = reduce_sensor_partials(sum_sensor_partials(db_engine, touched_dates))
+            write_staging_table(summary_df, table_name, db_engine, replaced_sources=touched_dates, key_column='date')
+            merge_processed_summary(summary_df, SENSOR_SUMMARY, processed_dir, 'date', touched_dates, rebuild)
+            logging.info(f"Warehouse summary updated for {len(touched_dates)} date(s) ({len(summary_df)} row(s)) "
+                         f"in staging DB table '{table_name}' and processed_staging.")
+            return True
+
+        write_staging_table(partials, SENSOR_PARTIALS_TABLE, db_engine)
+        summary_df = reduce_sensor_partials(partials)
 
         if summary_df.empty:
             logging.warning("Warehouse sensor summary is empty after aggregation. Nothing to save.")
             return
 
-        # 1. TETAP SIMPAN KE CSV (untuk skrip load_to_dw)
-        output_path = os.path.join(processed_dir, 'warehouse_daily_sensor_summary.csv')
-        summary_df.to_csv(output_path, index=False)
-        logging.info(f"Successfully generated warehouse summary CSV with {len(summary_df)} rows.")
+        # 1. TETAP SIMPAN KE processed_staging (Arrow bertipe + CSV, untuk skrip load_to_dw)
+        write_summary(summary_df, SENSOR_SUMMARY, processed_dir)
+        logging.info(f"Successfully generated warehouse summary (Arrow + CSV) with {len(summary_df)} rows.")
 
         # 2. BARU: MUAT KE DATABASE STAGING
-        table_name = 'warehouse_daily_sensor_summary'
-        summary_df.to_sql(table_name, con=db_engine, if_exists='replace', index=False, method='multi')
+        write_staging_table(summary_df, table_name, db_engine)
         logging.info(f"Successfully loaded data to staging DB table '{table_name}'.")
+        return True
 
     except Exception as e:
         logging.error(f"An error occurred during sensor data processing: {e}", exc_info=True)
+        return False
+
+
+def read_tweet_file(file_path):
+    """Daftar tweet dari file media sosial: kolom tweet_text untuk CSV, satu tweet per baris untuk TXT."""
+    if file_path.endswith('.csv'):
+        df_temp = pd.read_csv(file_path)
+        return df_temp['tweet_text'].dropna().tolist() if 'tweet_text' in df_temp.columns else []
+    if file_path.endswith('.txt'):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return f.read().splitlines()
+    return []
 
 
-def process_social_media_data(file_list, processed_dir, db_engine):
-    """Menerima daftar file media sosial, menganalisis, menyimpan ke CSV DAN memuat ke DB Staging."""
+def score_tweets(texts, cache_dir):
+    """Menilai kolom tweet lewat cache sentimen di cache_dir; tanpa cache jika cache tidak bisa dibuka."""
+    try:
+        cache_conn = connect_cache(cache_dir)
+    except sqlite3.Error as e:
+        logging.warning(f"Sentiment cache unavailable, scoring all tweets: {e}")
+        return analyze_texts(texts)
+    try:
+        return analyze_texts_cached(texts, cache_conn, max_entries=SENTIMENT_CACHE_MAX_ENTRIES)
+    finally:
+        cache_conn.close()
+
+
+def process_social_media_data(file_list, processed_dir, db_engine, incremental=False, retired_sources=()):
+    """
+    Menerima daftar file media sosial, menganalisis, menyimpan ke CSV DAN memuat ke DB Staging.
+
+    incremental=True: hanya tweet dari file_list yang dianalisis; baris lama dari file tersebut
+    (dan dari retired_sources) diganti di tabel staging dan di ringkasan processed_staging, tanpa
+    membaca ulang tabel staging.
+    """
     logging.info(f"--- Processing {len(file_list)} Social Media file(s) ---")
     try:
-        all_tweets = []
+        frames = []
         for file_path in file_list:
-            if file_path.endswith('.csv'):
-                df_temp = pd.read_csv(file_path)
-                if 'tweet_text' in df_temp.columns:
-                    all_tweets.extend(df_temp['tweet_text'].dropna().tolist())
-            elif file_path.endswith('.txt'):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    all_tweets.extend(f.read().splitlines())
-        
-        if not all_tweets:
+            tweets = read_tweet_file(file_path)
+            if tweets:
+                frames.append(pd.DataFrame({
+                    'tweet_text': tweets,
+                    'original_filename': os.path.basename(file_path),
+                    'source_file': _lake_rel_path(file_path),
+                }))
+
+        if not frames and not incremental:
             logging.warning("No tweets found in social media files. Skipping.")
             return
 
-        df = pd.DataFrame(all_tweets, columns=['tweet_text'])
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['tweet_text', 'original_filename', 'source_file'])
         df.dropna(subset=['tweet_text'], inplace=True)
-        df = df[df['tweet_text'].str.strip() != '']
+        df = df[df['tweet_text'].astype(str).str.strip() != ''].copy()
 
-        if df.empty:
+        if df.empty and not incremental:
             logging.warning("DataFrame is empty after cleaning tweets. Skipping.")
             return
 
-        def get_sentiment(text):
-            try: return TextBlob(str(text)).sentiment.polarity
-            except: return 0.0
-        df['sentiment_score'] = df['tweet_text'].apply(get_sentiment)
-        
-        def get_category(score):
-            if score > 0.1: return 'Positive'
-            elif score < -0.1: return 'Negative'
-            else: return 'Neutral'
-        df['sentiment_category'] = df['sentiment_score'].apply(get_category)
-        
-        def get_top_words(text):
-            try:
-                words = [word.lower() for word in TextBlob(str(text)).words if len(word) > 2 and word.isalpha()]
-                return str(Counter(words).most_common(10))
-            except:
-                return str([])
-        
-        df['top_words_json'] = df['tweet_text'].apply(get_top_words)
+        # Skor, kategori, dan kata teratas dihitung sekaligus untuk seluruh kolom (TextBlob per baris hanya untuk teks dengan singkatan);
+        # teks yang sudah pernah dinilai diambil dari cache
+        df[['sentiment_score', 'sentiment_category', 'top_words_json']] = score_tweets(df['tweet_text'], ANALYSIS_CACHE_DIR)
         df['date_processed'] = pd.Timestamp.now().strftime('%Y-%m-%d')
-        df['original_filename'] = "aggregated_from_multiple_files"
+        df = df[SOCIAL_SUMMARY_COLUMNS]
 
-        # 1. TETAP SIMPAN KE CSV
-        output_path = os.path.join(processed_dir, 'social_media_analysis_summary.csv')
-        df.to_csv(output_path, index=False)
-        logging.info(f"Successfully generated social media analysis CSV with {len(df)} rows.")
-
-        # 2. BARU: MUAT KE DATABASE STAGING
+        # 1. MUAT KE DATABASE STAGING (mode inkremental: hanya baris dari file yang dianalisis ulang yang diganti)
         table_name = 'social_media_analysis_summary'
-        df.to_sql(table_name, con=db_engine, if_exists='replace', index=False, method='multi')
+        if incremental:
+            replaced = {_lake_rel_path(f) for f in file_list} | set(retired_sources)
+            write_staging_table(df, table_name, db_engine, replaced_sources=replaced)
+            logging.info(f"Successfully loaded {len(df)} row(s) from {len(file_list)} file(s) to staging DB table '{table_name}'.")
+            # 2. Baris yang sama digabung ke processed_staging (untuk skrip load_to_dw)
+            merge_processed_summary(df, SOCIAL_SUMMARY, processed_dir, SOURCE_COLUMN, replaced,
+                                    lambda: read_staging_table(table_name, db_engine))
+            logging.info("Social media analysis summary (Arrow + CSV) updated.")
+            return True
+        write_staging_table(df, table_name, db_engine)
         logging.info(f"Successfully loaded data to staging DB table '{table_name}'.")
 
+        # 2. TETAP SIMPAN KE processed_staging (isi lengkap, Arrow bertipe + CSV, untuk skrip load_to_dw)
+        write_summary(df, SOCIAL_SUMMARY, processed_dir)
+        logging.info(f"Successfully generated social media analysis summary (Arrow + CSV) with {len(df)} rows.")
+        return True
+
     except Exception as e:
         logging.error(f"An error occurred during social media processing: {e}", exc_info=True)
+        return False
 
 
-def parse_indonesian_currency(value_str):
-    """Helper function untuk mengubah string '1.2 Triliun' menjadi angka."""
-    if not isinstance(value_str, str): return None
-    value_str = value_str.lower().replace('idr', '').strip()
-    num_part_match = re.search(r'([\d.,]+)', value_str)
-    if not num_part_match: return None
-    num_str = num_part_match.group(1).replace('.', '').replace(',', '.')
-    num = float(num_str)
-    if 'triliun' in value_str: num *= 1_000_000_000_000
-    elif 'miliar' in value_str: num *= 1_000_000_000
-    elif 'juta' in value_str: num *= 1_000_000
-    return int(num)
-
+def process_financial_reports(file_list, processed_dir, db_engine, incremental=False, retired_sources=()):
+    """
+    Menerima daftar file laporan, mengekstrak, menyimpan ke CSV DAN memuat ke DB Staging.
 
-def process_financial_reports(file_list, processed_dir, db_engine):
-    """Menerima daftar file laporan, mengekstrak, menyimpan ke CSV DAN memuat ke DB Staging."""
+    incremental=True: hanya file_list yang diekstrak; baris lama dari file tersebut (dan dari
+    retired_sources) diganti di tabel staging dan di ringkasan processed_staging, tanpa membaca
+    ulang tabel staging.
+    """
     logging.info(f"--- Processing {len(file_list)} Financial Report file(s) ---")
     try:
         extracted_data = []
+        # Teks per halaman diambil dari cache (per sha256 isi file) atau diekstrak paralel untuk dokumen baru/berubah
+        hashes = lake_object_hashes(file_list)
+        documents = extract_documents(
+            {f: hashes.get(_lake_rel_path(f)) for f in file_list}, ANALYSIS_CACHE_DIR, max_workers=DOCUMENT_MAX_WORKERS
+        )
         for file_path in file_list:
-            content = ""
+            if file_path not in documents:
+                continue
             filename = os.path.basename(file_path)
-            logging.info(f"Extracting text from: {filename}")
-            try:
-                if file_path.endswith('.txt'):
-                    with open(file_path, 'r', encoding='utf-8') as f: content = f.read()
-                elif file_path.endswith('.pdf'):
-                    with fitz.open(file_path) as doc: content = "".join(page.get_text() for page in doc)
-                elif file_path.endswith('.docx'):
-                    doc = docx.Document(file_path)
-                    content = "\n".join([p.text for p in doc.paragraphs])
-            except Exception as extract_error:
-                logging.error(f"Could not extract text from {filename}. Error: {extract_error}")
+            source_file = _lake_rel_path(file_path)
+            document_type = detect_document_type(filename)
+            if document_type is None:
                 continue
-
-            if 'competitor' in filename.lower():
-                pattern = re.compile(
-                    r"Competitor\s+(?P<company_name>.+?)\s+-\s+Year:\s+(?P<year>\d{4}).*?"
-                    r"Revenue:\s+IDR\s+(?P<revenue>[\d,]+).*?"
-                    r"Net\s+Income:\s+IDR\s+(?P<net_income>[\d,]+)",
-                    re.DOTALL | re.IGNORECASE)
-                matches = pattern.finditer(content)
-                for match in matches:
-                    name_from_file = match.group('company_name').strip()
-                    company_name = name_from_file if 'competitor' in name_from_file.lower() else f"Competitor {name_from_file}"
-                    extracted_data.append({
-                        'original_filename': filename,
-                        'company_name': company_name,
-                        'report_year': int(match.group('year')),
-                        'report_type': 'Annual',
-                        'extracted_revenue': int(match.group('revenue').replace(',', '')),
-                        'extracted_net_profit': int(match.group('net_income').replace(',', ''))
-                    })
-            elif 'adventureworks' in filename.lower():
-                flags = re.IGNORECASE | re.DOTALL
-                year_match = re.search(r'tahun fiskal (\d{4})', content, flags)
-                revenue_match = re.search(r'pendapatan kotor.*? (IDR [\d.,]+ (?:Triliun|Miliar|Juta))', content, flags)
-                profit_match = re.search(r'laba bersih.*? (IDR [\d.,]+ (?:Triliun|Miliar|Juta))', content, flags)
+            if FINANCIAL_EXTRACTORS[document_type][1] is None:
+                logging.info(f"Skipping financial data extraction for {document_type.replace('_', ' ')}: {filename}")
+                continue
+            logging.info(f"Parsing financial data from: {filename}")
+            for record in extract_records(document_type, documents[file_path]):
                 extracted_data.append({
-                    'original_filename': filename, 'company_name': 'AdventureWorks',
-                    'report_year': int(year_match.group(1)) if year_match else None,
-                    'report_type': 'Annual',
-                    'extracted_revenue': parse_indonesian_currency(revenue_match.group(1)) if revenue_match else None,
-                    'extracted_net_profit': parse_indonesian_currency(profit_match.group(1)) if profit_match else None
+                    **record, 'original_filename': filename, 'source_file': source_file, 'document_type': document_type
                 })
-            elif 'market_report' in filename.lower():
-                logging.info(f"Skipping financial data extraction for market report: {filename}")
 
-        if not extracted_data:
+        if not extracted_data and not incremental:
             logging.warning("Could not extract any structured data from any of the financial reports.")
             return
             
-        df = pd.DataFrame(extracted_data)
+        # Nominal masih berupa teks; di-parse per jenis dokumen sekaligus untuk seluruh kolom
+        df = pd.DataFrame(extracted_data, columns=FINANCIAL_SUMMARY_COLUMNS + ['document_type'])
+        df = parse_record_amounts(df)[FINANCIAL_SUMMARY_COLUMNS]
+        df['report_year'] = df['report_year'].astype('Int64')
         df.dropna(subset=['report_year', 'extracted_revenue'], inplace=True)
-        if df.empty:
+        if df.empty and not incremental:
             logging.warning("Financial reports data frame is empty after filtering. Nothing to save.")
             return
 
-        # 1. TETAP SIMPAN KE CSV
-        output_path = os.path.join(processed_dir, 'financial_reports_summary.csv')
-        df.to_csv(output_path, index=False)
-        logging.info(f"SUCCESS: Successfully generated financial reports summary CSV with {len(df)} rows.")
-
-        # 2. BARU: MUAT KE DATABASE STAGING
+        # 1. MUAT KE DATABASE STAGING (mode inkremental: hanya baris dari file yang diekstrak ulang yang diganti)
         table_name = 'financial_reports_summary'
-        df.to_sql(table_name, con=db_engine, if_exists='replace', index=False, method='multi')
+        if incremental:
+            replaced = {_lake_rel_path(f) for f in file_list} | set(retired_sources)
+            write_staging_table(df, table_name, db_engine, replaced_sources=replaced)
+            logging.info(f"Successfully loaded {len(df)} row(s) from {len(file_list)} file(s) to staging DB table '{table_name}'.")
+            # 2. Baris yang sama digabung ke processed_staging (untuk skrip load_to_dw)
+            merge_processed_summary(df, FINANCIAL_SUMMARY, processed_dir, SOURCE_COLUMN, replaced,
+                                    lambda: read_staging_table(table_name, db_engine))
+            logging.info("SUCCESS: Financial reports summary (Arrow + CSV) updated.")
+            return True
+        write_staging_table(df, table_name, db_engine)
         logging.info(f"Successfully loaded data to staging DB table '{table_name}'.")
 
+        # 2. TETAP SIMPAN KE processed_staging (isi lengkap, Arrow bertipe + CSV, untuk skrip load_to_dw)
+        write_summary(df, FINANCIAL_SUMMARY, processed_dir)
+        logging.info(f"SUCCESS: Successfully generated financial reports summary (Arrow + CSV) with {len(df)} rows.")
+        return True
+
     except Exception as e:
         logging.error(f"A critical error occurred during financial report processing: {e}", exc_info=True)
+        return False
 
 # --- FUNGSI ORKESTRATOR UTAMA ---
 
-def analyze_all_datalake_data():
+def discover_lake_files(start_date=None, end_date=None):
+    """
+    Mengelompokkan file data lake per kategori. Jika katalog lake ada (ditulis oleh ingest),
+    dipakai lookup terindeks per kategori dan partisi; jika belum ada, jatuh kembali ke
+    listing partisi + klasifikasi nama file.
+    """
+    files_by_category = {cat: [] for cat in KEYWORD_MAP.keys()}
+
+    if catalog_exists(RAW_DATA_LAKE_DIR):
+        logging.info(f"Querying lake catalog for files (range: {start_date or '-'} to {end_date or '-'})...")
+        catalog_conn = connect_catalog(RAW_DATA_LAKE_DIR)
+        try:
+            for category in files_by_category:
+                for row in query_objects(catalog_conn, category=category, start_date=start_date, end_date=end_date):
+                    files_by_category[category].append(os.path.join(RAW_DATA_LAKE_DIR, *row['path'].split('/')))
+        finally:
+            catalog_conn.close()
+        return files_by_category
+
+    logging.info(f"Lake catalog not found, listing raw_data_lake partitions (range: {start_date or '-'} to {end_date or '-'})...")
+    for full_path, _ in list_partition_files(RAW_DATA_LAKE_DIR, start_date=start_date, end_date=end_date):
+        category = classify_file(full_path)
+        if category:
+            files_by_category[category].append(full_path)
+    return files_by_category
+
+
+def lake_object_hashes(file_paths):
+    """
+    sha256 per path relatif objek lake. Diambil dari katalog lake jika ada (tanpa membaca file);
+    objek yang tidak tercatat di katalog di-hash langsung. None jika file tidak bisa dibaca.
+    """
+    hashes = {}
+    if catalog_exists(RAW_DATA_LAKE_DIR):
+        catalog_conn = connect_catalog(RAW_DATA_LAKE_DIR)
+        try:
+            hashes = object_hashes(catalog_conn)
+        finally:
+            catalog_conn.close()
+    result = {}
+    for file_path in file_paths:
+        rel_path = _lake_rel_path(file_path)
+        if rel_path in hashes:
+            result[rel_path] = hashes[rel_path]
+            continue
+        try:
+            result[rel_path] = compute_file_hash(file_path)
+        except OSError as e:
+            logging.warning(f"Could not hash {rel_path}, it will be re-analyzed on every run: {e}")
+            result[rel_path] = None
+    return result
+
+
+def plan_incremental_analysis(files_by_category, checkpoint, hashes, detect_removed=True):
+    """
+    Membandingkan file lake dengan checkpoint. Return (pending, retired), keduanya dict per kategori:
+    - pending: file yang belum pernah dianalisis atau isinya (sha256) berubah
+    - retired: path relatif yang ada di checkpoint tetapi sudah tidak ada di lake
+      (hanya jika detect_removed, yaitu saat seluruh lake terlihat / tanpa filter tanggal)
+    """
+    pending, retired = {}, {}
+    for category, files in files_by_category.items():
+        present = set()
+        pending[category] = []
+        for file_path in files:
+            rel_path = _lake_rel_path(file_path)
+            present.add(rel_path)
+            done = checkpoint.get(rel_path)
+            if done is None or hashes.get(rel_path) is None or done[0] != hashes[rel_path]:
+                pending[category].append(file_path)
+        retired[category] = sorted(
+            path for path, (_, done_category) in checkpoint.items()
+            if detect_removed and done_category == category and path not in present
+        )
+    return pending, retired
+
+
+def update_search_index(files_by_category, hashes, detect_removed=True):
+    """
+    Memperbarui indeks full-text di samping lake: teks per halaman untuk semua dokumen kategori
+    financial (termasuk market report yang tidak diekstrak angkanya) dan setiap tweet kategori social.
+    Hanya objek baru/berubah (berdasarkan sha256) yang dibaca ulang; teks dokumen diambil dari cache teks.
+    """
+    paths = {_lake_rel_path(f): f for category in ('financial', 'social') for f in files_by_category[category]}
+    social = {_lake_rel_path(f) for f in files_by_category['social']}
+
+    def load_entries(rel_paths):
+        entries = {}
+        documents = extract_documents(
+            {paths[rel]: hashes.get(rel) for rel in rel_paths if rel not in social},
+            ANALYSIS_CACHE_DIR, max_workers=DOCUMENT_MAX_WORKERS
+        )
+        for rel in rel_paths:
+            if rel in social:
+                try:
+                    entries[rel] = tweet_entries(rel, read_tweet_file(paths[rel]))
+                except Exception as e:
+                    logging.error(f"Search index: could not read tweets from {rel}: {e}")
+            elif paths[rel] in documents:
+                entries[rel] = page_entries(rel, documents[paths[rel]])
+        return entries
+
+    try:
+        index_conn = connect_index(RAW_DATA_LAKE_DIR)
+        try:
+            update_index(index_conn, {rel: hashes.get(rel) for rel in paths}, load_entries, detect_removed=detect_removed)
+        finally:
+            index_conn.close()
+    except Exception as e:
+        logging.error(f"Could not update the lake search index: {e}", exc_info=True)
+
+
+def analyze_all_datalake_data(start_date=None, end_date=None, incremental=True):
     """
     Menjelajahi semua file, mengklasifikasikannya, lalu mendelegasikan
     ke fungsi pemroses yang sesuai.
+
+    start_date/end_date (opsional, 'YYYY-MM-DD', inklusif): hanya partisi dt=... dalam rentang
+    tersebut yang dibaca (partition pruning). Tanpa rentang, semua partisi dibaca.
+
+    incremental=True: hanya objek yang belum tercatat di tabel checkpoint (atau isinya berubah)
+    yang dianalisis, lalu hasilnya digabung ke output yang sudah ada. Jika checkpoint masih kosong,
+    atau incremental=False, seluruh output dibangun ulang dari awal.
     """
     logging.info("====== STARTING DATA LAKE ANALYSIS (SMART CLASSIFICATION) ======")
-    
-    # Bagian ini tetap relevan untuk membersihkan file CSV lama
-    logging.info("Cleaning up old processed files from local staging area...")
-    for filename in os.listdir(PROCESSED_STAGING_DIR):
+
+    checkpoint = {}
+    if incremental:
         try:
-            os.remove(os.path.join(PROCESSED_STAGING_DIR, filename))
-        except OSError as e:
-            logging.error(f"Error removing file {os.path.join(PROCESSED_STAGING_DIR, filename)}: {e}")
+            checkpoint = load_checkpoint(engine_staging)
+        except Exception as e:
+            logging.error(f"Could not read analysis checkpoint, running a full analysis instead: {e}")
+        if not checkpoint:
+            logging.info("No analysis checkpoint yet, running a full analysis.")
+            incremental = False
+
+    if not incremental:
+        # Bagian ini tetap relevan untuk membersihkan file CSV lama
+        logging.info("Cleaning up old processed files from local staging area...")
+        for filename in os.listdir(PROCESSED_STAGING_DIR):
+            try:
+                os.remove(os.path.join(PROCESSED_STAGING_DIR, filename))
+            except OSError as e:
+                logging.error(f"Error removing file {os.path.join(PROCESSED_STAGING_DIR, filename)}: {e}")
 
-    KEYWORD_MAP = {
-        'sensors': ['sensor', 'gudang', 'pendingin', 'warehouse', 'temp'],
-        'social': ['tweet', 'social_media', 'socmed'],
-        'financial': ['financial', 'laporan', 'report', 'keuangan', 'market', 'competitor']
-    }
-    
-    files_by_category = {cat: [] for cat in KEYWORD_MAP.keys()}
-    
-    logging.info("Walking through raw_data_lake to classify all files...")
-    for dirpath, _, filenames in os.walk(RAW_DATA_LAKE_DIR):
-        for filename in filenames:
-            file_lower = filename.lower()
-            full_path = os.path.join(dirpath, filename)
-            for category, keywords in KEYWORD_MAP.items():
-                if any(keyword in file_lower for keyword in keywords):
-                    files_by_category[category].append(full_path)
-                    break 
+    files_by_category = discover_lake_files(start_date, end_date)
 
     logging.info(f"Classification result: "
                  f"{len(files_by_category['sensors'])} sensor files, "
                  f"{len(files_by_category['social'])} social media files, "
                  f"{len(files_by_category['financial'])} financial reports.")
 
+    hashes = lake_object_hashes([f for files in files_by_category.values() for f in files])
+    if incremental:
+        pending, retired = plan_incremental_analysis(
+            files_by_category, checkpoint, hashes, detect_removed=start_date is None and end_date is None
+        )
+        logging.info("Incremental analysis: "
+                     + ", ".join(f"{category} {len(pending[category])} new/changed, {len(retired[category])} removed"
+                                 for category in files_by_category))
+    else:
+        pending = files_by_category
+        retired = {category: [] for category in files_by_category}
+
     # Panggil fungsi proses dengan menyertakan engine database
-    if files_by_category['sensors']:
-        process_sensor_data(files_by_category['sensors'], PROCESSED_STAGING_DIR, engine_staging)
-    if files_by_category['social']:
-        process_social_media_data(files_by_category['social'], PROCESSED_STAGING_DIR, engine_staging)
-    if files_by_category['financial']:
-        process_financial_reports(files_by_category['financial'], PROCESSED_STAGING_DIR, engine_staging)
+    results = {}
+    if pending['sensors'] or retired['sensors']:
+        results['sensors'] = process_sensor_data(
+            pending['sensors'], PROCESSED_STAGING_DIR, engine_staging, curated_dir=CURATED_LAKE_DIR,
+            incremental=incremental, retired_sources=retired['sensors'])
+    if pending['social'] or retired['social']:
+        results['social'] = process_social_media_data(
+            pending['social'], PROCESSED_STAGING_DIR, engine_staging,
+            incremental=incremental, retired_sources=retired['social'])
+    if pending['financial'] or retired['financial']:
+        results['financial'] = process_financial_reports(
+            pending['financial'], PROCESSED_STAGING_DIR, engine_staging,
+            incremental=incremental, retired_sources=retired['financial'])
+    if incremental and not results:
+        logging.info("All lake objects are already analyzed. Existing outputs are up to date.")
+
+    # Catat objek yang berhasil dianalisis di checkpoint; kategori yang gagal akan diulang pada run berikutnya
+    entries, removed = [], []
+    for category, result in results.items():
+        if result is False:
+            continue
+        entries.extend((_lake_rel_path(f), hashes.get(_lake_rel_path(f)), category) for f in pending[category])
+        removed.extend(retired[category])
+    try:
+        save_checkpoint(engine_staging, entries, removed_paths=removed, reset=not incremental)
+        logging.info(f"Analysis checkpoint updated: {len(entries)} object(s) recorded, {len(removed)} removed.")
+    except Exception as e:
+        logging.error(f"Could not update analysis checkpoint: {e}")
+
+    # Indeks pencarian dokumen & tweet (terpisah dari checkpoint: objek yang belum terindeks selalu diperiksa)
+    update_search_index(files_by_category, hashes, detect_removed=start_date is None and end_date is None)
+
+    # Catat status pemrosesan per objek di katalog lake
+    if catalog_exists(RAW_DATA_LAKE_DIR):
+        catalog_conn = connect_catalog(RAW_DATA_LAKE_DIR)
+        try:
+            for category, result in results.items():
+                rel_paths = [_lake_rel_path(f) for f in pending[category]]
+                set_status(catalog_conn, rel_paths, STATUS_FAILED if result is False else STATUS_ANALYZED)
+        finally:
+            catalog_conn.close()
     
     logging.info("====== DATA LAKE ANALYSIS PROCESS COMPLETED ======")
 
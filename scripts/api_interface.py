@@ -2,6 +2,7 @@ import pandas as pd
 from sqlalchemy import create_engine, text
 import logging
 import os
+import sys
 from datetime import datetime
 from collections import Counter
 import matplotlib
@@ -9,6 +10,14 @@ matplotlib.use('Agg')  # Mode non-interaktif, penting untuk server/otomasi
 import matplotlib.pyplot as plt
 from wordcloud import WordCloud
 
+# Tambahkan root proyek ke sys.path agar 'scripts.utils' bisa diimpor juga saat file ini dijalankan mandiri
+_PROJECT_ROOT_FOR_IMPORTS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PROJECT_ROOT_FOR_IMPORTS not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT_FOR_IMPORTS)
+
+from scripts.utils.lake_search import connect_index, index_exists, keyword_query, phrase_query, search
+from scripts.utils.lake_partitions import normalize_date
+
 # --- 1. Konfigurasi ---
 pg_user = "postgres"
 pg_pass = "**************"
@@ -16,11 +25,15 @@ pg_host = "localhost"
 pg_port = "5432"
 pg_dw_db = "adventureworks_dw"
 
+# Jumlah kata default untuk word cloud (top-N dihitung di PostgreSQL)
+WORD_CLOUD_TOP_N = 100
+
 # Setup Engine dan Logging
 try:
     engine_dw = create_engine(f"postgresql+psycopg2://{pg_user}:{pg_pass}@{pg_host}:{pg_port}/{pg_dw_db}")
     SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
     LOG_DIR = os.path.join(SCRIPT_DIR, '..', 'logs')
+    RAW_DATA_LAKE_DIR = os.path.join(SCRIPT_DIR, '..', 'raw_data_lake')
     os.makedirs(LOG_DIR, exist_ok=True)
     
     logging.basicConfig(
@@ -63,20 +76,31 @@ def get_all_warehouse_temperatures():
         logging.error(f"API Error fetching warehouse temperature data: {e}")
         return pd.DataFrame()
 
-def get_word_frequency_data():
-    # ... (Fungsi ini tidak berubah) ...
-    logging.info(f"API: Fetching word frequency data for word cloud.")
-    query = "SELECT top_words_json FROM fact_social_media_sentiment;"
+def get_word_frequency_data(limit=WORD_CLOUD_TOP_N, start_date=None, end_date=None, sentiment_category=None):
+    """
+    Top-N kata untuk word cloud, diagregasi di PostgreSQL dari fact_word_frequency
+    (GROUP BY ... ORDER BY ... LIMIT); hanya `limit` baris yang dikirim ke Python.
+    Filter opsional: rentang tanggal (inklusif) dan nama kategori sentimen. Return Counter kata -> jumlah.
+    """
+    logging.info(f"API: Fetching top {limit} words for word cloud.")
+    query = "SELECT fwf.word, SUM(fwf.count) AS total FROM fact_word_frequency fwf"
+    clauses, params = [], {'limit': limit}
+    if sentiment_category:
+        query += " JOIN dim_sentiment_category dsc ON fwf.sentiment_id = dsc.sentiment_id"
+        clauses.append("dsc.category_name = :sentiment_category")
+        params['sentiment_category'] = str(sentiment_category).strip().capitalize()
+    if start_date is not None:
+        clauses.append("fwf.datekey >= :start_datekey")
+        params['start_datekey'] = int(normalize_date(start_date).replace('-', ''))
+    if end_date is not None:
+        clauses.append("fwf.datekey <= :end_datekey")
+        params['end_datekey'] = int(normalize_date(end_date).replace('-', ''))
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += " GROUP BY fwf.word ORDER BY total DESC, fwf.word LIMIT :limit;"
     try:
-        df = pd.read_sql(text(query), engine_dw)
-        all_words_combined = Counter()
-        for json_str in df['top_words_json'].dropna():
-            try:
-                word_list = eval(json_str)
-                all_words_combined.update(dict(word_list))
-            except Exception as e:
-                logging.warning(f"Error parsing top_words_json string: {e}")
-        return all_words_combined
+        df = pd.read_sql(text(query), engine_dw, params=params)
+        return Counter(dict(zip(df['word'], df['total'].astype(int))))
     except Exception as e:
         logging.error(f"API Error fetching word frequency data: {e}")
         return Counter()
@@ -104,6 +128,37 @@ def get_financial_summary(exclude_companies=None):
         logging.error(f"API Error fetching financial summary: {e}")
         return pd.DataFrame()
 
+def _search_lake(match_expression, kind=None, start_date=None, end_date=None, limit=50):
+    """Menjalankan pencarian pada indeks full-text data lake; DataFrame kosong jika indeks belum dibangun."""
+    columns = ['lake_path', 'kind', 'position', 'entry_date', 'snippet', 'score']
+    if not index_exists(RAW_DATA_LAKE_DIR):
+        logging.warning("API: Lake search index not found. Run the data lake analysis first.")
+        return pd.DataFrame(columns=columns)
+    try:
+        conn = connect_index(RAW_DATA_LAKE_DIR)
+        try:
+            rows = search(conn, match_expression, kind=kind, start_date=start_date, end_date=end_date, limit=limit)
+        finally:
+            conn.close()
+        return pd.DataFrame([tuple(row) for row in rows], columns=columns)
+    except Exception as e:
+        logging.error(f"API Error searching the data lake: {e}")
+        return pd.DataFrame(columns=columns)
+
+def search_lake_keywords(keywords, match_all=True, kind=None, start_date=None, end_date=None, limit=50):
+    """
+    Pencarian kata kunci di halaman dokumen (PDF/DOCX/TXT) dan tweet data lake.
+    keywords: list atau string dipisah spasi; match_all=False cukup salah satu kata cocok.
+    kind: None (semua), 'page', atau 'tweet'. Hasil diurutkan berdasarkan relevansi.
+    """
+    logging.info(f"API: Searching lake for keywords {keywords!r} (kind: {kind or 'all'}).")
+    return _search_lake(keyword_query(keywords, match_all=match_all), kind, start_date, end_date, limit)
+
+def search_lake_phrase(phrase, kind=None, start_date=None, end_date=None, limit=50):
+    """Pencarian frasa persis di halaman dokumen dan tweet data lake."""
+    logging.info(f"API: Searching lake for phrase {phrase!r} (kind: {kind or 'all'}).")
+    return _search_lake(phrase_query(phrase), kind, start_date, end_date, limit)
+
 # --- 3. FUNGSI-FUNGSI GENERASI VISUALISASI (GENERATORS) ---
 
 def generate_competitor_trend_chart(financial_data, output_dir):
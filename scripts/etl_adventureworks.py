@@ -1,10 +1,29 @@
 import pandas as pd
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, inspect, text
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack, contextmanager
 from datetime import datetime
+from functools import partial
 import os
+import sys
 from sqlalchemy.dialects import postgresql # Import ini untuk ON CONFLICT DO NOTHING
 
+# Tambahkan root proyek ke sys.path agar 'scripts.utils' bisa diimpor juga saat file ini dijalankan mandiri
+_PROJECT_ROOT_FOR_IMPORTS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PROJECT_ROOT_FOR_IMPORTS not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT_FOR_IMPORTS)
+
+from scripts.utils.pg_copy import copy_rows
+from scripts.utils.dimension_loader import load_dimension
+from scripts.utils.bulk_load import bulk_upsert, log_bulk_counts
+from scripts.utils.staging_cdc import (
+    WATERMARK_COLUMN, load_watermarks, save_watermarks, begin_change_set, stage_changes, apply_change_set,
+    begin_key_set, stage_keys, delete_missing_keys, record_pending_deletes, load_pending_deletes, clear_pending_deletes
+)
+
 # --- 1. Konfigurasi Database ---
 pg_user = "postgres"
 pg_pass = "*************" 
@@ -15,9 +34,31 @@ pg_adventureworks_source = "Adventureworks"     # Database OLTP sumber
 pg_staging_db = "adventureworks_staging"        # Database untuk Staging Area
 pg_dw_db = "adventureworks_dw"                  # Database untuk Data Warehouse
 
+# Paralelisme salin tabel sumber -> staging: jumlah thread penyalin, dan batas koneksi bersamaan per database
+# (setiap tabel memakai 1 koneksi sumber + 1 koneksi staging per tabel target). Pool engine diukur sesuai batas ini.
+TABLE_COPY_WORKERS = 4
+DB_MAX_CONCURRENCY = {
+    pg_adventureworks_source: 4,
+    pg_staging_db: 8,
+}
+
+# Dimensi yang menyimpan riwayat Type-2 (valid_from/valid_to) di tabel <dimensi>_history
+SCD2_DIMENSIONS = {"dim_employee"}
+
+# ELT fact_sales: join, datekey, dan totalpenjualan dihitung di PostgreSQL (INSERT ... SELECT di DW yang membaca
+# staging lewat dblink) tanpa melewati Python. Butuh extension dblink di DW; jika gagal, jatuh kembali ke pandas.
+FACT_SALES_ELT = True
+STAGING_DBLINK_CONNINFO = f"host={pg_host} port={pg_port} dbname={pg_staging_db} user={pg_user} password={pg_pass}"
+
 # SQLAlchemy Engines
-engine_adventure_source = create_engine(f"postgresql+psycopg2://{pg_user}:{pg_pass}@{pg_host}:{pg_port}/{pg_adventureworks_source}")
-engine_staging = create_engine(f"postgresql+psycopg2://{pg_user}:{pg_pass}@{pg_host}:{pg_port}/{pg_staging_db}")
+engine_adventure_source = create_engine(
+    f"postgresql+psycopg2://{pg_user}:{pg_pass}@{pg_host}:{pg_port}/{pg_adventureworks_source}",
+    pool_size=DB_MAX_CONCURRENCY[pg_adventureworks_source], max_overflow=2, pool_pre_ping=True
+)
+engine_staging = create_engine(
+    f"postgresql+psycopg2://{pg_user}:{pg_pass}@{pg_host}:{pg_port}/{pg_staging_db}",
+    pool_size=DB_MAX_CONCURRENCY[pg_staging_db], max_overflow=2, pool_pre_ping=True
+)
 engine_dw = create_engine(f"postgresql+psycopg2://{pg_user}:{pg_pass}@{pg_host}:{pg_port}/{pg_dw_db}")
 
 # --- 2. Konfigurasi Logging ---
@@ -34,79 +75,486 @@ logging.basicConfig(
     ]
 )
 
-# --- 3. Fungsi Utama ETL ---
+# --- 3. Pemetaan Tabel Sumber -> Staging ---
+# Salinan mentah (raw_*) dan tabel staging antara (stg_*). Satu tabel sumber bisa punya beberapa target;
+# planner ekstraksi membaca setiap tabel sumber sekali lalu menulis ke semua targetnya.
+RAW_TABLES = {
+    "Sales.SalesOrderDetail": "raw_salesorderdetail",
+    "Sales.SalesOrderHeader": "raw_salesorderheader",
+    "Production.Product": "raw_product",
+    "Sales.Customer": "raw_customer",
+    "Person.Person": "raw_person",
+    "Production.ProductCategory": "raw_productcategory",
+    "Production.ProductSubcategory": "raw_productsubcategory",
+    "Sales.Store": "raw_store",
+    "Purchasing.Vendor": "raw_vendor",
+    "Purchasing.ProductVendor": "raw_productvendor",
+    "HumanResources.Employee": "raw_employee",
+    "HumanResources.EmployeeDepartmentHistory": "raw_employeedepartmenthistory",
+    "HumanResources.Department": "raw_department"
+}
+
+STG_TABLES = {
+    "Person.Address": "stg_address",
+    "Person.BusinessEntityAddress": "stg_businessentityaddress",
+    "Person.CountryRegion": "stg_countryregion", 
+    "Sales.Customer": "stg_customer",
+    "HumanResources.Department": "stg_department",
+    "Person.EmailAddress": "stg_emailaddress",
+    "HumanResources.Employee": "stg_employee",
+    "HumanResources.EmployeeDepartmentHistory": "stg_employeedepartmenthistory",
+    "Person.Person": "stg_person",
+    "Person.PersonPhone": "stg_personphone",
+    "Production.Product": "stg_product",
+    "Production.ProductCategory": "stg_productcategory",
+    "Production.ProductSubcategory": "stg_productsubcategory",
+    "Purchasing.ProductVendor": "stg_productvendor",
+    "Sales.SalesOrderDetail": "stg_salesorderdetail",
+    "Sales.SalesOrderHeader": "stg_salesorderheader",
+    "Person.StateProvince": "stg_stateprovince", 
+    "Sales.Store": "stg_store",
+    "Purchasing.Vendor": "stg_vendor"
+}
+
+# Kunci baris (primary key) tiap tabel sumber, dipakai ETL inkremental (CDC) untuk upsert dan deteksi
+# baris yang dihapus. Kolom pertama juga dipakai untuk menelusuri dimensi/fakta yang terdampak.
+SOURCE_KEYS = {
+    "Sales.SalesOrderDetail": ["salesorderid", "salesorderdetailid"],
+    "Sales.SalesOrderHeader": ["salesorderid"],
+    "Production.Product": ["productid"],
+    "Sales.Customer": ["customerid"],
+    "Person.Person": ["businessentityid"],
+    "Production.ProductCategory": ["productcategoryid"],
+    "Production.ProductSubcategory": ["productsubcategoryid"],
+    "Sales.Store": ["businessentityid"],
+    "Purchasing.Vendor": ["businessentityid"],
+    "Purchasing.ProductVendor": ["productid", "businessentityid"],
+    "HumanResources.Employee": ["businessentityid"],
+    "HumanResources.EmployeeDepartmentHistory": ["businessentityid", "departmentid", "shiftid", "startdate"],
+    "HumanResources.Department": ["departmentid"],
+    "Person.Address": ["addressid"],
+    "Person.BusinessEntityAddress": ["businessentityid", "addressid", "addresstypeid"],
+    "Person.CountryRegion": ["countryregioncode"],
+    "Person.EmailAddress": ["businessentityid", "emailaddressid"],
+    "Person.PersonPhone": ["businessentityid", "phonenumber", "phonenumbertypeid"],
+    "Person.StateProvince": ["stateprovinceid"],
+}
+
+# CDC: bandingkan seluruh kunci sumber dengan staging untuk menemukan baris yang dihapus di sumber
+# (hanya kolom kunci yang dibaca; ModifiedDate tidak bisa menangkap penghapusan)
+DETECT_SOURCE_DELETES = True
+
+# Mode salin tabel: True = streaming (server-side cursor di sumber, COPY per batch ke tabel staging
+# yang sudah didefinisikan di create_database_schemas.sql); False = pandas read_sql + to_sql (tabel diganti).
+STREAMING_TABLE_COPY = True
+# Jumlah baris per batch fetch dari server-side cursor (dan per perintah COPY); menentukan memori puncak
+STREAM_BATCH_ROWS = 50_000
+
+# --- 4. Fungsi Utama ETL ---
+
+# Tabel yang dikosongkan sebelum muat penuh
+ADVENTUREWORKS_STAGING_TABLES = list(RAW_TABLES.values()) + list(STG_TABLES.values())
+# Dimensi AdventureWorks tidak pernah dikosongkan: pada muat penuh loader hash-diff menyisipkan/memperbarui
+# barisnya dan menutup/membuka versi di <dimensi>_history, sehingga riwayat Type-2 tetap utuh.
+# Hanya tabel fakta yang dibangun ulang.
+ADVENTUREWORKS_FACT_TABLES = ["fact_sales"]
+# dim_date dipakai bersama fakta AdventureWorks dan Data Lake (TRUNCATE ... CASCADE mengenai keduanya)
+SHARED_DW_TABLES = ["dim_date"]
+DATALAKE_DW_TABLES = [
+    "dim_warehouse_zone", "dim_sentiment_category", "fact_warehouse_temperature",
+    "fact_social_media_sentiment", "dim_company", "fact_financial", # Tambahkan tabel finansial
+    "fact_word_frequency"
+]
+
+
+def _truncate_tables(engine, db_name, tables):
+    with engine.connect() as conn:
+        for table in tables:
+            try:
+                conn.execute(text(f"TRUNCATE TABLE {table} CASCADE;"))
+                conn.commit()
+                logging.info(f"Cleared data from {table} in {db_name}.")
+            except Exception as e:
+                logging.warning(f"Failed to clear data from {table} in {db_name} (table might not exist yet or in use): {e}")
+                conn.rollback()
 
-def drop_all_tables_in_dbs():
-    """Truncates (clears) all tables in staging and DW databases for a clean run."""
-    
-    tables_to_clear_staging = [
-        "raw_salesorderdetail", "raw_salesorderheader", "raw_product", "raw_customer",
-        "raw_person", "raw_productcategory", "raw_productsubcategory", "raw_store",
-        "raw_vendor", "raw_productvendor", "raw_employeedepartmenthistory", "raw_department",
-        "raw_employee",
-        "stg_address", "stg_businessentityaddress", "stg_countryregion", "stg_customer",
-        "stg_department", "stg_emailaddress", "stg_employee", "stg_employeedepartmenthistory",
-        "stg_person", "stg_personphone", "stg_product", "stg_productcategory",
-        "stg_productsubcategory", "stg_productvendor", "stg_salesorderdetail", "stg_salesorderheader",
-        "stg_stateprovince", "stg_store", "stg_vendor"
-    ]
-    
-    tables_to_clear_dw = [
-        "dim_product", "dim_customer", "dim_store", "dim_vendor", "dim_employee", 
-        "dim_date", "fact_sales",
-        "dim_warehouse_zone", "dim_sentiment_category", "fact_warehouse_temperature",
-        "fact_social_media_sentiment", "dim_company", "fact_financial" # Tambahkan tabel finansial
-    ]
 
+def drop_all_tables_in_dbs(include_adventureworks=True, include_datalake=True):
+    """
+    Truncates (clears) all tables in staging and DW databases for a clean run.
+    include_adventureworks=False: tabel AdventureWorks (staging, fact_sales, dim_date)
+    dipertahankan untuk ETL inkremental (CDC). Dimensi AdventureWorks dan riwayatnya tidak pernah
+    dikosongkan (lihat ADVENTUREWORKS_FACT_TABLES).
+    include_datalake=False: tabel DW Data Lake dipertahankan (fakta dimuat ulang per partisi tanggal).
+    """
     logging.info("Clearing existing data from Staging and DW databases (TRUNCATE TABLE)...")
 
-    with engine_dw.connect() as conn_dw:
-        for table in tables_to_clear_dw:
+    if include_adventureworks:
+        _truncate_tables(engine_dw, pg_dw_db, ADVENTUREWORKS_FACT_TABLES + SHARED_DW_TABLES + DATALAKE_DW_TABLES)
+        _truncate_tables(engine_staging, pg_staging_db, ADVENTUREWORKS_STAGING_TABLES)
+        # Staging kosong: watermark lama tidak berlaku lagi, run berikutnya harus muat penuh
+        try:
+            save_watermarks(engine_staging, {}, reset=True)
+            logging.info("AdventureWorks CDC state reset.")
+        except Exception as e:
+            logging.warning(f"Failed to reset AdventureWorks CDC state: {e}")
+    elif include_datalake:
+        _truncate_tables(engine_dw, pg_dw_db, DATALAKE_DW_TABLES)
+    else:
+        logging.info("Incremental mode: no tables to clear.")
+
+    logging.info("All specified tables cleared in staging and DW databases.")
+
+
+def copy_raw_tables_to_staging():
+    """Copies selected tables from AdventureWorks source to the staging database."""
+    extract_sources_to_staging(RAW_TABLES)
+
+
+def plan_source_extraction(*table_maps):
+    """
+    Menggabungkan beberapa pemetaan {tabel sumber: tabel staging} menjadi rencana ekstraksi
+    {tabel sumber: [tabel staging, ...]}, sehingga setiap tabel sumber hanya dibaca sekali.
+    Urutan sumber dan target mengikuti urutan kemunculan pada pemetaan.
+    """
+    plan = {}
+    for table_map in table_maps:
+        for src_table, dest_table in table_map.items():
+            targets = plan.setdefault(src_table, [])
+            if dest_table not in targets:
+                targets.append(dest_table)
+    return plan
+
+
+def _prepare_copy_target(conn, dest_table, columns, first_batch):
+    """
+    Menyiapkan satu tabel staging untuk streaming COPY di transaksi conn: tabel yang sudah ada
+    di-TRUNCATE (DDL dari create_database_schemas.sql tetap dipakai), tabel yang belum ada dibuat
+    dengan tipe yang diinfer dari batch pertama. Return (kolom yang dimuat, posisinya di baris sumber).
+    """
+    inspector = inspect(conn)
+    if inspector.has_table(dest_table):
+        conn.execute(text(f"TRUNCATE TABLE {dest_table}"))
+        target_columns = {column['name'].lower() for column in inspector.get_columns(dest_table)}
+    else:
+        logging.warning(f"{dest_table} is not defined in the staging schema; creating it from the source columns.")
+        sample = pd.DataFrame([tuple(row) for row in first_batch[:1000]], columns=columns)
+        conn.execute(text(pd.io.sql.get_schema(sample, dest_table, con=conn)))
+        target_columns = {column.lower() for column in columns}
+
+    positions = [i for i, column in enumerate(columns) if column.lower() in target_columns]
+    skipped = [column for column in columns if column.lower() not in target_columns]
+    if skipped:
+        logging.warning(f"{dest_table}: source column(s) not in the staging table are skipped: {', '.join(skipped)}")
+    return [columns[i] for i in positions], positions
+
+
+def stream_source_to_staging(src_table, dest_tables, batch_rows=None):
+    """
+    Menyalin satu tabel sumber ke beberapa tabel staging tanpa memuat seluruh tabel ke memori:
+    baris dibaca per batch lewat server-side cursor (stream_results) dan setiap batch langsung
+    di-COPY ke semua target. Setiap target punya koneksi & transaksi sendiri (TRUNCATE + COPY),
+    sehingga target yang gagal di-rollback tanpa menghentikan target lain.
+    Return dict tabel staging -> True/False.
+    """
+    batch_rows = batch_rows or STREAM_BATCH_ROWS
+    results = {}
+    with ExitStack() as stack:
+        src_conn = stack.enter_context(
+            engine_adventure_source.connect().execution_options(stream_results=True, max_row_buffer=batch_rows)
+        )
+        result = src_conn.execute(text(f"SELECT * FROM {src_table}"))
+        columns = list(result.keys())
+        batches = result.partitions(batch_rows)
+        first_batch = next(batches, [])
+
+        targets = {}
+        for dest_table in dest_tables:
+            try:
+                conn = stack.enter_context(engine_staging.connect())
+                transaction = conn.begin()
+                copy_columns, positions = _prepare_copy_target(conn, dest_table, columns, first_batch)
+                targets[dest_table] = (conn, transaction, copy_columns, positions)
+            except Exception as e:
+                logging.error(f"Failed to prepare {dest_table} for {src_table}: {e}")
+                results[dest_table] = False
+
+        row_count = 0
+        batch = first_batch
+        while batch and targets:
+            for dest_table, (conn, transaction, copy_columns, positions) in list(targets.items()):
+                try:
+                    copy_rows(conn, dest_table, copy_columns, batch, positions)
+                except Exception as e:
+                    logging.error(f"Failed to load {src_table} to {dest_table}: {e}")
+                    transaction.rollback()
+                    del targets[dest_table]
+                    results[dest_table] = False
+            row_count += len(batch)
+            batch = next(batches, [])
+
+        for dest_table, (conn, transaction, _, _) in targets.items():
             try:
-                conn_dw.execute(text(f"TRUNCATE TABLE {table} CASCADE;"))
-                logging.info(f"Cleared data from {table} in {pg_dw_db}.")
+                transaction.commit()
+                logging.info(f"{dest_table} loaded ({row_count} rows, streamed).")
+                results[dest_table] = True
             except Exception as e:
-                logging.warning(f"Failed to clear data from {table} in {pg_dw_db} (table might not exist yet or in use): {e}")
-        conn_dw.commit()
+                logging.error(f"Failed to commit {dest_table}: {e}")
+                results[dest_table] = False
+    return results
 
-    with engine_staging.connect() as conn_stg:
-        for table in tables_to_clear_staging:
+
+def cdc_source_to_staging(src_table, dest_tables, watermark, changes, batch_rows=None):
+    """
+    ETL inkremental satu tabel sumber: hanya baris dengan ModifiedDate >= watermark yang dibaca
+    (server-side cursor), di-COPY ke tabel sementara lalu di-upsert berdasarkan kunci ke setiap target;
+    baris yang isinya sama dengan staging tidak dihitung sebagai perubahan.
+    Jika DETECT_SOURCE_DELETES, seluruh kunci sumber dibandingkan dengan target untuk menghapus baris
+    yang sudah tidak ada di sumber; kunci yang dihapus dicatat sebagai penghapusan tertunda di transaksi
+    yang sama (lihat staging_cdc.record_pending_deletes). Setiap target diproses dalam transaksinya sendiri.
+    Jika semua target berhasil, changes[src_table] diisi: watermark baru, jumlah baris sumber,
+    set kunci yang berubah dan yang dihapus. Return dict tabel staging -> True/False.
+    """
+    batch_rows = batch_rows or STREAM_BATCH_ROWS
+    key_columns = SOURCE_KEYS[src_table]
+    results, targets = {}, {}
+    changed_keys, deleted_keys = set(), set()
+    new_watermark, source_rows = watermark, None
+
+    def fail(dest_table, action, error):
+        logging.error(f"Failed to {action} {dest_table} from {src_table}: {error}")
+        targets.pop(dest_table)[1].rollback()
+        results[dest_table] = False
+
+    with ExitStack() as stack:
+        src_conn = stack.enter_context(
+            engine_adventure_source.connect().execution_options(stream_results=True, max_row_buffer=batch_rows)
+        )
+        # 1. Baris baru/berubah sejak watermark
+        if watermark is None:
+            result = src_conn.execute(text(f"SELECT * FROM {src_table}"))
+        else:
+            result = src_conn.execute(
+                text(f"SELECT * FROM {src_table} WHERE {WATERMARK_COLUMN} >= :watermark"), {"watermark": watermark}
+            )
+        columns = list(result.keys())
+        watermark_position = columns.index(WATERMARK_COLUMN)
+
+        column_maps = {}
+        for dest_table in dest_tables:
             try:
-                conn_stg.execute(text(f"TRUNCATE TABLE {table} CASCADE;"))
-                logging.info(f"Cleared data from {table} in {pg_staging_db}.")
+                conn = stack.enter_context(engine_staging.connect())
+                transaction = conn.begin()
+                target_columns = {column['name'].lower() for column in inspect(conn).get_columns(dest_table)}
+                positions = [i for i, column in enumerate(columns) if column.lower() in target_columns]
+                column_maps[dest_table] = ([columns[i] for i in positions], positions)
+                begin_change_set(conn, dest_table)
+                targets[dest_table] = (conn, transaction)
             except Exception as e:
-                logging.warning(f"Failed to clear data from {table} in {pg_staging_db} (table might not exist yet or in use): {e}")
-        conn_stg.commit()
-    
-    logging.info("All specified tables cleared in staging and DW databases.")
+                logging.error(f"Failed to prepare {dest_table} for {src_table}: {e}")
+                results[dest_table] = False
+
+        for batch in result.partitions(batch_rows):
+            for dest_table, (conn, _) in list(targets.items()):
+                try:
+                    copy_columns, positions = column_maps[dest_table]
+                    stage_changes(conn, copy_columns, batch, positions)
+                except Exception as e:
+                    fail(dest_table, "stage changes for", e)
+            batch_max = max((row[watermark_position] for row in batch if row[watermark_position] is not None), default=None)
+            if batch_max is not None and (new_watermark is None or batch_max > new_watermark):
+                new_watermark = batch_max
+
+        for dest_table, (conn, _) in list(targets.items()):
+            try:
+                changed_keys.update(apply_change_set(conn, dest_table, key_columns, column_maps[dest_table][0]))
+            except Exception as e:
+                fail(dest_table, "apply changes to", e)
+
+        # 2. Deteksi penghapusan: kunci yang ada di staging tetapi tidak ada lagi di sumber
+        if DETECT_SOURCE_DELETES and targets:
+            for dest_table, (conn, _) in list(targets.items()):
+                try:
+                    begin_key_set(conn, dest_table, key_columns)
+                except Exception as e:
+                    fail(dest_table, "prepare key set for", e)
+            source_rows = 0
+            key_result = src_conn.execute(text(f"SELECT {', '.join(key_columns)} FROM {src_table}"))
+            for batch in key_result.partitions(batch_rows):
+                for dest_table, (conn, _) in list(targets.items()):
+                    try:
+                        stage_keys(conn, key_columns, batch)
+                    except Exception as e:
+                        fail(dest_table, "stage source keys for", e)
+                source_rows += len(batch)
+            for dest_table, (conn, _) in list(targets.items()):
+                try:
+                    target_deleted = delete_missing_keys(conn, dest_table, key_columns)
+                    record_pending_deletes(conn, src_table, target_deleted)
+                    deleted_keys.update(target_deleted)
+                except Exception as e:
+                    fail(dest_table, "detect deletes in", e)
+
+        for dest_table, (conn, transaction) in targets.items():
+            try:
+                transaction.commit()
+                results[dest_table] = True
+            except Exception as e:
+                logging.error(f"Failed to commit {dest_table}: {e}")
+                results[dest_table] = False
 
+    logging.info(f"{src_table}: {len(changed_keys)} changed and {len(deleted_keys)} deleted row(s) applied to "
+                 f"{', '.join(dest for dest in dest_tables if results.get(dest))}.")
+    if all(results.get(dest_table) for dest_table in dest_tables):
+        changes[src_table] = {
+            'watermark': new_watermark, 'source_rows': source_rows,
+            'changed': changed_keys, 'deleted': deleted_keys,
+        }
+    return results
 
-def copy_raw_tables_to_staging():
-    """Copies selected tables from AdventureWorks source to the staging database."""
-    tables_to_copy = {
-        "Sales.SalesOrderDetail": "raw_salesorderdetail",
-        "Sales.SalesOrderHeader": "raw_salesorderheader",
-        "Production.Product": "raw_product",
-        "Sales.Customer": "raw_customer",
-        "Person.Person": "raw_person",
-        "Production.ProductCategory": "raw_productcategory",
-        "Production.ProductSubcategory": "raw_productsubcategory",
-        "Sales.Store": "raw_store",
-        "Purchasing.Vendor": "raw_vendor",
-        "Purchasing.ProductVendor": "raw_productvendor",
-        "HumanResources.Employee": "raw_employee",
-        "HumanResources.EmployeeDepartmentHistory": "raw_employeedepartmenthistory",
-        "HumanResources.Department": "raw_department"
-    }
-
-    for src_table, dest_table in tables_to_copy.items():
+
+# Slot koneksi yang sedang dipakai per database, dijaga satu Condition agar beberapa slot diambil sekaligus
+_db_slots_in_use = {}
+_db_slots_condition = threading.Condition()
+
+
+@contextmanager
+def db_slots(**slots_per_db):
+    """
+    Menunggu sampai semua slot koneksi yang diminta (nama database -> jumlah) tersedia, lalu
+    mengambilnya sekaligus (tidak ada job yang memegang sebagian slot sambil menunggu sisanya).
+    Permintaan yang melebihi batas dipangkas ke batas database tersebut.
+    """
+    wanted = {db: min(count, DB_MAX_CONCURRENCY.get(db, count)) for db, count in slots_per_db.items()}
+    with _db_slots_condition:
+        _db_slots_condition.wait_for(lambda: all(
+            _db_slots_in_use.get(db, 0) + count <= DB_MAX_CONCURRENCY.get(db, count) for db, count in wanted.items()
+        ))
+        for db, count in wanted.items():
+            _db_slots_in_use[db] = _db_slots_in_use.get(db, 0) + count
+    try:
+        yield
+    finally:
+        with _db_slots_condition:
+            for db, count in wanted.items():
+                _db_slots_in_use[db] -= count
+            _db_slots_condition.notify_all()
+
+
+def estimate_source_rows(src_tables):
+    """Perkiraan jumlah baris tiap tabel sumber dari statistik PostgreSQL (pg_class.reltuples); 0 jika tidak diketahui."""
+    estimates = {src_table: 0 for src_table in src_tables}
+    try:
+        with engine_adventure_source.connect() as conn:
+            for src_table in src_tables:
+                reltuples = conn.execute(
+                    text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:name)"), {"name": src_table}
+                ).scalar()
+                estimates[src_table] = max(int(reltuples or 0), 0)
+    except Exception as e:
+        logging.warning(f"Could not estimate source table sizes, copy order is unsorted: {e}")
+    return estimates
+
+
+def copy_source_to_staging(src_table, dest_tables, streaming=None):
+    """
+    Menyalin satu tabel sumber (dibaca sekali) ke semua tabel staging targetnya.
+    Return dict tabel staging -> True/False.
+    """
+    streaming = STREAMING_TABLE_COPY if streaming is None else streaming
+    if streaming:
+        logging.info(f"Streaming {src_table} once to {', '.join(dest_tables)}...")
+        try:
+            return stream_source_to_staging(src_table, dest_tables)
+        except Exception as e:
+            logging.error(f"Failed to read {src_table}: {e}")
+            return {dest_table: False for dest_table in dest_tables}
+
+    try:
+        logging.info(f"Reading {src_table} once for {', '.join(dest_tables)}...")
+        df = pd.read_sql(f"SELECT * FROM {src_table}", engine_adventure_source)
+    except Exception as e:
+        logging.error(f"Failed to read {src_table}: {e}")
+        return {dest_table: False for dest_table in dest_tables}
+    results = {}
+    for dest_table in dest_tables:
         try:
-            logging.info(f"Copying {src_table} to {dest_table} in {pg_staging_db}...")
-            df = pd.read_sql(f"SELECT * FROM {src_table}", engine_adventure_source)
             df.to_sql(dest_table, engine_staging, if_exists='replace', index=False)
-            logging.info(f"{dest_table} copied.")
+            logging.info(f"{dest_table} loaded ({len(df)} rows).")
+            results[dest_table] = True
         except Exception as e:
-            logging.error(f"Failed to copy {src_table}: {e}")
+            logging.error(f"Failed to load {src_table} to {dest_table}: {e}")
+            results[dest_table] = False
+    return results
+
+
+def _scheduled_copy(copy_job, src_table, dest_tables, staging_slots):
+    with db_slots(**{pg_adventureworks_source: 1, pg_staging_db: staging_slots}):
+        return copy_job(src_table, dest_tables)
+
+
+def extract_sources_to_staging(*table_maps, streaming=None, max_workers=None, watermarks=None, changes=None):
+    """
+    Menjalankan rencana ekstraksi: setiap tabel sumber di-SELECT sekali dari database OLTP,
+    lalu hasilnya ditulis ke semua tabel staging yang membutuhkannya (raw_* dan/atau stg_*).
+    streaming (default STREAMING_TABLE_COPY): baca per batch + COPY ke tabel staging yang ada;
+    False: seluruh tabel dibaca ke DataFrame lalu ditulis dengan to_sql (tabel diganti).
+    Tabel sumber disalin paralel oleh max_workers thread (default TABLE_COPY_WORKERS), terbesar lebih dulu,
+    dengan batas koneksi per database DB_MAX_CONCURRENCY.
+    watermarks (dict tabel sumber -> watermark, dari load_watermarks): mode inkremental (CDC), hanya
+    perubahan yang disalin lewat cdc_source_to_staging; ringkasan perubahan per tabel sumber ditulis ke changes.
+    Return dict tabel staging -> True/False (berhasil dimuat).
+    """
+    streaming = STREAMING_TABLE_COPY if streaming is None else streaming
+    workers = max(1, max_workers or TABLE_COPY_WORKERS)
+    plan = plan_source_extraction(*table_maps)
+    target_count = sum(len(targets) for targets in plan.values())
+    if watermarks is not None:
+        mode = ' (incremental)'
+        copy_job = lambda src_table, dest_tables: cdc_source_to_staging(
+            src_table, dest_tables, watermarks.get(src_table), changes if changes is not None else {}
+        )
+    else:
+        mode = ' (streaming)' if streaming else ''
+        copy_job = partial(copy_source_to_staging, streaming=streaming)
+    logging.info(f"Extraction plan: {len(plan)} source table read(s) for {target_count} staging table(s)"
+                 f"{mode}, {workers} worker(s).")
+
+    started = time.perf_counter()
+    results = {}
+    if workers == 1:
+        for src_table, dest_tables in plan.items():
+            try:
+                results.update(copy_job(src_table, dest_tables))
+            except Exception as e:
+                logging.error(f"Copy of {src_table} failed: {e}")
+                results.update({dest_table: False for dest_table in dest_tables})
+    else:
+        # Tabel terbesar dijadwalkan lebih dulu agar waktu total mendekati waktu salin tabel terbesar
+        estimates = estimate_source_rows(plan)
+        ordered = sorted(plan, key=lambda src_table: estimates[src_table], reverse=True)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='table-copy') as executor:
+            futures = {
+                # Streaming/CDC memegang koneksi ke semua target sekaligus; mode pandas menulis target satu per satu
+                executor.submit(
+                    _scheduled_copy, copy_job, src_table, plan[src_table],
+                    len(plan[src_table]) if streaming or watermarks is not None else 1
+                ): src_table
+                for src_table in ordered
+            }
+            for future in as_completed(futures):
+                try:
+                    results.update(future.result())
+                except Exception as e:
+                    src_table = futures[future]
+                    logging.error(f"Copy of {src_table} failed: {e}")
+                    results.update({dest_table: False for dest_table in plan[src_table]})
+
+    failed = [dest_table for dest_table, ok in results.items() if not ok]
+    logging.info(f"Staging copy finished in {time.perf_counter() - started:.1f}s: "
+                 f"{len(results) - len(failed)} loaded, {len(failed)} failed"
+                 f"{' (' + ', '.join(sorted(failed)) + ')' if failed else ''}.")
+    return results
 
 
 def create_stg_tables():
@@ -126,38 +574,7 @@ def transform_raw_to_stg_tables():
     NOTE: Customize transformation logic here for each stg_ table.
     """
     logging.info("Transforming raw_ tables to stg_ tables...")
-
-    tables_for_stg_load = {
-        "Person.Address": "stg_address",
-        "Person.BusinessEntityAddress": "stg_businessentityaddress",
-        "Person.CountryRegion": "stg_countryregion", 
-        "Sales.Customer": "stg_customer",
-        "HumanResources.Department": "stg_department",
-        "Person.EmailAddress": "stg_emailaddress",
-        "HumanResources.Employee": "stg_employee",
-        "HumanResources.EmployeeDepartmentHistory": "stg_employeedepartmenthistory",
-        "Person.Person": "stg_person",
-        "Person.PersonPhone": "stg_personphone",
-        "Production.Product": "stg_product",
-        "Production.ProductCategory": "stg_productcategory",
-        "Production.ProductSubcategory": "stg_productsubcategory",
-        "Purchasing.ProductVendor": "stg_productvendor",
-        "Sales.SalesOrderDetail": "stg_salesorderdetail",
-        "Sales.SalesOrderHeader": "stg_salesorderheader",
-        "Person.StateProvince": "stg_stateprovince", 
-        "Sales.Store": "stg_store",
-        "Purchasing.Vendor": "stg_vendor"
-    }
-    
-    for src_table_name, dest_stg_table_name in tables_for_stg_load.items():
-        try:
-            logging.info(f"Loading {src_table_name} to {dest_stg_table_name}...")
-            df = pd.read_sql(f"SELECT * FROM {src_table_name}", engine_adventure_source)
-            df.to_sql(dest_stg_table_name, engine_staging, if_exists='replace', index=False)
-            logging.info(f"{dest_stg_table_name} loaded successfully.")
-        except Exception as e:
-            logging.error(f"Failed to load {src_table_name} to {dest_stg_table_name}: {e}")
-
+    extract_sources_to_staging(STG_TABLES)
     logging.info("Transformation from raw_ to stg_ tables completed.")
 
 
@@ -170,36 +587,44 @@ def create_dim_fact_tables_aw():
     pass
 
 # --- Extraction Functions (membaca dari staging) ---
-def extract_dim_product():
-    return pd.read_sql("""
+# where/params opsional: filter tambahan (mis. hanya kunci yang berubah pada ETL inkremental)
+def _and_where(where, keyword="WHERE"):
+    return f"{keyword} ({where})" if where else ""
+
+def extract_dim_product(where=None, params=None):
+    return pd.read_sql(text(f"""
         SELECT ProductID AS productid, Name, Color, Size, Weight 
         FROM raw_product
-    """, engine_staging)
+        {_and_where(where)}
+    """), engine_staging, params=params)
 
-def extract_dim_customer():
-    return pd.read_sql("""
+def extract_dim_customer(where=None, params=None):
+    return pd.read_sql(text(f"""
         SELECT c.CustomerID AS customerid,
                p.FirstName || ' ' || p.LastName AS name,
                p.Title,
                p.AdditionalContactInfo AS demographic
         FROM raw_customer c
         JOIN raw_person p ON c.PersonID = p.BusinessEntityID
-    """, engine_staging)
+        {_and_where(where)}
+    """), engine_staging, params=params)
 
-def extract_dim_store():
-    return pd.read_sql("""
+def extract_dim_store(where=None, params=None):
+    return pd.read_sql(text(f"""
         SELECT BusinessEntityID AS storeid, Name AS storename
         FROM raw_store
-    """, engine_staging)
+        {_and_where(where)}
+    """), engine_staging, params=params)
 
-def extract_dim_vendor():
-    return pd.read_sql("""
+def extract_dim_vendor(where=None, params=None):
+    return pd.read_sql(text(f"""
         SELECT BusinessEntityID AS vendorid, Name AS vendorname
         FROM raw_vendor
-    """, engine_staging)
+        {_and_where(where)}
+    """), engine_staging, params=params)
 
-def extract_dim_employee():
-    return pd.read_sql("""
+def extract_dim_employee(where=None, params=None):
+    return pd.read_sql(text(f"""
         SELECT e.BusinessEntityID AS employeeid,
                p.FirstName || ' ' || p.LastName AS fullname,
                e.JobTitle,
@@ -209,7 +634,8 @@ def extract_dim_employee():
         JOIN raw_employeedepartmenthistory edh ON e.BusinessEntityID = edh.BusinessEntityID
         JOIN raw_department d ON edh.DepartmentID = d.DepartmentID
         WHERE edh.EndDate IS NULL
-    """, engine_staging)
+        {_and_where(where, "AND")}
+    """), engine_staging, params=params)
 
 def generate_dim_date(start='2010-01-01', end='2025-12-31'): # Rentang tahun diperluas
     date_range = pd.date_range(start=start, end=end)
@@ -221,97 +647,323 @@ def generate_dim_date(start='2010-01-01', end='2025-12-31'): # Rentang tahun dip
     df['year'] = df['fulldate'].dt.year
     return df[['datekey', 'fulldate', 'day', 'month', 'year']]
 
-def extract_fact_sales_order_detail():
-    return pd.read_sql("""
+def extract_fact_sales_order_detail(where=None, params=None):
+    return pd.read_sql(text(f"""
         SELECT salesorderdetailid, productid, orderqty AS qtyproduct,
                unitprice, unitpricediscount AS unitpricedisc, salesorderid
         FROM raw_salesorderdetail
-    """, engine_staging)
+        {_and_where(where)}
+    """), engine_staging, params=params)
 
-def extract_fact_sales_order_header():
-    return pd.read_sql("""
+def extract_fact_sales_order_header(where=None, params=None):
+    return pd.read_sql(text(f"""
         SELECT soh.salesorderid, soh.orderdate,
                soh.customerid, soh.salespersonid AS employeeid,
                c.storeid
         FROM raw_salesorderheader soh
         LEFT JOIN raw_customer c ON soh.customerid = c.customerid
-    """, engine_staging)
+        {_and_where(where)}
+    """), engine_staging, params=params)
+
+
+# Kolom fact_sales; salesorderid + salesorderdetailid adalah kunci alami baris (untuk ETL inkremental)
+FACT_SALES_COLUMNS = ['salesorderid', 'salesorderdetailid', 'productid', 'customerid', 'storeid', 'vendorid',
+                      'employeeid', 'datekey', 'qtyproduct', 'unitprice', 'unitpricedisc', 'totalpenjualan']
+
+def build_fact_sales(salesorderids=None):
+    """Baris fact_sales dari staging; salesorderids membatasi ke pesanan tertentu (None = semua)."""
+    if salesorderids is None:
+        df_detail = extract_fact_sales_order_detail()
+        df_header = extract_fact_sales_order_header()
+    else:
+        params = {"orders": list(salesorderids)}
+        df_detail = extract_fact_sales_order_detail("salesorderid = ANY(:orders)", params)
+        df_header = extract_fact_sales_order_header("soh.salesorderid = ANY(:orders)", params)
+    df_fact = pd.merge(df_detail, df_header, on="salesorderid")
+
+    df_pv = pd.read_sql("SELECT productid, businessentityid AS vendorid FROM raw_productvendor", engine_staging)
+    df_fact = df_fact.merge(df_pv, on='productid', how='left')
+
+    df_fact['datekey'] = pd.to_datetime(df_fact['orderdate']).dt.strftime('%Y%m%d').astype(int)
+    df_fact['totalpenjualan'] = df_fact['qtyproduct'] * (df_fact['unitprice'] - df_fact['unitpricedisc'])
+    return df_fact[FACT_SALES_COLUMNS]
+
+
+# Query yang dijalankan di DB staging untuk ELT fact_sales; hasil setara build_fact_sales
+# (datekey YYYYMMDD dihitung aritmetika tanggal, bukan format string). {where} diisi filter pesanan opsional.
+FACT_SALES_ELT_QUERY = """
+    SELECT sod.salesorderid, sod.salesorderdetailid, sod.productid, soh.customerid, c.storeid,
+           pv.businessentityid AS vendorid, soh.salespersonid AS employeeid,
+           (EXTRACT(YEAR FROM soh.orderdate) * 10000 + EXTRACT(MONTH FROM soh.orderdate) * 100
+            + EXTRACT(DAY FROM soh.orderdate))::int AS datekey,
+           sod.orderqty AS qtyproduct, sod.unitprice, sod.unitpricediscount AS unitpricedisc,
+           sod.orderqty * (sod.unitprice - sod.unitpricediscount) AS totalpenjualan
+    FROM raw_salesorderdetail sod
+    JOIN raw_salesorderheader soh ON soh.salesorderid = sod.salesorderid
+    LEFT JOIN raw_customer c ON c.customerid = soh.customerid
+    LEFT JOIN raw_productvendor pv ON pv.productid = sod.productid
+    {where}
+"""
+# Tipe kolom hasil dblink, urutan sama dengan FACT_SALES_COLUMNS
+FACT_SALES_ELT_TYPES = {
+    'salesorderid': 'INT', 'salesorderdetailid': 'INT', 'productid': 'INT', 'customerid': 'INT', 'storeid': 'INT',
+    'vendorid': 'INT', 'employeeid': 'INT', 'datekey': 'INT', 'qtyproduct': 'INT',
+    'unitprice': 'NUMERIC', 'unitpricedisc': 'NUMERIC', 'totalpenjualan': 'NUMERIC',
+}
+
+def insert_fact_sales_elt(conn_dw, salesorderids=None):
+    """
+    INSERT ... SELECT ke fact_sales di dalam transaksi conn_dw: join, datekey, dan totalpenjualan
+    dihitung oleh PostgreSQL di DB staging dan dialirkan lewat dblink. salesorderids membatasi ke pesanan
+    tertentu (None = semua). Return jumlah baris yang disisipkan.
+    """
+    conn_dw.execute(text("CREATE EXTENSION IF NOT EXISTS dblink"))
+    params = {"conninfo": STAGING_DBLINK_CONNINFO}
+    if salesorderids is None:
+        params["remote_sql"] = FACT_SALES_ELT_QUERY.format(where="")
+        remote_sql = ":remote_sql"
+    else:
+        # Daftar pesanan disisipkan ke query remote sebagai literal array lewat format(%L)
+        params["remote_sql"] = FACT_SALES_ELT_QUERY.format(where="WHERE sod.salesorderid = ANY(%L::int[])")
+        params["orders"] = list(salesorderids)
+        remote_sql = "format(:remote_sql, CAST(:orders AS int[]))"
+    columns = ", ".join(FACT_SALES_COLUMNS)
+    column_types = ", ".join(f"{column} {FACT_SALES_ELT_TYPES[column]}" for column in FACT_SALES_COLUMNS)
+    return conn_dw.execute(text(f"""
+        INSERT INTO fact_sales ({columns})
+        SELECT {columns} FROM dblink(:conninfo, {remote_sql}) AS t({column_types})
+    """), params).rowcount
+
+
+def load_fact_sales():
+    """Memuat seluruh fact_sales: ELT di PostgreSQL jika FACT_SALES_ELT, selain itu (atau jika ELT gagal) lewat pandas."""
+    if FACT_SALES_ELT:
+        started = time.perf_counter()
+        try:
+            with engine_dw.begin() as conn_dw:
+                inserted = insert_fact_sales_elt(conn_dw)
+            logging.info(f"Loaded {inserted} rows into fact_sales in {pg_dw_db} (in-database ELT, "
+                         f"{time.perf_counter() - started:.1f}s).")
+            return True
+        except Exception as e:
+            # e.orig: pesan driver tanpa parameter terikat (conninfo dblink berisi password)
+            logging.warning(f"In-database ELT for fact_sales failed, falling back to pandas: {getattr(e, 'orig', e)}")
+    return load_df_to_dw(build_fact_sales(), 'fact_sales')
 
 
 # --- REVISED: load_df_to_dw untuk menangani UniqueViolation pada dimensi ---
 def load_df_to_dw(df, table_name, pk_col=None):
     """
     Loads a DataFrame to a specified table in the DW database.
-    For dimension tables, it attempts to insert and ignores duplicates based on primary key.
+    For dimension tables, rows are compared by row hash per primary key: only new or changed rows
+    are written (with Type-2 history for tables in SCD2_DIMENSIONS).
     For fact tables, it appends data.
+    Return True jika berhasil.
     """
     try:
         if pk_col: # Ini adalah tabel dimensi
-            data_to_insert = df.to_dict(orient='records')
-            
-            columns = ", ".join(df.columns)
-            placeholders = ", ".join([f":{col}" for col in df.columns])
-            
-            insert_stmt = text(f"""
-                INSERT INTO {table_name} ({columns})
-                VALUES ({placeholders})
-                ON CONFLICT ({pk_col}) DO NOTHING;
-            """)
-            
-            with engine_dw.connect() as conn_dw:
-                conn_dw.execute(insert_stmt, data_to_insert)
-                conn_dw.commit()
-            logging.info(f"Loaded {len(df)} rows into {table_name} in {pg_dw_db} (ON CONFLICT DO NOTHING for PK '{pk_col}').")
+            load_dimension(df, table_name, pk_col, engine_dw, history=table_name in SCD2_DIMENSIONS)
 
         else: # Ini adalah tabel fakta (tidak ada pk_col yang diberikan, akan selalu 'append')
-            df.to_sql(table_name, engine_dw, if_exists='append', index=False)
-            logging.info(f"Loaded {len(df)} rows into {table_name} in {pg_dw_db} (appended).")
+            with engine_dw.begin() as conn_dw:
+                log_bulk_counts(table_name, bulk_upsert(conn_dw, df, table_name), pg_dw_db)
+        return True
 
     except Exception as e:
         logging.error(f"Failed to load {table_name} to {pg_dw_db}: {e}")
+        return False
+
+
+# --- ETL Inkremental (CDC) ---
+# Dimensi yang di-refresh dari perubahan staging: tabel -> (fungsi ekstraksi, PK, {tabel sumber: kolom filter}).
+# Kolom filter dicocokkan dengan kolom kunci pertama (SOURCE_KEYS) dari baris yang berubah di tabel sumber tersebut.
+DIM_CHANGE_SOURCES = {
+    "dim_product": (extract_dim_product, "productid", {"Production.Product": "ProductID"}),
+    "dim_customer": (extract_dim_customer, "customerid", {
+        "Sales.Customer": "c.CustomerID", "Person.Person": "p.BusinessEntityID",
+    }),
+    "dim_store": (extract_dim_store, "storeid", {"Sales.Store": "BusinessEntityID"}),
+    "dim_vendor": (extract_dim_vendor, "vendorid", {"Purchasing.Vendor": "BusinessEntityID"}),
+    "dim_employee": (extract_dim_employee, "employeeid", {
+        "HumanResources.Employee": "e.BusinessEntityID", "Person.Person": "p.BusinessEntityID",
+        "HumanResources.EmployeeDepartmentHistory": "edh.BusinessEntityID", "HumanResources.Department": "d.DepartmentID",
+    }),
+}
+
+
+def _changed_ids(changes, src_table, include_deleted=False):
+    """Nilai kolom kunci pertama dari baris yang berubah (dan opsional yang dihapus) di src_table."""
+    change = changes.get(src_table)
+    if not change:
+        return []
+    keys = change['changed'] | change['deleted'] if include_deleted else change['changed']
+    return sorted({key[0] for key in keys})
+
+
+def capture_source_watermarks(src_tables):
+    """
+    MAX(ModifiedDate) dan jumlah baris tiap tabel sumber, diambil SEBELUM muat penuh: baris yang berubah
+    selama penyalinan punya ModifiedDate >= watermark ini sehingga ikut terbaca pada run inkremental berikutnya.
+    """
+    watermarks = {}
+    try:
+        with engine_adventure_source.connect() as conn:
+            for src_table in src_tables:
+                row = conn.execute(text(f"SELECT MAX({WATERMARK_COLUMN}), COUNT(*) FROM {src_table}")).one()
+                watermarks[src_table] = (row[0], row[1])
+    except Exception as e:
+        logging.warning(f"Could not capture source watermarks, the next run will be a full load again: {e}")
+        return {}
+    return watermarks
+
+
+def replace_fact_sales_orders(salesorderids):
+    """Mengganti baris fact_sales milik pesanan tertentu dengan versi terbaru dari staging (satu transaksi)."""
+    def delete_orders(conn_dw):
+        return conn_dw.execute(
+            text("DELETE FROM fact_sales WHERE salesorderid = ANY(:orders)"), {"orders": list(salesorderids)}
+        ).rowcount
 
+    if FACT_SALES_ELT:
+        try:
+            with engine_dw.begin() as conn_dw:
+                deleted = delete_orders(conn_dw)
+                inserted = insert_fact_sales_elt(conn_dw, salesorderids)
+            logging.info(f"fact_sales: {len(salesorderids)} order(s) refreshed in-database "
+                         f"({deleted} row(s) removed, {inserted} inserted).")
+            return True
+        except Exception as e:
+            # e.orig: pesan driver tanpa parameter terikat (conninfo dblink berisi password)
+            logging.warning(f"In-database ELT for fact_sales failed, falling back to pandas: {getattr(e, 'orig', e)}")
+    try:
+        df_fact = build_fact_sales(salesorderids)
+        with engine_dw.begin() as conn_dw:
+            deleted = delete_orders(conn_dw)
+            inserted = bulk_upsert(conn_dw, df_fact, 'fact_sales')['inserted']
+        logging.info(f"fact_sales: {len(salesorderids)} order(s) refreshed ({deleted} row(s) removed, {inserted} inserted).")
+        return True
+    except Exception as e:
+        logging.error(f"Failed to refresh fact_sales for changed orders: {e}")
+        return False
 
-def run_adventureworks_etl():
-    """Orchestrates the ETL process for AdventureWorks data."""
+
+def load_changes_to_dw(changes):
+    """
+    Meneruskan perubahan staging (hasil cdc_source_to_staging) ke DW: hanya baris dimensi yang
+    terdampak yang di-upsert, dan hanya pesanan yang terdampak yang dibangun ulang di fact_sales.
+    Baris dimensi tidak dihapus (masih dirujuk fakta historis). Return True jika semua berhasil.
+    """
+    ok = True
+    for dim_table, (extract, pk_col, filters) in DIM_CHANGE_SOURCES.items():
+        params, clauses = {}, []
+        for i, (src_table, column) in enumerate(filters.items()):
+            ids = _changed_ids(changes, src_table)
+            if ids:
+                params[f"ids_{i}"] = ids
+                clauses.append(f"{column} = ANY(:ids_{i})")
+        if not clauses:
+            logging.info(f"{dim_table}: no source changes.")
+            continue
+        ok = load_df_to_dw(extract(" OR ".join(clauses), params), dim_table, pk_col=pk_col) and ok
+
+    # Pesanan terdampak: detail/header berubah atau dihapus, pelanggan (storeid) atau relasi produk-vendor berubah
+    orders = set(_changed_ids(changes, "Sales.SalesOrderDetail", include_deleted=True))
+    orders |= set(_changed_ids(changes, "Sales.SalesOrderHeader", include_deleted=True))
+    customers = _changed_ids(changes, "Sales.Customer")
+    products = _changed_ids(changes, "Purchasing.ProductVendor", include_deleted=True)
+    if customers or products:
+        orders |= set(pd.read_sql(text("""
+            SELECT salesorderid FROM raw_salesorderheader WHERE customerid = ANY(:customers)
+            UNION
+            SELECT salesorderid FROM raw_salesorderdetail WHERE productid = ANY(:products)
+        """), engine_staging, params={"customers": customers, "products": products})['salesorderid'].tolist())
+    if not orders:
+        logging.info("fact_sales: no affected orders.")
+        return ok
+    return replace_fact_sales_orders(sorted(orders)) and ok
+
+
+def run_adventureworks_etl(incremental=False):
+    """
+    Orchestrates the ETL process for AdventureWorks data.
+    incremental=True: hanya baris sumber yang berubah sejak watermark terakhir (ModifiedDate) yang
+    disalin ke staging dan diteruskan ke dimensi dan fact_sales; baris yang dihapus di sumber ikut dihapus.
+    Tanpa status CDC (run pertama, atau setelah drop_all_tables_in_dbs) dijalankan muat penuh.
+    """
     
     logging.info("--- Starting AdventureWorks ETL Process ---")
-    
-    logging.info("Copying raw data from AdventureWorks source to staging database...")
-    copy_raw_tables_to_staging()
 
+    watermarks = None
+    if incremental:
+        try:
+            watermarks = load_watermarks(engine_staging) or None
+        except Exception as e:
+            logging.error(f"Could not read AdventureWorks CDC state: {e}")
+        if watermarks is None:
+            # fact_sales tidak dikosongkan orkestrator pada mode inkremental; dimensi dimuat lewat hash-diff
+            logging.info("No AdventureWorks CDC state yet, running a full load.")
+            _truncate_tables(engine_dw, pg_dw_db, ADVENTUREWORKS_FACT_TABLES)
+
+    if watermarks is not None:
+        logging.info("Applying source changes to raw_ and stg_ staging tables (incremental)...")
+        changes = {}
+        extract_sources_to_staging(RAW_TABLES, STG_TABLES, watermarks=watermarks, changes=changes)
+
+        # Penghapusan yang sudah di staging tetapi belum sampai di DW (termasuk dari run sebelumnya yang gagal)
+        pending_deletes = {}
+        try:
+            pending_deletes = load_pending_deletes(engine_staging)
+        except Exception as e:
+            logging.error(f"Could not read pending AdventureWorks deletes: {e}")
+        for src_table, keys in pending_deletes.items():
+            changes.setdefault(src_table, {'changed': set(), 'deleted': set()})['deleted'] |= keys
+
+        load_df_to_dw(generate_dim_date(), "dim_date", pk_col="datekey")
+        logging.info("Applying changes to AdventureWorks dimension and fact tables...")
+        if load_changes_to_dw(changes):
+            # Watermark hanya maju jika perubahan sudah sampai di DW; jika tidak, perubahan dibaca ulang run berikutnya
+            save_watermarks(engine_staging, {
+                src_table: (change['watermark'], change['source_rows'])
+                for src_table, change in changes.items() if 'watermark' in change
+            })
+            clear_pending_deletes(engine_staging, pending_deletes)
+        logging.info(f"--- AdventureWorks incremental ETL completed: {len(changes)} source table(s) synced. ---")
+        return
+    
     logging.info("Creating intermediate staging tables (stg_...) schema...")
     create_stg_tables() # Panggilan fungsi tanpa DDL di dalamnya
 
-    logging.info("Transforming and Loading raw data to intermediate staging tables (stg_)...")
-    transform_raw_to_stg_tables() # Mengisi tabel stg_...
+    source_watermarks = capture_source_watermarks(plan_source_extraction(RAW_TABLES, STG_TABLES))
+
+    # Satu kali baca per tabel sumber untuk raw_* (salinan mentah) dan stg_* (staging antara) sekaligus
+    logging.info("Copying source tables to raw_ and stg_ staging tables (single read per source table)...")
+    staging_results = extract_sources_to_staging(RAW_TABLES, STG_TABLES)
 
     logging.info("Creating AdventureWorks Star Schema tables in DW database...")
     create_dim_fact_tables_aw() # Panggilan fungsi tanpa DDL di dalamnya
 
     logging.info("Transforming and Loading dimension tables for AdventureWorks...")
-    load_df_to_dw(extract_dim_product(), "dim_product", pk_col="productid")
-    load_df_to_dw(extract_dim_customer(), "dim_customer", pk_col="customerid")
-    load_df_to_dw(extract_dim_store(), "dim_store", pk_col="storeid")
-    load_df_to_dw(extract_dim_vendor(), "dim_vendor", pk_col="vendorid")
-    load_df_to_dw(extract_dim_employee(), "dim_employee", pk_col="employeeid")
+    loaded = [
+        load_df_to_dw(extract_dim_product(), "dim_product", pk_col="productid"),
+        load_df_to_dw(extract_dim_customer(), "dim_customer", pk_col="customerid"),
+        load_df_to_dw(extract_dim_store(), "dim_store", pk_col="storeid"),
+        load_df_to_dw(extract_dim_vendor(), "dim_vendor", pk_col="vendorid"),
+        load_df_to_dw(extract_dim_employee(), "dim_employee", pk_col="employeeid"),
+    ]
 
     logging.info("Generating and Loading dim_date for AdventureWorks...")
-    load_df_to_dw(generate_dim_date(), "dim_date", pk_col="datekey")
+    loaded.append(load_df_to_dw(generate_dim_date(), "dim_date", pk_col="datekey"))
 
     logging.info("Transforming and Loading fact_sales for AdventureWorks...")
-    df_detail = extract_fact_sales_order_detail()
-    df_header = extract_fact_sales_order_header()
-    df_fact = pd.merge(df_detail, df_header, on="salesorderid")
+    loaded.append(load_fact_sales())
 
-    df_pv = pd.read_sql("SELECT productid, businessentityid AS vendorid FROM raw_productvendor", engine_staging)
-    df_fact = df_fact.merge(df_pv, on='productid', how='left')
-
-    df_fact['datekey'] = pd.to_datetime(df_fact['orderdate']).dt.strftime('%Y%m%d').astype(int)
-    df_fact['totalpenjualan'] = df_fact['qtyproduct'] * (df_fact['unitprice'] - df_fact['unitpricedisc'])
-
-    load_df_to_dw(df_fact[['productid', 'customerid', 'storeid', 'vendorid',
-                             'employeeid', 'datekey', 'qtyproduct',
-                             'unitprice', 'unitpricedisc', 'totalpenjualan']], 'fact_sales')
+    # Status CDC untuk run inkremental berikutnya; hanya jika staging dan DW termuat lengkap
+    if all(loaded) and staging_results and all(staging_results.values()) and source_watermarks:
+        try:
+            save_watermarks(engine_staging, source_watermarks, reset=True)
+            logging.info(f"AdventureWorks CDC state recorded for {len(source_watermarks)} source table(s).")
+        except Exception as e:
+            logging.error(f"Could not record AdventureWorks CDC state: {e}")
     
     logging.info("--- AdventureWorks ETL Process completed successfully. ---")
 
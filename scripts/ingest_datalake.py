@@ -1,7 +1,26 @@
 import os
+import sys
 import shutil
 import logging
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Tambahkan root proyek ke sys.path agar 'scripts.utils' bisa diimpor juga saat file ini dijalankan mandiri
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from scripts.utils.lake_manifest import (
+    compute_file_hash, empty_manifest, load_manifest, save_manifest,
+    is_source_unchanged, lake_path_shared, record_source
+)
+from scripts.utils.file_transfer import DEFAULT_MAX_WORKERS, transfer_files
+from scripts.utils.lake_partitions import infer_partition_date, partition_dir_name, parse_partition_dir
+from scripts.utils.lake_classification import classify_file
+from scripts.utils.curated_zone import (
+    curated_sensor_sources, iter_sensor_csv, write_sensor_partitions, remove_sensor_sources
+)
+from scripts.utils.lake_catalog import connect_catalog, sync_catalog
 
 # Konfigurasi Logging (akan diatur oleh main_orchestrator, tapi baiknya ada default untuk testing mandiri)
 log_dir_for_testing = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs')
@@ -20,6 +39,13 @@ logging.basicConfig(
 # Konfigurasi Path untuk folder input dan raw data lake
 INPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'input_data_sources')
 RAW_LAKE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'raw_data_lake')
+CURATED_LAKE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'curated_data_lake')
+# Baris per potongan saat mengonversi CSV sensor ke curated zone (menentukan memori puncak konversi)
+CURATED_CHUNK_ROWS = 100_000
+
+# Konfigurasi engine transfer file (lihat scripts/utils/file_transfer.py)
+INGEST_MAX_WORKERS = DEFAULT_MAX_WORKERS  # Jumlah thread untuk hashing dan penyalinan paralel
+INGEST_LINK_MODE = 'auto'                 # 'auto' (reflink -> kernel copy), 'hardlink', atau 'copy'
 
 def sort_file_by_type(file_name):
     """
@@ -36,15 +62,156 @@ def sort_file_by_type(file_name):
     else:
         return 'others'
 
-def ingest_raw_data_to_datalake():
+def partition_destination_dir(file_type_folder, source_rel_path):
+    """Folder tujuan berpartisi: raw_data_lake/<tipe>/dt=YYYY-MM-DD/ (tanggal disimpulkan dari path sumber)."""
+    return os.path.join(RAW_LAKE_DIR, file_type_folder, partition_dir_name(infer_partition_date(source_rel_path)))
+
+def _relocate_legacy_object(manifest, lake_rel_path, source_rel_path, file):
+    """
+    Memindahkan objek dari layout lama yang datar (<tipe>/<file>) ke folder partisinya
+    dengan os.replace (tanpa menyalin ulang), lalu memperbarui semua referensi di manifest.
+    Return path relatif yang baru.
+    """
+    if parse_partition_dir(os.path.basename(os.path.dirname(lake_rel_path))) is not None:
+        return lake_rel_path  # Sudah berpartisi
+    destination_dir = partition_destination_dir(sort_file_by_type(file), source_rel_path)
+    os.makedirs(destination_dir, exist_ok=True)
+    destination_file_path = os.path.join(destination_dir, os.path.basename(lake_rel_path))
+    if os.path.exists(destination_file_path):
+        return lake_rel_path
+    os.replace(os.path.join(RAW_LAKE_DIR, lake_rel_path), destination_file_path)
+    new_rel_path = os.path.relpath(destination_file_path, RAW_LAKE_DIR).replace(os.sep, '/')
+    for entry in manifest['sources'].values():
+        if entry.get('lake_path') == lake_rel_path:
+            entry['lake_path'] = new_rel_path
+    for object_hash, object_path in list(manifest['objects'].items()):
+        if object_path == lake_rel_path:
+            manifest['objects'][object_hash] = new_rel_path
+    logging.info(f"Relocated {lake_rel_path} to partition {new_rel_path}")
+    return new_rel_path
+
+def _untracked_flat_objects(manifest):
+    """Path relatif file di layout datar (<tipe>/<file>) yang tidak dirujuk manifest['objects']."""
+    tracked = set(manifest['objects'].values())
+    untracked = []
+    for file_type in sorted(os.listdir(RAW_LAKE_DIR)):
+        type_dir = os.path.join(RAW_LAKE_DIR, file_type)
+        if file_type.startswith('_') or not os.path.isdir(type_dir):
+            continue
+        for file in sorted(os.listdir(type_dir)):
+            if file.startswith(('_', '.')) or file.endswith('.part') or not os.path.isfile(os.path.join(type_dir, file)):
+                continue
+            lake_rel_path = f"{file_type}/{file}"
+            if lake_rel_path not in tracked:
+                untracked.append(lake_rel_path)
+    return untracked
+
+def _adopt_untracked_object(manifest, lake_rel_path, object_hash, source_rel_path=None):
+    """
+    Mengadopsi objek datar yang tidak tercatat di manifest. Jika isinya sudah ada sebagai objek lain,
+    salinan datar dihapus; selain itu dipindah (os.replace) ke folder partisinya dan dicatat di manifest.
+    Tanggal partisi dari source_rel_path (file sumber dengan isi sama) jika ada, selain itu dari nama file.
+    Return True jika objeknya kini tercatat di partisi, False jika hanya duplikat objek lain yang sudah tercatat.
+    """
+    full_path = os.path.join(RAW_LAKE_DIR, lake_rel_path)
+    file = os.path.basename(lake_rel_path)
+    existing_object = manifest['objects'].get(object_hash)
+    if existing_object and os.path.exists(os.path.join(RAW_LAKE_DIR, existing_object)):
+        os.remove(full_path)
+        logging.info(f"Removed untracked {lake_rel_path}: identical content to {existing_object}")
+        return False
+
+    destination_dir = partition_destination_dir(sort_file_by_type(file), source_rel_path or file)
+    os.makedirs(destination_dir, exist_ok=True)
+    destination_file_path = os.path.join(destination_dir, file)
+    if os.path.exists(destination_file_path):
+        if compute_file_hash(destination_file_path) == object_hash:
+            os.remove(full_path)
+            manifest['objects'][object_hash] = os.path.relpath(destination_file_path, RAW_LAKE_DIR).replace(os.sep, '/')
+            logging.info(f"Removed untracked {lake_rel_path}: identical content to {manifest['objects'][object_hash]}")
+            return True
+        destination_file_path = _unique_destination(destination_dir, file, ())
+    os.replace(full_path, destination_file_path)
+    new_rel_path = os.path.relpath(destination_file_path, RAW_LAKE_DIR).replace(os.sep, '/')
+    manifest['objects'][object_hash] = new_rel_path
+    logging.info(f"Adopted untracked {lake_rel_path} into partition {new_rel_path}")
+    return True
+
+def update_curated_sensor_zone(manifest, transferred_paths):
+    """
+    Mengonversi CSV sensor di data lake ke curated zone (Parquet bertipe, lihat scripts/utils/curated_zone.py).
+    Yang dikonversi: objek yang baru saja disalin, ditambah objek sensor yang belum ada di curated zone.
+    """
+    transferred = {os.path.relpath(p, RAW_LAKE_DIR).replace(os.sep, '/') for p in transferred_paths}
+    sensor_objects = {
+        lake_rel_path for lake_rel_path in set(manifest['objects'].values())
+        if lake_rel_path.lower().endswith('.csv') and classify_file(lake_rel_path) == 'sensors'
+    }
+    try:
+        already_curated = curated_sensor_sources(CURATED_LAKE_DIR)
+        to_convert = sorted(p for p in sensor_objects if p in transferred or p not in already_curated)
+        if not to_convert:
+            return 0
+
+        converted = 0
+        for lake_rel_path in to_convert:
+            # Per potongan CURATED_CHUNK_ROWS baris: memori tidak bergantung pada ukuran file maupun riwayat sensor
+            replaced = False
+            try:
+                for chunk in iter_sensor_csv(os.path.join(RAW_LAKE_DIR, lake_rel_path), lake_rel_path, CURATED_CHUNK_ROWS):
+                    if chunk.empty:
+                        continue
+                    # Potongan pertama mengganti baris lama file ini; potongan berikutnya hanya menambah
+                    write_sensor_partitions(chunk, CURATED_LAKE_DIR, replace_sources=None if not replaced else ())
+                    replaced = True
+                if not replaced:
+                    remove_sensor_sources(CURATED_LAKE_DIR, [lake_rel_path])
+                converted += 1
+            except Exception as e:
+                logging.error(f"Failed to convert sensor file {lake_rel_path} to the curated zone: {e}")
+                # Jangan tinggalkan file yang baru sebagian terkonversi (dianggap lengkap oleh pembaca curated zone)
+                try:
+                    remove_sensor_sources(CURATED_LAKE_DIR, [lake_rel_path])
+                except Exception as cleanup_error:
+                    logging.error(f"Failed to remove partial curated rows of {lake_rel_path}: {cleanup_error}")
+        logging.info(f"Converted {converted} sensor file(s) to the curated Parquet zone.")
+        return converted
+    except Exception as e:
+        logging.error(f"Failed to update curated sensor zone: {e}", exc_info=True)
+        return 0
+
+def _unique_destination(destination_dir, file, taken_paths):
+    """Tambahkan timestamp (dan nomor urut jika perlu) ke nama file agar tidak menimpa objek lain."""
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    file_name, file_extension = os.path.splitext(file)
+    candidate = os.path.join(destination_dir, f"{file_name}_{timestamp}{file_extension}")
+    counter = 1
+    while os.path.exists(candidate) or candidate in taken_paths:
+        candidate = os.path.join(destination_dir, f"{file_name}_{timestamp}_{counter}{file_extension}")
+        counter += 1
+    return candidate
+
+def ingest_raw_data_to_datalake(incremental=True, max_workers=None, link_mode=None):
     """
     Mengambil file dari input_data_sources/ dan menyalinnya ke raw_data_lake/
-    Menyortir file berdasarkan jenisnya (misal PDF, CSV, TXT) dan menyalinnya ke folder yang sesuai.
+    Menyortir file berdasarkan jenisnya (misal PDF, CSV, TXT) dan menyalinnya ke folder yang sesuai,
+    dipartisi per tanggal: raw_data_lake/<tipe>/dt=YYYY-MM-DD/ (lihat scripts/utils/lake_partitions.py).
+
+    incremental=True (default): hanya file baru/berubah yang disalin, berdasarkan manifest
+    (hash isi, ukuran, mtime) di raw_data_lake/. File dengan isi identik hanya disimpan sekali.
+    Objek datar lama (<tipe>/<file>) yang tidak tercatat di manifest diadopsi ke partisinya, atau dihapus
+    jika isinya sudah ada sebagai objek lain.
+    incremental=False: raw_data_lake/ dikosongkan dulu lalu semua file disalin ulang.
+
+    Hashing dan penyalinan dijalankan paralel (max_workers thread) lewat scripts/utils/file_transfer.py,
+    memakai reflink/hardlink atau copy_file_range/sendfile sesuai link_mode.
     """
-    logging.info("--- Starting Data Lake Ingest Process ---")
+    max_workers = max_workers or INGEST_MAX_WORKERS
+    link_mode = link_mode or INGEST_LINK_MODE
+    logging.info(f"--- Starting Data Lake Ingest Process ({'incremental' if incremental else 'full'} mode) ---")
     
-    # Pastikan RAW_LAKE_DIR kosong sebelum ingest baru untuk demo
-    if os.path.exists(RAW_LAKE_DIR):
+    if not incremental and os.path.exists(RAW_LAKE_DIR):
+        # Mode full: kosongkan RAW_LAKE_DIR (termasuk manifest) sebelum ingest baru
         for item in os.listdir(RAW_LAKE_DIR):
             item_path = os.path.join(RAW_LAKE_DIR, item)
             if os.path.isfile(item_path):
@@ -52,44 +219,177 @@ def ingest_raw_data_to_datalake():
             elif os.path.isdir(item_path):
                 shutil.rmtree(item_path)
         logging.info(f"Cleaned up existing files/folders in {RAW_LAKE_DIR}.")
-    else:
+        if os.path.exists(CURATED_LAKE_DIR):
+            shutil.rmtree(CURATED_LAKE_DIR)  # Curated zone diturunkan dari raw lake, jadi dibangun ulang juga
+    elif not os.path.exists(RAW_LAKE_DIR):
         logging.info(f"RAW_LAKE_DIR does not exist, creating it now.")
         os.makedirs(RAW_LAKE_DIR, exist_ok=True)
 
+    manifest = load_manifest(RAW_LAKE_DIR) if incremental else empty_manifest()
+    stats = {'copied': 0, 'unchanged': 0, 'deduplicated': 0, 'failed': 0}
+
     if not os.listdir(INPUT_DIR):
         logging.warning(f"No files found in {INPUT_DIR}. No data ingested.")
-    
+
+    # --- Tahap 1: daftar file sumber, lewati yang tidak berubah (cukup stat, tanpa membaca isi) ---
+    candidates = []
     for root, dirs, files in os.walk(INPUT_DIR):
-        for file in files:
+        dirs.sort()  # Urutan deterministik agar file yang sama selalu menjadi objek 'utama' saat dedup
+        for file in sorted(files):
             source_file_path = os.path.join(root, file)
-            
-            # Tentukan folder tujuan berdasarkan tipe file
-            file_type_folder = sort_file_by_type(file)
-            destination_dir = os.path.join(RAW_LAKE_DIR, file_type_folder)
-            
-            # Buat folder jika belum ada
-            if not os.path.exists(destination_dir):
-                os.makedirs(destination_dir)
-                logging.info(f"Created folder {destination_dir} for file type '{file_type_folder}'.")
-
-            # Tentukan file tujuan
-            destination_file_path = os.path.join(destination_dir, file)
-
-            # Cek jika file sudah ada di folder tujuan, tambahkan timestamp jika sudah ada
-            if os.path.exists(destination_file_path):
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                file_name, file_extension = os.path.splitext(file)
-                new_file_name = f"{file_name}_{timestamp}{file_extension}"
-                destination_file_path = os.path.join(destination_dir, new_file_name)
-                logging.info(f"File already exists, renaming to {new_file_name}")
-
+            source_rel_path = os.path.relpath(source_file_path, INPUT_DIR).replace(os.sep, '/')
             try:
-                shutil.copy2(source_file_path, destination_file_path)
-                logging.info(f"Ingested: {os.path.basename(source_file_path)} to {destination_file_path}")
-            except Exception as e:
-                logging.error(f"Failed to ingest {source_file_path}: {e}")
-    
+                source_stat = os.stat(source_file_path)
+            except OSError as e:
+                logging.error(f"Failed to inspect {source_file_path}: {e}")
+                stats['failed'] += 1
+                continue
+
+            entry = manifest['sources'].get(source_rel_path)
+            if is_source_unchanged(entry, source_stat) and os.path.exists(os.path.join(RAW_LAKE_DIR, entry['lake_path'])):
+                _relocate_legacy_object(manifest, entry['lake_path'], source_rel_path, file)
+                stats['unchanged'] += 1
+                continue
+            candidates.append((source_file_path, source_rel_path, file, source_stat, entry))
+
+    # Objek di layout datar lama yang tidak tercatat di manifest (misal ikut ter-checkout bersama repo)
+    untracked = _untracked_flat_objects(manifest) if incremental else []
+
+    # --- Tahap 2: hitung hash isi file baru/berubah (dan objek datar tak tercatat) secara paralel ---
+    hashes = {}
+    hash_jobs = [c[0] for c in candidates] + [os.path.join(RAW_LAKE_DIR, p) for p in untracked]
+    if hash_jobs:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(hash_jobs)))) as executor:
+            futures = {executor.submit(compute_file_hash, path): path for path in hash_jobs}
+            for future in as_completed(futures):
+                try:
+                    hashes[futures[future]] = future.result()
+                except Exception as e:
+                    logging.error(f"Failed to hash {futures[future]}: {e}")
+
+    # Objek datar tak tercatat diadopsi ke partisinya (atau dihapus jika duplikat) sebelum perencanaan,
+    # sehingga file sumber dengan isi yang sama cukup dicatat lineage-nya tanpa disalin ulang
+    source_by_hash = {}
+    for source_file_path, source_rel_path, *_ in candidates:
+        source_by_hash.setdefault(hashes.get(source_file_path), source_rel_path)
+    adopted = set()
+    for lake_rel_path in untracked:
+        object_hash = hashes.get(os.path.join(RAW_LAKE_DIR, lake_rel_path))
+        if object_hash is None:
+            continue
+        try:
+            if _adopt_untracked_object(manifest, lake_rel_path, object_hash, source_by_hash.get(object_hash)):
+                adopted.add(object_hash)
+        except OSError as e:
+            logging.error(f"Failed to adopt untracked lake object {lake_rel_path}: {e}")
+    stats['adopted'] = len(adopted)
+
+    # --- Tahap 3: rencanakan tujuan tiap file (dedup, adopsi objek lama, penggantian) ---
+    transfer_jobs = []       # (source_file_path, destination_file_path)
+    pending_records = {}     # destination_file_path -> [(source_rel_path, source_stat, source_hash, lake_rel_path)]
+    planned_objects = {}     # source_hash -> destination_file_path (dedup di dalam satu batch)
+    for source_file_path, source_rel_path, file, source_stat, entry in candidates:
+        source_hash = hashes.get(source_file_path)
+        if source_hash is None:
+            stats['failed'] += 1
+            continue
+
+        # Isi yang sama sudah ada di data lake (misal file ganda di folder tanggal dan root) -> cukup catat lineage
+        existing_object = manifest['objects'].get(source_hash)
+        if existing_object and os.path.exists(os.path.join(RAW_LAKE_DIR, existing_object)):
+            record_source(manifest, source_rel_path, source_stat, source_hash, existing_object)
+            if entry is not None and entry.get('lake_path') == existing_object:
+                stats['unchanged'] += 1  # Hanya mtime yang berubah, isinya sama
+                continue
+            if source_hash in adopted:
+                adopted.discard(source_hash)  # Sumber pertama dari objek yang baru diadopsi
+                stats['unchanged'] += 1
+                continue
+            stats['deduplicated'] += 1
+            logging.info(f"Deduplicated: {source_rel_path} has identical content to {existing_object}")
+            continue
+        if source_hash in planned_objects:
+            destination_file_path = planned_objects[source_hash]
+            lake_rel_path = os.path.relpath(destination_file_path, RAW_LAKE_DIR).replace(os.sep, '/')
+            pending_records[destination_file_path].append((source_rel_path, source_stat, source_hash, lake_rel_path))
+            stats['deduplicated'] += 1
+            logging.info(f"Deduplicated: {source_rel_path} has identical content to {lake_rel_path}")
+            continue
+
+        # Tentukan folder tujuan berdasarkan tipe file dan partisi tanggal
+        file_type_folder = sort_file_by_type(file)
+        destination_dir = partition_destination_dir(file_type_folder, source_rel_path)
+        
+        # Buat folder jika belum ada
+        if not os.path.exists(destination_dir):
+            os.makedirs(destination_dir)
+            logging.info(f"Created folder {destination_dir} for file type '{file_type_folder}'.")
+
+        # Tentukan file tujuan
+        destination_file_path = os.path.join(destination_dir, file)
+        lake_rel_path = os.path.relpath(destination_file_path, RAW_LAKE_DIR).replace(os.sep, '/')
+
+        if destination_file_path in pending_records:
+            # Nama sama dengan file lain di batch ini tetapi isinya berbeda
+            destination_file_path = _unique_destination(destination_dir, file, pending_records)
+            lake_rel_path = os.path.relpath(destination_file_path, RAW_LAKE_DIR).replace(os.sep, '/')
+            logging.info(f"File already exists, renaming to {os.path.basename(destination_file_path)}")
+        elif os.path.exists(destination_file_path):
+            owns_destination = (
+                entry is not None and entry.get('lake_path') == lake_rel_path
+                and not lake_path_shared(manifest, lake_rel_path, exclude_source=source_rel_path)
+            )
+            if owns_destination:
+                # Versi baru dari file sumber yang sama -> timpa objek lamanya
+                logging.info(f"Source changed, replacing {lake_rel_path}")
+            elif compute_file_hash(destination_file_path) == source_hash:
+                # Objek sudah ada dari ingest sebelumnya (misal manifest belum ada) -> adopsi tanpa menyalin
+                record_source(manifest, source_rel_path, source_stat, source_hash, lake_rel_path)
+                stats['unchanged'] += 1
+                continue
+            else:
+                # File sudah ada di folder tujuan dengan isi berbeda, tambahkan timestamp
+                destination_file_path = _unique_destination(destination_dir, file, pending_records)
+                lake_rel_path = os.path.relpath(destination_file_path, RAW_LAKE_DIR).replace(os.sep, '/')
+                logging.info(f"File already exists, renaming to {os.path.basename(destination_file_path)}")
+
+        transfer_jobs.append((source_file_path, destination_file_path))
+        pending_records[destination_file_path] = [(source_rel_path, source_stat, source_hash, lake_rel_path)]
+        planned_objects[source_hash] = destination_file_path
+
+    # --- Tahap 4: salin paralel, lalu catat lineage hanya untuk transfer yang berhasil ---
+    transfer_result = transfer_files(transfer_jobs, max_workers=max_workers, link_mode=link_mode)
+    for source_file_path, destination_file_path, method in transfer_result['succeeded']:
+        for source_rel_path, source_stat, source_hash, lake_rel_path in pending_records[destination_file_path]:
+            record_source(manifest, source_rel_path, source_stat, source_hash, lake_rel_path)
+        stats['copied'] += 1
+        logging.info(f"Ingested: {os.path.basename(source_file_path)} to {destination_file_path} ({method})")
+    for source_file_path, destination_file_path, error in transfer_result['failed']:
+        logging.error(f"Failed to ingest {source_file_path}: {error}")
+        stats['failed'] += len(pending_records[destination_file_path])
+        stats['deduplicated'] -= len(pending_records[destination_file_path]) - 1
+
+    save_manifest(manifest, RAW_LAKE_DIR)
+
+    # --- Tahap 5: konversi CSV sensor ke curated zone (Parquet) ---
+    stats['curated'] = update_curated_sensor_zone(manifest, [dst for _, dst, _ in transfer_result['succeeded']])
+
+    # --- Tahap 6: perbarui katalog objek lake (dibaca oleh tahap analisis) ---
+    try:
+        catalog_conn = connect_catalog(RAW_LAKE_DIR)
+        try:
+            sync_catalog(catalog_conn, RAW_LAKE_DIR, {path: sha for sha, path in manifest['objects'].items()})
+        finally:
+            catalog_conn.close()
+    except Exception as e:
+        logging.error(f"Failed to update lake catalog: {e}", exc_info=True)
+
+    stats['bytes_per_second'] = transfer_result['bytes_per_second']
+    logging.info(f"Ingest summary: {stats['copied']} copied, {stats['unchanged']} unchanged, "
+                 f"{stats['deduplicated']} deduplicated, {stats['adopted']} adopted, {stats['failed']} failed "
+                 f"({transfer_result['bytes_per_second'] / (1024 * 1024):.2f} MiB/s).")
     logging.info("--- Data Lake Ingest Process Completed ---")
+    return stats
 
 if __name__ == "__main__":
     ingest_raw_data_to_datalake()
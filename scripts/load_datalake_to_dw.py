@@ -1,11 +1,22 @@
 import pandas as pd
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine
 import logging
 import os
 from datetime import datetime
-from collections import Counter
+import sys
 from sqlalchemy.dialects import postgresql 
 
+# Tambahkan root proyek ke sys.path agar 'scripts.utils' bisa diimpor juga saat file ini dijalankan mandiri
+_PROJECT_ROOT_FOR_IMPORTS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PROJECT_ROOT_FOR_IMPORTS not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT_FOR_IMPORTS)
+
+from scripts.utils.dimension_loader import load_dimension
+from scripts.utils.bulk_load import bulk_upsert, log_bulk_counts, replace_partitions
+from scripts.utils.lake_partitions import normalize_date
+from scripts.utils.batch_sentiment import parse_top_words, format_top_word_items
+from scripts.utils.processed_staging import FINANCIAL_SUMMARY, SENSOR_SUMMARY, SOCIAL_SUMMARY, read_summary
+
 print("DEBUG: load_datalake_to_dw.py script has started.")
 
 # --- 1. Konfigurasi Database ---
@@ -40,207 +51,217 @@ def create_datalake_dim_fact_tables():
     pass
 
 # --- Fungsi Load ke DW (Common) ---
-# Ini adalah fungsi helper asli Anda, tidak diubah.
 def load_df_to_dw(df, table_name, pk_col=None):
     """
     Loads a DataFrame to a specified table in the DW database.
-    For dimension tables, it attempts to insert and ignores duplicates based on primary key.
+    For dimension tables, only new or changed rows (by row hash per pk_col) are written.
     For fact tables, it appends data.
     """
     try:
         if pk_col:
-            data_to_insert = df.to_dict(orient='records')
-            
-            columns = ", ".join(df.columns)
-            placeholders = ", ".join([f":{col}" for col in df.columns])
-            
-            insert_stmt = text(f"""
-                INSERT INTO {table_name} ({columns})
-                VALUES ({placeholders})
-                ON CONFLICT ({pk_col}) DO NOTHING;
-            """)
-            
-            with engine_dw.connect() as conn_dw:
-                conn_dw.execute(insert_stmt, data_to_insert)
-                conn_dw.commit()
-            logging.info(f"Loaded {len(df)} rows into {table_name} in {pg_dw_db} (ON CONFLICT DO NOTHING for PK '{pk_col}').")
+            load_dimension(df, table_name, pk_col, engine_dw)
 
         else:
-            df.to_sql(table_name, engine_dw, if_exists='append', index=False)
-            logging.info(f"Loaded {len(df)} rows into {table_name} in {pg_dw_db} (appended).")
+            with engine_dw.begin() as conn_dw:
+                log_bulk_counts(table_name, bulk_upsert(conn_dw, df, table_name), pg_dw_db)
 
     except Exception as e:
         logging.error(f"Failed to load {table_name} to {pg_dw_db}: {e}")
 
+# --- Fakta Data Lake: kunci alami + ganti per partisi ---
+# Kunci alami tiap tabel fakta (dijaga UNIQUE INDEX di create_database_schemas.sql)
+FACT_NATURAL_KEYS = {
+    'fact_warehouse_temperature': ['datekey', 'zone_id'],
+    'fact_social_media_sentiment': ['datekey', 'sentiment_id'],
+    'fact_financial': ['datekey', 'company_id', 'report_type'],
+    'fact_word_frequency': ['datekey', 'sentiment_id', 'word'],
+}
+# report_type bagian dari kunci alami fact_financial (NOT NULL); laporan tanpa jenis memakai nilai ini
+UNKNOWN_REPORT_TYPE = 'Unknown'
+# Irisan yang diganti utuh saat dimuat ulang: semua baris fakta pada datekey yang ada di data baru
+FACT_PARTITION_COLUMNS = ['datekey']
+
+
+def _datekey(date_value):
+    return int(normalize_date(date_value).replace('-', ''))
+
+
+def load_fact_partitions(df, table_name, start_date=None, end_date=None):
+    """
+    Memuat fakta secara idempoten: baris di luar rentang start_date..end_date (inklusif, opsional) dibuang,
+    duplikat kunci alami digabung (baris terakhir dipakai), lalu setiap datekey yang ada di df diganti
+    utuh (delete + insert dalam satu transaksi). Menjalankan ulang pemuatan tidak menggandakan fakta.
+    Baris tanpa datekey (tanggal tidak valid) dilewati dengan peringatan.
+    """
+    missing = df['datekey'].isna()
+    if missing.any():
+        logging.warning(f"{table_name}: skipping {int(missing.sum())} row(s) without a valid datekey.")
+        df = df[~missing]
+    if start_date is not None:
+        df = df[df['datekey'] >= _datekey(start_date)]
+    if end_date is not None:
+        df = df[df['datekey'] <= _datekey(end_date)]
+    key_columns = FACT_NATURAL_KEYS[table_name]
+    duplicated = df.duplicated(subset=key_columns, keep='last')
+    if duplicated.any():
+        logging.warning(f"{table_name}: {int(duplicated.sum())} row(s) share a natural key ({', '.join(key_columns)}); keeping the last.")
+        df = df[~duplicated]
+    with engine_dw.begin() as conn_dw:
+        counts = replace_partitions(conn_dw, df, table_name, FACT_PARTITION_COLUMNS)
+    logging.info(f"{table_name}: {df['datekey'].nunique()} date partition(s) replaced "
+                 f"({counts['deleted']} row(s) removed, {counts['inserted']} inserted).")
+    return counts
+
+
+# --- Penyusunan Baris Fakta (vektor, tanpa iterasi per baris) ---
+# Jumlah kata teratas gabungan per (tanggal, kategori sentimen)
+COMBINED_TOP_WORDS_LIMIT = 50
+
+
+def _datekeys(dates):
+    """Datekey YYYYMMDD (Int64) dari Series tanggal; tanggal tidak valid menjadi <NA>."""
+    dates = pd.to_datetime(dates, errors='coerce')
+    return (dates.dt.year * 10000 + dates.dt.month * 100 + dates.dt.day).astype('Int64')
+
+
+def build_sentiment_facts(df_sentiment, df_sentiment_dim):
+    """
+    Baris fact_social_media_sentiment per (datekey, sentiment_id): jumlah tweet, rata-rata skor, dan
+    top_words_json = 50 kata yang paling sering muncul di daftar kata teratas tweet pada grup tersebut
+    (seri diurutkan sesuai kemunculan pertama, sama seperti Counter.most_common).
+    Return (fakta sentimen, fakta frekuensi kata): yang kedua berisi semua kata per grup
+    (datekey, sentiment_id, word, count) untuk fact_word_frequency.
+    """
+    dim = df_sentiment_dim.assign(
+        category_name=df_sentiment_dim['category_name'].astype(str).str.strip().str.capitalize()
+    )
+    df = df_sentiment.merge(dim, left_on='sentiment_category', right_on='category_name', how='left')
+    df['sentiment_id'] = df['sentiment_id'].astype('Int64')
+    df['datekey'] = _datekeys(df['date_processed'])
+
+    missing = df['sentiment_id'].isna() | df['datekey'].isna()
+    if missing.any():
+        logging.warning("WARNING: Missing/unmatched sentiment_id_fk or datekey found. Rows will be skipped.")
+        df = df[~missing]
+    df = df.reset_index(drop=True)
+
+    group_keys = ['datekey', 'sentiment_id']
+    facts = df.groupby(group_keys).agg(
+        tweet_count=('original_filename', 'count'),
+        avg_sentiment_score=('sentiment_score', 'mean'),
+    ).reset_index()
+
+    # Setiap kata dihitung sekali per tweet (jumlah di dalam daftar tweet diabaikan)
+    words = parse_top_words(df['top_words_json'])
+    words = words.join(df[group_keys], on='row')
+    words['order'] = range(len(words))
+    word_counts = words.groupby(group_keys + ['word'], sort=False).agg(
+        count=('order', 'size'), first=('order', 'min')
+    ).reset_index()
+    word_counts = word_counts.sort_values(group_keys + ['count', 'first'], ascending=[True, True, False, True])
+    top_counts = word_counts.groupby(group_keys, sort=False).head(COMBINED_TOP_WORDS_LIMIT)
+    items = format_top_word_items(top_counts['word'], top_counts['count'])
+    top_words = ('[' + items.groupby([top_counts[key] for key in group_keys], sort=False).agg(', '.join) + ']').rename('top_words_json')
+
+    facts = facts.join(top_words, on=group_keys)
+    facts['top_words_json'] = facts['top_words_json'].fillna('[]')
+    word_facts = word_counts[group_keys + ['word', 'count']].astype({'word': 'string', 'count': 'Int64'})
+    return (facts[['datekey', 'sentiment_id', 'tweet_count', 'avg_sentiment_score', 'top_words_json']],
+            word_facts.reset_index(drop=True))
+
+
+def build_financial_facts(df_financial, df_companies):
+    """Baris fact_financial: satu per laporan, datekey = 1 Januari tahun laporan."""
+    df = df_financial.merge(df_companies, on='company_name', how='left')
+    df['company_id'] = df['company_id'].astype('Int64')
+    df['datekey'] = _datekeys(pd.to_numeric(df['report_year'], errors='coerce').astype('Int64').astype('string') + '-01-01')
+
+    missing = df['company_id'].isna() | df['datekey'].isna()
+    if missing.any():
+        logging.warning("WARNING: Missing/unmatched company_id_fk or datekey found in financial data. Fact rows with invalid FKs will be skipped.")
+        df = df[~missing]
+    df = df.assign(report_type=df['report_type'].fillna(UNKNOWN_REPORT_TYPE))
+    return df.rename(columns={'extracted_revenue': 'revenue', 'extracted_net_profit': 'net_profit'})[
+        ['datekey', 'company_id', 'revenue', 'net_profit', 'report_type']
+    ]
+
+
 # --- Fungsi Utama untuk Memuat Data Lake ke DW ---
-def load_all_datalake_data_to_dw():
+def load_all_datalake_data_to_dw(start_date=None, end_date=None):
+    """
+    Memuat ringkasan Data Lake dari processed_staging ke DW. Fakta dimuat per partisi tanggal sehingga
+    aman dijalankan ulang; start_date/end_date (opsional, inklusif) membatasi pemuatan ke irisan tanggal
+    tertentu, mis. memuat ulang satu hari saja.
+    """
     logging.info("--- Starting Data Lake Load to DW Process ---")
 
     # 1. Load warehouse temperature data (KODE ASLI ANDA, TIDAK DIUBAH)
     try:
-        temp_csv_path = os.path.join(PROCESSED_STAGING_DIR, 'warehouse_daily_sensor_summary.csv')
-        if os.path.exists(temp_csv_path):
-            df_temp = pd.read_csv(temp_csv_path, parse_dates=['date'])
+        df_temp = read_summary(SENSOR_SUMMARY, PROCESSED_STAGING_DIR)
+        if df_temp is not None:
             
-            with engine_dw.connect() as conn_dw:
-                df_zones_in_db = pd.read_sql("SELECT zone_id, zone_name FROM dim_warehouse_zone", conn_dw)
-                
-                new_zones_from_data = df_temp[~df_temp['zone_id'].isin(df_zones_in_db['zone_name'])]['zone_id'].unique()
-                for zone_name in new_zones_from_data:
-                    conn_dw.execute(text(f"INSERT INTO dim_warehouse_zone (zone_name) VALUES (:zone_name) ON CONFLICT (zone_name) DO NOTHING;"), {'zone_name': zone_name})
-                conn_dw.commit()
+            load_dimension(pd.DataFrame({'zone_name': df_temp['zone_id'].unique()}), 'dim_warehouse_zone', 'zone_name', engine_dw)
 
+            with engine_dw.connect() as conn_dw:
                 df_zones_updated = pd.read_sql("SELECT zone_id, zone_name FROM dim_warehouse_zone", conn_dw)
                 df_temp_merged = pd.merge(df_temp, df_zones_updated, left_on='zone_id', right_on='zone_name', how='left')
-                df_temp_merged['zone_id_fk'] = df_temp_merged['zone_id_y'] 
+                df_temp_merged['zone_id_fk'] = df_temp_merged['zone_id_y'].astype('Int64')
                 df_temp_merged = df_temp_merged.drop(columns=['zone_id_y', 'zone_name'])
 
-                df_temp_merged['datekey'] = df_temp_merged['date'].dt.strftime('%Y%m%d').astype(int)
+                df_temp_merged['datekey'] = _datekeys(df_temp_merged['date'])
 
-                data_to_insert_fact_temp = df_temp_merged[['datekey', 'zone_id_fk', 'avg_temperature_c', 'avg_humidity_percent']].to_dict(orient='records')
-                insert_fact_temp_stmt = text("""
-                    INSERT INTO fact_warehouse_temperature (datekey, zone_id, avg_temperature_c, avg_humidity_percent)
-                    VALUES (:datekey, :zone_id_fk, :avg_temperature_c, :avg_humidity_percent);
-                """)
-                with engine_dw.connect() as conn:
-                    conn.execute(insert_fact_temp_stmt, data_to_insert_fact_temp)
-                    conn.commit()
+                fact_temp = df_temp_merged[['datekey', 'zone_id_fk', 'avg_temperature_c', 'avg_humidity_percent']]
+                load_fact_partitions(fact_temp.rename(columns={'zone_id_fk': 'zone_id'}), 'fact_warehouse_temperature',
+                                     start_date, end_date)
             logging.info("Warehouse temperature data loaded to DW.")
         else:
-            logging.warning(f"Warehouse temperature summary file not found: {temp_csv_path}")
+            logging.warning(f"Warehouse temperature summary not found in {PROCESSED_STAGING_DIR}")
     except Exception as e:
         logging.error(f"Failed to load warehouse temperature data to DW: {e}")
 
     # 2. Load social media sentiment data (KODE ANDA YANG SUDAH DIPERBAIKI DAN BERHASIL)
     try:
-        sentiment_csv_path = os.path.join(PROCESSED_STAGING_DIR, 'social_media_analysis_summary.csv')
-        if os.path.exists(sentiment_csv_path):
-            df_sentiment = pd.read_csv(sentiment_csv_path)
-            
-            with engine_dw.connect() as conn_dw:
-                df_sentiment['sentiment_category'] = df_sentiment['sentiment_category'].astype(str).str.strip().str.capitalize()
-                unique_sentiments = df_sentiment[['sentiment_category']].drop_duplicates()
-                unique_sentiments.rename(columns={'sentiment_category': 'category_name'}, inplace=True)
-                
-                sentiments_to_insert = unique_sentiments.to_dict(orient='records')
-                insert_sentiment_dim_stmt = text("""
-                    INSERT INTO dim_sentiment_category (category_name)
-                    VALUES (:category_name)
-                    ON CONFLICT (category_name) DO NOTHING;
-                """)
-                conn_dw.execute(insert_sentiment_dim_stmt, sentiments_to_insert)
-                conn_dw.commit()
-                logging.info("Sentiment categories loaded to dim_sentiment_category (ON CONFLICT DO NOTHING).")
+        df_sentiment = read_summary(SOCIAL_SUMMARY, PROCESSED_STAGING_DIR)
+        if df_sentiment is not None:
+            df_sentiment['sentiment_category'] = df_sentiment['sentiment_category'].astype(str).str.strip().str.capitalize()
 
+            unique_sentiments = df_sentiment[['sentiment_category']].drop_duplicates()
+            unique_sentiments = unique_sentiments.rename(columns={'sentiment_category': 'category_name'})
+            load_dimension(unique_sentiments, 'dim_sentiment_category', 'category_name', engine_dw)
+
+            with engine_dw.connect() as conn_dw:
                 df_sentiment_dim = pd.read_sql("SELECT sentiment_id, category_name FROM dim_sentiment_category", conn_dw)
-                df_sentiment_dim['category_name'] = df_sentiment_dim['category_name'].astype(str).str.strip().str.capitalize()
-
-                df_sentiment_merged = pd.merge(df_sentiment, df_sentiment_dim, left_on='sentiment_category', right_on='category_name', how='left')
-                
-                df_sentiment_merged['sentiment_id_fk'] = df_sentiment_merged['sentiment_id'].astype(float)
-                df_sentiment_merged['datekey'] = pd.to_datetime(df_sentiment_merged['date_processed'], errors='coerce').dt.strftime('%Y%m%d').astype(float)
-                
-                if df_sentiment_merged['sentiment_id_fk'].isnull().any() or df_sentiment_merged['datekey'].isnull().any():
-                    logging.warning("WARNING: Missing/unmatched sentiment_id_fk or datekey found. Rows will be skipped.")
-                    df_sentiment_merged = df_sentiment_merged.dropna(subset=['sentiment_id_fk', 'datekey']) 
-                
-                sentiment_agg = df_sentiment_merged.groupby(['datekey', 'sentiment_id_fk']).agg(
-                    tweet_count=('original_filename', 'count'),
-                    avg_sentiment_score=('sentiment_score', 'mean'),
-                    top_words_list=('top_words_json', lambda x: [eval(item) for item in x if isinstance(item, str) and item.strip()])
-                ).reset_index()
-
-                sentiment_agg['combined_top_words'] = sentiment_agg['top_words_list'].apply(
-                    lambda list_of_word_counts: str(Counter(word for sublist in list_of_word_counts for word, count in sublist).most_common(50))
-                )
-                
-                final_data_to_insert_sm = []
-                for index, row in sentiment_agg.iterrows():
-                    current_datekey = int(row['datekey'])
-                    current_sentiment_id_fk = int(row['sentiment_id_fk'])
-                    final_data_to_insert_sm.append({
-                        'datekey': current_datekey,
-                        'sentiment_id_fk': current_sentiment_id_fk,
-                        'tweet_count': row['tweet_count'],
-                        'avg_sentiment_score': row['avg_sentiment_score'],
-                        'combined_top_words': row['combined_top_words']
-                    })
-
-                if final_data_to_insert_sm:
-                    insert_fact_sentiment_stmt = text("""
-                        INSERT INTO fact_social_media_sentiment (datekey, sentiment_id, tweet_count, avg_sentiment_score, top_words_json)
-                        VALUES (:datekey, :sentiment_id_fk, :tweet_count, :avg_sentiment_score, :combined_top_words);
-                    """)
-                    with engine_dw.connect() as conn:
-                        conn.execute(insert_fact_sentiment_stmt, final_data_to_insert_sm)
-                        conn.commit()
-                    logging.info(f"Successfully loaded {len(final_data_to_insert_sm)} records into fact_social_media_sentiment.")
-                else:
-                    logging.warning("No new social media data to load into the fact table.")
+
+            fact_sentiment, fact_words = build_sentiment_facts(df_sentiment, df_sentiment_dim)
+            if not fact_sentiment.empty:
+                load_fact_partitions(fact_sentiment, 'fact_social_media_sentiment', start_date, end_date)
+                logging.info(f"Successfully loaded {len(fact_sentiment)} records into fact_social_media_sentiment.")
+                load_fact_partitions(fact_words, 'fact_word_frequency', start_date, end_date)
+            else:
+                logging.warning("No new social media data to load into the fact table.")
         else:
-            logging.warning(f"Social media analysis summary file not found: {sentiment_csv_path}")
+            logging.warning(f"Social media analysis summary not found in {PROCESSED_STAGING_DIR}")
     except Exception as e:
         logging.error(f"Failed to load social media sentiment data to DW: {e}", exc_info=True)
 
-    # 3. Load financial reports data (KODE ASLI ANDA, TIDAK DIUBAH)
+    # 3. Load financial reports data
     try:
-        financial_csv_path = os.path.join(PROCESSED_STAGING_DIR, 'financial_reports_summary.csv')
-        if os.path.exists(financial_csv_path):
-            df_financial = pd.read_csv(financial_csv_path)
-            
-            with engine_dw.connect() as conn_dw:
-                df_financial['report_date'] = df_financial['report_year'].astype(str) + '-01-01'
-                df_financial['datekey'] = pd.to_datetime(df_financial['report_date'], errors='coerce').dt.strftime('%Y%m%d').astype(float)
-                
-                companies_to_insert = df_financial[['company_name']].drop_duplicates().to_dict(orient='records')
-                insert_company_stmt = text("""
-                    INSERT INTO dim_company (company_name)
-                    VALUES (:company_name)
-                    ON CONFLICT (company_name) DO NOTHING;
-                """)
-                conn_dw.execute(insert_company_stmt, companies_to_insert)
-                conn_dw.commit()
-                logging.info("Companies loaded to dim_company (ON CONFLICT DO NOTHING).")
+        df_financial = read_summary(FINANCIAL_SUMMARY, PROCESSED_STAGING_DIR)
+        if df_financial is not None:
+
+            load_dimension(df_financial[['company_name']].drop_duplicates(), 'dim_company', 'company_name', engine_dw)
 
+            with engine_dw.connect() as conn_dw:
                 df_companies_in_db = pd.read_sql("SELECT company_id, company_name FROM dim_company", conn_dw)
-                df_financial_merged = pd.merge(df_financial, df_companies_in_db, on='company_name', how='left')
-                
-                df_financial_merged['company_id_fk'] = df_financial_merged['company_id'].astype(float)
-                
-                if df_financial_merged['company_id_fk'].isnull().any() or df_financial_merged['datekey'].isnull().any():
-                    logging.warning("WARNING: Missing/unmatched company_id_fk or datekey found in financial data. Fact rows with invalid FKs will be skipped.")
-                    df_financial_merged = df_financial_merged.dropna(subset=['company_id_fk', 'datekey'])
-                
-                final_data_to_insert_fin = []
-                for index, row in df_financial_merged.iterrows():
-                    current_datekey = int(row['datekey']) if pd.notnull(row['datekey']) else None
-                    current_company_id_fk = int(row['company_id_fk']) if pd.notnull(row['company_id_fk']) else None
-                    
-                    if current_datekey is not None and current_company_id_fk is not None and row['extracted_revenue'] is not None:
-                        final_data_to_insert_fin.append({
-                            'datekey': current_datekey,
-                            'company_id_fk': current_company_id_fk,
-                            'extracted_revenue': row['extracted_revenue'],
-                            'extracted_net_profit': row['extracted_net_profit'],
-                            'report_type': row['report_type']
-                        })
-                    else:
-                        logging.error(f"FATAL FIN: Skipping record due to invalid datekey ({row.get('datekey')}), company_id_fk ({row.get('company_id_fk')}), or revenue ({row.get('extracted_revenue')}). Record: {row.to_dict()}")
-                        continue
-                
-                if final_data_to_insert_fin:
-                    insert_fact_financial_stmt = text("""
-                        INSERT INTO fact_financial (datekey, company_id, revenue, net_profit, report_type)
-                        VALUES (:datekey, :company_id_fk, :extracted_revenue, :extracted_net_profit, :report_type);
-                    """)
-                    with engine_dw.connect() as conn:
-                        conn.execute(insert_fact_financial_stmt, final_data_to_insert_fin)
-                        conn.commit()
-                    logging.info(f"Financial reports data loaded to DW.")
-                else:
-                    logging.warning("No valid financial data to load.")
+
+            fact_financial = build_financial_facts(df_financial, df_companies_in_db)
+            if not fact_financial.empty:
+                load_fact_partitions(fact_financial, 'fact_financial', start_date, end_date)
+                logging.info(f"Financial reports data loaded to DW.")
+            else:
+                logging.warning("No valid financial data to load.")
         else:
-            logging.warning(f"Financial reports summary file not found: {financial_csv_path}")
+            logging.warning(f"Financial reports summary not found in {PROCESSED_STAGING_DIR}")
     except Exception as e:
         logging.error(f"Failed to load financial reports data to DW: {e}")
 
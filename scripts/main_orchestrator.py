@@ -39,6 +39,13 @@ logging.basicConfig(
     ]
 )
 
+# ETL AdventureWorks inkremental (CDC berbasis ModifiedDate): tabel AdventureWorks di staging/DW tidak
+# dikosongkan setiap run, hanya perubahan sumber yang dimuat. False = kosongkan semua dan muat ulang penuh.
+ADVENTUREWORKS_INCREMENTAL = True
+# Fakta Data Lake dimuat idempoten per partisi tanggal, sehingga tabel DW Data Lake tidak perlu dikosongkan.
+# True = tetap TRUNCATE tabel DW Data Lake setiap run.
+CLEAR_DATALAKE_DW_TABLES = False
+
 def run_full_data_pipeline():
     """
     Menjalankan seluruh pipeline Data Lake dan ETL AdventureWorks secara berurutan.
@@ -55,7 +62,9 @@ def run_full_data_pipeline():
     # 2. Clear existing data from databases (TRUNCATE TABLES)
     try:
         logging.info("\n--- Phase 2: Clearing existing data from databases ---")
-        etl_adventureworks.drop_all_tables_in_dbs()
+        etl_adventureworks.drop_all_tables_in_dbs(
+            include_adventureworks=not ADVENTUREWORKS_INCREMENTAL, include_datalake=CLEAR_DATALAKE_DW_TABLES
+        )
         logging.info("Phase 2: All specified tables cleared for a fresh start.")
     except Exception as e:
         logging.error(f"FATAL ERROR during database data clearing: {e}")
@@ -65,7 +74,7 @@ def run_full_data_pipeline():
     # 3. Run AdventureWorks ETL
     try:
         logging.info("\n--- Phase 3: Running AdventureWorks ETL Process ---")
-        etl_adventureworks.run_adventureworks_etl()
+        etl_adventureworks.run_adventureworks_etl(incremental=ADVENTUREWORKS_INCREMENTAL)
         logging.info("Phase 3: AdventureWorks ETL process completed successfully.")
     except Exception as e:
         logging.error(f"FATAL ERROR during AdventureWorks ETL: {e}")
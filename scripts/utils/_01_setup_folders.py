@@ -19,7 +19,9 @@ def setup_project_folders():
 
         # --- Folder Data Lake dan lainnya (tetap sama seperti sebelumnya) ---
         os.path.join(project_root, 'raw_data_lake'),
+        os.path.join(project_root, 'curated_data_lake'),
         os.path.join(project_root, 'processed_staging'),
+        os.path.join(project_root, 'analysis_cache'),
         os.path.join(project_root, 'logs'),
         os.path.join(project_root, 'scripts', 'utils'),
         os.path.join(project_root, 'documentation'),
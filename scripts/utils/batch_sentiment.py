@@ -0,0 +1,339 @@
+import re
+import logging
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+# Mesin sentimen batch: seluruh kolom tweet ditokenisasi sekali (operasi string pandas), lalu
+# token dinilai terhadap leksikon yang sama dengan TextBlob (pattern en-sentiment.xml) memakai
+# operasi array, tanpa membuat objek TextBlob per baris.
+#
+# Yang direplikasi dari PatternAnalyzer TextBlob:
+# - tokenisasi find_tokens (kontraksi & apostrof dipisah, tanda baca di tepi kata dipisah, emotikon)
+# - rata-rata polaritas dari kata yang dikenal leksikon, emotikon, dan sarkasme "(!)"
+# - modifier ("very good", "really not good") dan negasi ("not good", "not a good"): x -0.5
+# - tanda seru memperkuat penilaian terakhir: x 1.25 per '!'
+# Tidak direplikasi secara vektor: pengecualian singkatan pada pemisahan titik ("Mr.", "U.S.", "e.g." tetap
+# satu token di pattern) dan emotikon berhuruf dengan huruf besar/kecil berbeda (":d", "XD"). Teks yang
+# mungkin memuat salah satunya (deteksi sengaja longgar, lihat _needs_textblob) dinilai langsung dengan
+# TextBlob. Batas yang berlaku untuk semua teks: selisih absolut terhadap TextBlob(text).sentiment.polarity
+# <= SCORE_TOLERANCE (hanya beda urutan penjumlahan float); kategori hanya bisa berbeda jika skor
+# TextBlob berada dalam SCORE_TOLERANCE dari ambang +-0.1 (diuji di tests/test_batch_sentiment.py).
+# Leksikon dan daftar emotikon/singkatan dibaca dari modul internal textblob._text (textblob dipin di
+# requirements.txt); jika struktur internal itu tidak tersedia, semua teks dinilai per baris dengan TextBlob.
+SCORE_TOLERANCE = 1e-12
+# Naikkan setiap kali aturan penilaian/format hasil berubah (membatalkan cache hasil yang tersimpan)
+SCORER_VERSION = 2
+
+NEGATIONS = ('no', 'not', "n't", 'never')
+MODIFIER_POS = 'RB'
+EXCLAMATION_BOOST = 1.25
+NEGATION_FACTOR = -0.5
+IRONY_TOKEN = '(!)'
+TOP_WORDS_LIMIT = 10
+
+# Sama seperti textblob._text.find_tokens: kontraksi dipisah lalu setiap tanda kutip/apostrof
+# dipisah, jadi hanya "n't" -> " n't" yang berpengaruh ("don't" -> "do n ' t")
+_QUOTES_PATTERN = r"([“”‘’'\"])"
+_PUNCTUATION = ".,;:!?()[]{}`''\"@#$^&*+-|=~_"
+
+_lexicon = None
+
+
+def _load_lexicon():
+    """
+    Memuat leksikon TextBlob sekali: polaritas & intensitas per kata, modifier, emotikon, regex token.
+    None jika internal textblob yang dibutuhkan tidak tersedia (penilaian jatuh ke TextBlob per baris).
+    """
+    global _lexicon
+    if _lexicon is None:
+        try:
+            _lexicon = _build_lexicon()
+        except (ImportError, AttributeError, TypeError, ValueError) as e:
+            logging.warning(f"TextBlob internals unavailable ({e}); scoring tweets one by one with TextBlob.")
+            _lexicon = {}
+    return _lexicon or None
+
+
+def _build_lexicon():
+    from textblob.en import sentiment as pattern_sentiment
+    from textblob._text import ABBREVIATIONS, EMOTICONS
+
+    pattern_sentiment.load()
+    polarity, intensity, modifiers = {}, {}, set()
+    for word, by_pos in dict.items(pattern_sentiment):
+        p, _, i = by_pos[None]
+        polarity[word] = p
+        intensity[word] = i
+        if MODIFIER_POS in by_pos:
+            modifiers.add(word)
+    emoticons = {}
+    for (_, p), forms in EMOTICONS.items():
+        for form in forms:
+            # Seperti pattern: token alfabetis ("xD") tidak pernah dinilai sebagai emotikon
+            if not form.isalpha():
+                emoticons.setdefault(form.lower(), p)
+
+    # Emotikon boleh terpecah spasi (":'(" menjadi ": ' (" setelah apostrof dipisah); terpanjang dulu
+    emoticon_forms = sorted({form for forms in EMOTICONS.values() for form in forms}, key=len, reverse=True)
+    emoticon_pattern = '|'.join(' ?'.join(re.escape(ch) for ch in form) for form in emoticon_forms)
+    lead = re.escape(_PUNCTUATION.replace('.', ''))
+    trail = re.escape(_PUNCTUATION)
+    token_pattern = re.compile(
+        rf"(?:{emoticon_pattern})(?=(?:\.\.\.|[{trail}])*(?:\s|$))"
+        rf"|\( ?! ?\)"
+        rf"|\.\.\."
+        rf"|[{lead}]"
+        rf"|[^\s{lead}]\S*?(?=(?:\.\.\.|[{trail}])*(?:\s|$))"
+    )
+    # Teks yang dinilai dengan TextBlob: token yang bisa menjadi singkatan (ABBREVIATIONS / RE_ABBR1-3 pattern)
+    # setelah tanda baca di tepinya dipisah, atau emotikon berhuruf dalam bentuk huruf apa pun
+    abbreviation_pattern = '|'.join(
+        [r'(?:[A-Za-z]\.)+', r'[A-Z][bcdfghjklmnpqrstvwxz]+\.']
+        + [re.escape(abbreviation) for abbreviation in sorted(ABBREVIATIONS, key=len, reverse=True)]
+    )
+    lettered_emoticons = sorted({form for forms in EMOTICONS.values() for form in forms
+                                 if any(ch.isalpha() for ch in form)}, key=len, reverse=True)
+    fallback_pattern = re.compile(
+        rf"(?<![^\s{lead}])(?:{abbreviation_pattern})(?=[{trail}]*(?:\s|$))"
+        rf"|(?i:{'|'.join(' ?'.join(re.escape(ch) for ch in form) for form in lettered_emoticons)})"
+    )
+    return {
+        'polarity': polarity,
+        'intensity': intensity,
+        'modifiers': modifiers,
+        'emoticons': emoticons,
+        'token_pattern': token_pattern,
+        'fallback_pattern': fallback_pattern,
+    }
+
+
+def _split_quotes(texts):
+    """Seperti find_tokens: kontraksi "n't" dipisah, lalu setiap tanda kutip/apostrof diberi spasi."""
+    texts = pd.Series(texts, dtype='object').fillna('').astype(str).reset_index(drop=True)
+    return texts.str.replace("n't", " n't", regex=False).str.replace(_QUOTES_PATTERN, r' \1 ', regex=True)
+
+
+def _needs_textblob(texts):
+    """Mask (np.ndarray bool) teks yang dinilai dengan TextBlob karena tokenisasi vektor bisa berbeda."""
+    return _split_quotes(texts).str.contains(_load_lexicon()['fallback_pattern']).to_numpy(dtype=bool)
+
+
+def tokenize_texts(texts):
+    """
+    Tokenisasi satu kali untuk seluruh kolom. Return DataFrame panjang (satu baris per token)
+    dengan kolom 'row' (posisi tweet pada input) dan 'token' (huruf kecil), urut sesuai kemunculan.
+    """
+    lexicon = _load_lexicon()
+    texts = _split_quotes(texts)
+    tokens = texts.str.findall(lexicon['token_pattern']).explode().dropna()
+    # Normalisasi dilakukan per kosakata unik, bukan per token
+    codes, vocabulary = pd.factorize(tokens)
+    vocabulary = pd.Index(vocabulary).str.replace(' ', '', regex=False).str.lower().to_numpy(dtype=object)
+    return pd.DataFrame({'row': tokens.index.to_numpy(), 'token': vocabulary[codes]})
+
+
+def score_tokens(tokens, row_count):
+    """
+    Polaritas per tweet (np.ndarray panjang row_count) dari hasil tokenize_texts.
+
+    State machine PatternAnalyzer (modifier aktif m, negasi aktif n) dihitung secara vektor:
+    setiap token menjadi 'event' (set / clear / tetap), lalu state sebelum token = forward-fill
+    event sebelumnya dalam tweet yang sama.
+    """
+    lexicon = _load_lexicon()
+    scores = np.zeros(row_count)
+    if tokens.empty:
+        return scores
+    token, row = tokens['token'], tokens['row']
+    position = pd.Series(np.arange(len(tokens), dtype=float), index=tokens.index)
+    codes, vocabulary = pd.factorize(token)
+    vocabulary = pd.Series(vocabulary)
+
+    def per_token(values):
+        """Atribut yang dihitung sekali per kosakata unik, disebar ke semua token."""
+        return pd.Series(np.asarray(values)[codes], index=tokens.index)
+
+    def state_before(events):
+        """Event terakhir (non-NaN) sebelum setiap token, dalam tweet yang sama."""
+        return events.groupby(row).ffill().groupby(row).shift(1)
+
+    polarity = per_token(vocabulary.map(lexicon['polarity']))
+    intensity = per_token(vocabulary.map(lexicon['intensity']))
+    known = polarity.notna()
+    unknown = ~known
+    is_modifier = known & per_token(vocabulary.isin(lexicon['modifiers']))
+    is_ly = per_token(vocabulary.str.endswith('ly'))
+    is_negation = unknown & per_token(vocabulary.isin(NEGATIONS))
+    long_token = per_token(vocabulary.str.len() > 2)
+    long_stripped = per_token(vocabulary.str.strip("'").str.len() > 1)
+
+    # Modifier aktif: kata dikenal terakhir, jika ia modifier dan belum di-reset oleh kata tak dikenal
+    # yang panjang. Modifier '-ly' bertahan melewati negasi ("really not good").
+    last_known = state_before(position.where(known))
+    last_known_int = last_known.fillna(-1).astype(int).to_numpy()
+    has_known = last_known_int >= 0
+    modifier_candidate = np.where(has_known, is_modifier.to_numpy()[last_known_int], False)
+    candidate_ly = np.where(has_known, is_ly.to_numpy()[last_known_int], False)
+    reset_any = state_before(position.where(unknown & long_token)).fillna(-1).to_numpy()
+    reset_ly = state_before(position.where(unknown & long_token & ~is_negation)).fillna(-1).to_numpy()
+    modifier_active = modifier_candidate & (
+        np.where(candidate_ly, reset_ly, reset_any) < last_known.fillna(-1).to_numpy()
+    )
+    merged = known.to_numpy() & modifier_active
+
+    # Negasi aktif: di-set oleh kata negasi, di-clear oleh kata dikenal atau kata tak dikenal > 1 huruf.
+    # Negasi setelah modifier '-ly' langsung menempel ke penilaian modifier itu ("attach").
+    attach = is_negation.to_numpy() & modifier_active & candidate_ly
+    negation_events = pd.Series(np.nan, index=tokens.index)
+    negation_events[known | (unknown & long_stripped)] = 0.0
+    negation_events[is_negation.to_numpy() & ~attach] = 1.0
+    negation_events[attach] = 0.0
+    negated_here = known.to_numpy() & (state_before(negation_events).to_numpy() == 1.0)
+
+    # Daftar penilaian (a pada pattern): dibuat oleh kata dikenal yang tidak di-merge, emotikon, dan "(!)".
+    # Kata yang di-merge, negasi, dan tanda seru selalu mengenai penilaian terakhir (a[-1]).
+    emoticon = per_token(vocabulary.map(lexicon['emoticons']))
+    irony = per_token(vocabulary == IRONY_TOKEN)
+    creates = (known & ~merged) | emoticon.notna() | irony
+    latest = position.where(creates).groupby(row).ffill()
+    latest_before = latest.groupby(row).shift(1)
+    target = latest.where(~pd.Series(merged, index=tokens.index), latest_before)
+
+    # Intensitas a[-1] saat di-merge: milik modifier, kecuali a[-1] adalah emotikon setelahnya (1.0)
+    stored_intensity = np.where(negated_here, 1.0 / intensity.to_numpy(), intensity.to_numpy())
+    modifier_intensity = np.where(
+        latest_before.fillna(-1).to_numpy() > last_known.fillna(-1).to_numpy(), 1.0,
+        stored_intensity[last_known_int]
+    )
+    p = np.where(merged, np.clip(polarity.to_numpy() * modifier_intensity, -1.0, 1.0), polarity.to_numpy())
+    p = np.where(known.to_numpy(), p, emoticon.fillna(0.0).to_numpy())
+
+    # Setiap token yang menyentuh penilaian: nilai terakhirnya menjadi nilai penilaian itu
+    touches = pd.DataFrame({'key': target, 'row': row, 'p': p, 'position': position})[
+        known | emoticon.notna() | irony
+    ]
+    assessments = touches.groupby('key').agg(row=('row', 'first'), p=('p', 'last'), last_touch=('position', 'max'))
+    negated_keys = set(target[negated_here].dropna()) | set(latest_before[attach].dropna())
+    negated = assessments.index.isin(list(negated_keys))
+
+    # Tanda seru memperkuat a[-1], kecuali nilainya kemudian ditimpa oleh kata yang di-merge
+    is_exclamation = per_token(vocabulary == '!')
+    exclamations = pd.DataFrame({'key': latest[is_exclamation], 'position': position[is_exclamation]}).dropna()
+    exclamations = exclamations[
+        exclamations['position'].to_numpy() > assessments['last_touch'].reindex(exclamations['key']).to_numpy()
+    ]
+    boost_count = exclamations['key'].value_counts().reindex(assessments.index).fillna(0).to_numpy()
+    values = np.clip(assessments['p'].to_numpy() * EXCLAMATION_BOOST ** boost_count, -1.0, 1.0)
+    values = np.where(negated, values * NEGATION_FACTOR, values)
+
+    means = pd.Series(values, index=assessments['row'].to_numpy()).groupby(level=0).mean()
+    scores[means.index.to_numpy(dtype=int)] = means.to_numpy(dtype=float)
+    return scores
+
+
+def top_words_from_tokens(tokens, row_count, limit=TOP_WORDS_LIMIT):
+    """
+    Kata terbanyak per tweet (huruf saja, > 2 karakter), diformat seperti
+    str(Counter(words).most_common(limit)); seri dengan jumlah sama diurutkan sesuai kemunculan.
+    """
+    result = np.full(row_count, '[]', dtype=object)
+    codes, vocabulary = pd.factorize(tokens['token'])
+    vocabulary = pd.Series(vocabulary)
+    is_word = ((vocabulary.str.len() > 2) & vocabulary.str.isalpha()).to_numpy()[codes]
+    words = pd.DataFrame({'row': tokens['row'].to_numpy()[is_word], 'code': codes[is_word]})
+    if words.empty:
+        return pd.Series(result)
+    words['position'] = np.arange(len(words))
+    counts = words.groupby(['row', 'code'], sort=False).agg(count=('position', 'size'), first=('position', 'min'))
+    counts = counts.reset_index().sort_values(['row', 'count', 'first'], ascending=[True, False, True])
+    counts = counts.groupby('row').head(limit)
+    items = ("('" + vocabulary.to_numpy()[counts['code'].to_numpy()] + "', "
+             + counts['count'].astype(str).to_numpy() + ")")
+    rows = counts['row'].to_numpy()
+    boundaries = np.flatnonzero(np.diff(rows)) + 1
+    starts = np.concatenate(([0], boundaries))
+    for row, group in zip(rows[starts], np.split(items, boundaries)):
+        result[row] = '[' + ', '.join(group) + ']'
+    return pd.Series(result)
+
+
+# Satu item daftar kata teratas: ('kata', jumlah). Kata hanya berisi huruf (lihat top_words_from_tokens)
+_TOP_WORD_ITEM = r"\('([^'\\]*)', (\d+)\)"
+
+
+def parse_top_words(values):
+    """
+    Kebalikan top_words_from_tokens untuk satu Series string, tanpa eval: DataFrame panjang
+    berkolom row (label index asal), position (urutan dalam daftar), word, count (Int64).
+    Nilai kosong/bukan string menghasilkan nol baris.
+    """
+    values = pd.Series(values, dtype='object')
+    text = values.where(values.map(lambda value: isinstance(value, str))).astype('string')
+    items = text.str.extractall(_TOP_WORD_ITEM)
+    if items.empty:
+        return pd.DataFrame({'row': pd.Series(dtype=values.index.dtype), 'position': pd.Series(dtype='int64'),
+                             'word': pd.Series(dtype='string'), 'count': pd.Series(dtype='Int64')})
+    items = items.reset_index()
+    return pd.DataFrame({
+        'row': items.iloc[:, 0].to_numpy(),
+        'position': items['match'].to_numpy(),
+        'word': items[0].astype('string').to_numpy(),
+        'count': items[1].astype('Int64').to_numpy(),
+    })
+
+
+def format_top_word_items(words, counts):
+    """Item "('kata', n)" per baris (Series), format yang sama dengan isi str(Counter(...).most_common(n))."""
+    return "('" + pd.Series(words).astype(str) + "', " + pd.Series(counts).astype(str) + ")"
+
+
+def categorize_scores(scores):
+    """Kategori sentimen dengan ambang yang sama seperti sebelumnya (> 0.1 positif, < -0.1 negatif)."""
+    return np.select([scores > 0.1, scores < -0.1], ['Positive', 'Negative'], default='Neutral')
+
+
+def analyze_texts_textblob(texts):
+    """Penilaian per baris dengan TextBlob (acuan analyze_texts); hasil berformat sama dengan analyze_texts."""
+    from textblob import TextBlob
+
+    texts = pd.Series(texts, dtype='object')
+    scores, top_words = [], []
+    for text in texts.fillna('').astype(str):
+        blob = TextBlob(text)
+        scores.append(blob.sentiment.polarity)
+        try:
+            words = [word.lower() for word in blob.words if len(word) > 2 and word.isalpha()]
+        except Exception:
+            # blob.words membutuhkan korpus NLTK (punkt); tanpa korpus daftar kata dibiarkan kosong
+            words = []
+        top_words.append(str(Counter(words).most_common(TOP_WORDS_LIMIT)))
+    scores = np.asarray(scores, dtype=float)
+    return pd.DataFrame({
+        'sentiment_score': scores,
+        'sentiment_category': categorize_scores(scores),
+        'top_words_json': top_words,
+    }, index=texts.index)
+
+
+def analyze_texts(texts):
+    """
+    Menilai satu kolom tweet sekaligus. Return DataFrame (index sama dengan input) berisi
+    sentiment_score, sentiment_category, dan top_words_json.
+    """
+    texts = pd.Series(texts, dtype='object')
+    if _load_lexicon() is None:
+        return analyze_texts_textblob(texts)
+    tokens = tokenize_texts(texts)
+    scores = score_tokens(tokens, len(texts))
+    fallback = _needs_textblob(texts)
+    if fallback.any():
+        from textblob import TextBlob
+        scores[fallback] = [TextBlob(text).sentiment.polarity
+                            for text in texts[fallback].fillna('').astype(str)]
+    return pd.DataFrame({
+        'sentiment_score': scores,
+        'sentiment_category': categorize_scores(scores),
+        'top_words_json': top_words_from_tokens(tokens, len(texts)).to_numpy(),
+    }, index=texts.index)
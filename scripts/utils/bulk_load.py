@@ -0,0 +1,105 @@
+import logging
+
+from sqlalchemy import text
+
+from scripts.utils.staging_tables import copy_dataframe
+
+# Bulk load ke tabel DW (PostgreSQL): baris di-COPY ke tabel sementara (temp table tidak ditulis ke WAL),
+# lalu diterapkan ke tabel tujuan dengan satu INSERT ... SELECT / INSERT ... ON CONFLICT berbasis himpunan.
+BULK_TEMP_TABLE = '_bulk_load'
+
+
+def _copy_ready(df):
+    """
+    Kolom float yang semua nilainya bulat (mis. kunci integer yang menjadi float karena NaN setelah merge)
+    diubah ke Int64, karena COPY menolak teks '12.0' untuk kolom INT.
+    """
+    converted = {}
+    for column in df.select_dtypes(include='float').columns:
+        values = df[column].dropna()
+        if (values == values.round()).all():
+            converted[column] = df[column].astype('Int64')
+    return df.assign(**converted) if converted else df
+
+
+def _stage_dataframe(conn, df, table_name):
+    """COPY df ke temp table berkolom sama (tipe dari table_name). Return daftar kolom."""
+    columns = [str(column) for column in df.columns]
+    conn.execute(text(f"DROP TABLE IF EXISTS pg_temp.{BULK_TEMP_TABLE}"))
+    # Hanya kolom df (tipe sama dengan tujuan), tanpa constraint/default: serial tujuan tidak ikut terpakai
+    conn.execute(text(
+        f"CREATE TEMP TABLE {BULK_TEMP_TABLE} ON COMMIT DROP AS SELECT {', '.join(columns)} FROM {table_name} WITH NO DATA"
+    ))
+    copy_dataframe(_copy_ready(df), BULK_TEMP_TABLE, conn)
+    return columns
+
+
+def bulk_upsert(conn, df, table_name, key_columns=None, update=True):
+    """
+    Memuat df ke table_name di dalam transaksi conn lewat temp table + COPY + satu perintah set-based.
+    - key_columns=None: semua baris disisipkan (tabel fakta).
+    - key_columns: INSERT ... ON CONFLICT (key_columns); baris yang kuncinya sudah ada diperbarui jika
+      update=True dan isinya berbeda, selain itu dilewati. Kunci duplikat di df: baris terakhir yang dipakai.
+    Return dict jumlah baris: inserted, updated, skipped.
+    """
+    if df.empty:
+        return {'inserted': 0, 'updated': 0, 'skipped': 0}
+    if key_columns:
+        df = df.drop_duplicates(subset=key_columns, keep='last')
+    columns = _stage_dataframe(conn, df, table_name)
+    column_list = ', '.join(columns)
+
+    if not key_columns:
+        inserted = conn.execute(text(
+            f"INSERT INTO {table_name} ({column_list}) SELECT {column_list} FROM {BULK_TEMP_TABLE}"
+        )).rowcount
+        return {'inserted': inserted, 'updated': 0, 'skipped': 0}
+
+    update_columns = [column for column in columns if column not in key_columns]
+    if update and update_columns:
+        target_values = ', '.join(f"target.{column}" for column in update_columns)
+        new_values = ', '.join(f"EXCLUDED.{column}" for column in update_columns)
+        on_conflict = (
+            f"DO UPDATE SET {', '.join(f'{column} = EXCLUDED.{column}' for column in update_columns)} "
+            f"WHERE ROW({target_values}) IS DISTINCT FROM ROW({new_values})"
+        )
+    else:
+        on_conflict = "DO NOTHING"
+
+    # xmax = 0 pada baris yang dikembalikan berarti baris baru (bukan hasil UPDATE)
+    inserted, updated = conn.execute(text(f"""
+        WITH applied AS (
+            INSERT INTO {table_name} AS target ({column_list})
+            SELECT {column_list} FROM {BULK_TEMP_TABLE}
+            ON CONFLICT ({', '.join(key_columns)}) {on_conflict}
+            RETURNING (target.xmax = 0) AS is_insert
+        )
+        SELECT COUNT(*) FILTER (WHERE is_insert), COUNT(*) FILTER (WHERE NOT is_insert) FROM applied
+    """)).one()
+    return {'inserted': inserted, 'updated': updated, 'skipped': len(df) - inserted - updated}
+
+
+def replace_partitions(conn, df, table_name, partition_columns):
+    """
+    Mengganti irisan tabel secara idempoten di dalam transaksi conn: semua baris table_name yang nilai
+    partition_columns-nya muncul di df dihapus, lalu df disisipkan. Partisi yang tidak ada di df tidak disentuh.
+    Return dict jumlah baris: deleted, inserted.
+    """
+    if df.empty:
+        return {'deleted': 0, 'inserted': 0}
+    columns = _stage_dataframe(conn, df, table_name)
+    column_list = ', '.join(columns)
+    partition_list = ', '.join(partition_columns)
+    deleted = conn.execute(text(f"""
+        DELETE FROM {table_name}
+        WHERE ({partition_list}) IN (SELECT DISTINCT {partition_list} FROM {BULK_TEMP_TABLE})
+    """)).rowcount
+    inserted = conn.execute(text(
+        f"INSERT INTO {table_name} ({column_list}) SELECT {column_list} FROM {BULK_TEMP_TABLE}"
+    )).rowcount
+    return {'deleted': deleted, 'inserted': inserted}
+
+
+def log_bulk_counts(table_name, counts, db_name):
+    logging.info(f"Loaded {table_name} in {db_name}: {counts['inserted']} inserted, "
+                 f"{counts['updated']} updated, {counts['skipped']} skipped (bulk COPY).")
@@ -191,6 +191,9 @@ CREATE TABLE IF NOT EXISTS stg_vendor (
 -- SCHEMAS UNTUK adventureworks_dw DATABASE (Data Warehouse)
 -- ==================================================================================================
 
+-- dblink: ELT fact_sales membaca tabel raw_* di adventureworks_staging langsung dari DW
+CREATE EXTENSION IF NOT EXISTS dblink;
+
 -- Dimensi Umum (bisa dipakai oleh kedua domain: AdventureWorks dan Data Lake)
 CREATE TABLE IF NOT EXISTS dim_date (
     datekey INT PRIMARY KEY,
@@ -230,6 +233,8 @@ CREATE TABLE IF NOT EXISTS dim_employee (
 
 CREATE TABLE IF NOT EXISTS fact_sales (
     factid SERIAL PRIMARY KEY,
+    salesorderid INT,        -- kunci alami (bersama salesorderdetailid) untuk ETL inkremental
+    salesorderdetailid INT,
     productid INT REFERENCES dim_product(productid),
     customerid INT REFERENCES dim_customer(customerid),
     storeid INT REFERENCES dim_store(storeid),
@@ -241,6 +246,10 @@ CREATE TABLE IF NOT EXISTS fact_sales (
     unitpricedisc NUMERIC,
     totalpenjualan NUMERIC
 );
+-- Database yang dibuat sebelum kolom kunci alami ditambahkan
+ALTER TABLE fact_sales ADD COLUMN IF NOT EXISTS salesorderid INT;
+ALTER TABLE fact_sales ADD COLUMN IF NOT EXISTS salesorderdetailid INT;
+CREATE INDEX IF NOT EXISTS idx_fact_sales_salesorderid ON fact_sales (salesorderid);
 
 -- Star Schema untuk Domain Data Lake (Sensor Gudang & Social Media)
 CREATE TABLE IF NOT EXISTS dim_warehouse_zone (
@@ -266,6 +275,13 @@ CREATE TABLE IF NOT EXISTS fact_warehouse_temperature (
     avg_humidity_percent NUMERIC
 );
 
+-- Kunci alami fakta Data Lake: pemuatan ulang mengganti partisi tanggal, bukan menambah duplikat.
+-- Duplikat dari run lama (mode append) dibuang dulu, menyisakan baris terbaru (id terbesar) per kunci,
+-- agar UNIQUE INDEX bisa dibuat pada DW yang sudah ada
+DELETE FROM fact_warehouse_temperature a USING fact_warehouse_temperature b
+WHERE a.datekey = b.datekey AND a.zone_id = b.zone_id AND a.fact_temp_id < b.fact_temp_id;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_fact_warehouse_temperature_key ON fact_warehouse_temperature (datekey, zone_id);
+
 CREATE TABLE IF NOT EXISTS fact_social_media_sentiment (
     fact_sentiment_id SERIAL PRIMARY KEY,
     datekey INT REFERENCES dim_date(datekey),
@@ -274,6 +290,22 @@ CREATE TABLE IF NOT EXISTS fact_social_media_sentiment (
     avg_sentiment_score NUMERIC,
     top_words_json TEXT
 );
+DELETE FROM fact_social_media_sentiment a USING fact_social_media_sentiment b
+WHERE a.datekey = b.datekey AND a.sentiment_id = b.sentiment_id AND a.fact_sentiment_id < b.fact_sentiment_id;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_fact_social_media_sentiment_key ON fact_social_media_sentiment (datekey, sentiment_id);
+
+-- Frekuensi kata per (tanggal, kategori sentimen): bentuk ternormalisasi dari top_words_json (semua kata, bukan
+-- hanya 50 teratas) agar word cloud dihitung di PostgreSQL dengan GROUP BY ... ORDER BY ... LIMIT
+CREATE TABLE IF NOT EXISTS fact_word_frequency (
+    datekey INT REFERENCES dim_date(datekey),
+    sentiment_id INT REFERENCES dim_sentiment_category(sentiment_id),
+    word TEXT NOT NULL,
+    count INT NOT NULL, -- jumlah tweet di grup yang daftar kata teratasnya memuat kata ini
+    PRIMARY KEY (datekey, sentiment_id, word)
+);
+-- Indeks covering (index-only scan) untuk agregasi top-N: seluruh rentang per kata, atau per kategori + rentang tanggal
+CREATE INDEX IF NOT EXISTS idx_fact_word_frequency_word ON fact_word_frequency (word) INCLUDE (count);
+CREATE INDEX IF NOT EXISTS idx_fact_word_frequency_sentiment ON fact_word_frequency (sentiment_id, datekey) INCLUDE (word, count);
 
 
 -- --- NEW: Dimensi dan Fakta untuk Data Finansial ---
@@ -290,5 +322,24 @@ CREATE TABLE IF NOT EXISTS fact_financial (
     company_id INT REFERENCES dim_company(company_id),
     revenue NUMERIC, -- Contoh metrik yang diekstrak
     net_profit NUMERIC, -- Contoh metrik lain (jika bisa diekstrak)
-    report_type TEXT -- Contoh: 'Quarterly', 'Annual'
-);
+    report_type TEXT NOT NULL DEFAULT 'Unknown' -- Contoh: 'Quarterly', 'Annual'
+);
+-- report_type bagian dari kunci alami: NOT NULL agar laporan tanpa jenis tidak lolos dari UNIQUE (NULL <> NULL)
+UPDATE fact_financial SET report_type = 'Unknown' WHERE report_type IS NULL;
+ALTER TABLE fact_financial ALTER COLUMN report_type SET DEFAULT 'Unknown', ALTER COLUMN report_type SET NOT NULL;
+DELETE FROM fact_financial a USING fact_financial b
+WHERE a.datekey = b.datekey AND a.company_id = b.company_id AND a.report_type = b.report_type
+  AND a.fact_financial_id < b.fact_financial_id;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_fact_financial_key ON fact_financial (datekey, company_id, report_type);
+
+
+-- Hash baris dimensi untuk loader hash-diff (scripts/utils/dimension_loader.py); loader juga menambahkannya otomatis
+ALTER TABLE dim_date ADD COLUMN IF NOT EXISTS row_hash TEXT;
+ALTER TABLE dim_product ADD COLUMN IF NOT EXISTS row_hash TEXT;
+ALTER TABLE dim_customer ADD COLUMN IF NOT EXISTS row_hash TEXT;
+ALTER TABLE dim_store ADD COLUMN IF NOT EXISTS row_hash TEXT;
+ALTER TABLE dim_vendor ADD COLUMN IF NOT EXISTS row_hash TEXT;
+ALTER TABLE dim_employee ADD COLUMN IF NOT EXISTS row_hash TEXT;
+ALTER TABLE dim_warehouse_zone ADD COLUMN IF NOT EXISTS row_hash TEXT;
+ALTER TABLE dim_sentiment_category ADD COLUMN IF NOT EXISTS row_hash TEXT;
+ALTER TABLE dim_company ADD COLUMN IF NOT EXISTS row_hash TEXT;
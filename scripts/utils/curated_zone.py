@@ -0,0 +1,216 @@
+import os
+import logging
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import pyarrow.dataset as ds
+
+from scripts.utils.lake_partitions import PARTITION_KEY, partition_dir_name, parse_partition_dir, normalize_date
+
+# Curated zone: data sensor yang sudah bertipe, disimpan sebagai Parquet terkompresi,
+# satu file per partisi tanggal: curated_data_lake/sensors/dt=YYYY-MM-DD/part-0.parquet
+CURATED_SENSOR_SUBDIR = 'sensors'
+PARTITION_FILENAME = 'part-0.parquet'
+PARQUET_COMPRESSION = 'zstd'
+PARQUET_ROW_GROUP_SIZE = 64 * 1024  # Baris per row group; statistik min/max dicatat per row group
+
+SENSOR_SCHEMA = pa.schema([
+    ('timestamp', pa.timestamp('us')),
+    ('zone_id', pa.string()),
+    ('temperature_c', pa.float64()),
+    ('humidity_percent', pa.float64()),
+    ('source_file', pa.string()),  # Path relatif objek di raw_data_lake (lineage)
+])
+SENSOR_VALUE_COLUMNS = ['timestamp', 'zone_id', 'temperature_c', 'humidity_percent']
+
+# Beberapa file sensor memakai nama kolom lain (misal 'date,temperature'); dipetakan ke skema
+# kanonis hanya jika kolom kanonisnya tidak ada di file tersebut.
+SENSOR_COLUMN_ALIASES = {
+    'date': 'timestamp',
+    'temperature': 'temperature_c',
+    'humidity': 'humidity_percent',
+}
+
+
+def sensor_dataset_dir(curated_dir):
+    return os.path.join(curated_dir, CURATED_SENSOR_SUBDIR)
+
+
+def normalize_sensor_frame(df, source_file):
+    """Menormalkan DataFrame sensor mentah (satu file atau satu potongan file) ke SENSOR_SCHEMA."""
+    df = df.rename(columns={
+        alias: canonical for alias, canonical in SENSOR_COLUMN_ALIASES.items()
+        if alias in df.columns and canonical not in df.columns
+    })
+    for column in SENSOR_VALUE_COLUMNS:
+        if column not in df.columns:
+            df[column] = None
+    df = df[SENSOR_VALUE_COLUMNS].copy()
+    df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
+    df['zone_id'] = df['zone_id'].where(df['zone_id'].isna(), df['zone_id'].astype(str)).astype(object)
+    df['temperature_c'] = pd.to_numeric(df['temperature_c'], errors='coerce')
+    df['humidity_percent'] = pd.to_numeric(df['humidity_percent'], errors='coerce')
+    df['source_file'] = source_file
+    return df
+
+
+def read_sensor_csv(file_path, source_file):
+    """Membaca satu CSV sensor mentah dan menormalkannya ke SENSOR_SCHEMA (sebagai DataFrame)."""
+    return normalize_sensor_frame(pd.read_csv(file_path), source_file)
+
+
+def iter_sensor_csv(file_path, source_file, chunk_size):
+    """Seperti read_sensor_csv, tetapi membaca per potongan chunk_size baris (memori terbatas)."""
+    with pd.read_csv(file_path, chunksize=chunk_size) as reader:
+        for chunk in reader:
+            yield normalize_sensor_frame(chunk, source_file)
+
+
+def _open_sensor_dataset(curated_dir):
+    dataset_dir = sensor_dataset_dir(curated_dir)
+    if not os.path.isdir(dataset_dir):
+        return None
+    return ds.dataset(
+        dataset_dir,
+        format='parquet',
+        partitioning=ds.partitioning(pa.schema([(PARTITION_KEY, pa.string())]), flavor='hive'),
+    )
+
+
+def curated_sensor_sources(curated_dir):
+    """Himpunan source_file yang sudah ada di curated zone (hanya membaca satu kolom)."""
+    dataset = _open_sensor_dataset(curated_dir)
+    if dataset is None:
+        return set()
+    table = dataset.to_table(columns=['source_file'])
+    return set(table.column('source_file').unique().to_pylist())
+
+
+def curated_sensor_partitions(curated_dir):
+    """Tanggal partisi ('YYYY-MM-DD') yang ada di curated zone, terurut (hanya daftar file, tanpa membaca isi)."""
+    dataset = _open_sensor_dataset(curated_dir)
+    if dataset is None:
+        return []
+    dates = {parse_partition_dir(os.path.basename(os.path.dirname(path))) for path in dataset.files}
+    return sorted(date for date in dates if date)
+
+
+def _write_partition(partition_path, df):
+    """Menulis satu partisi secara atomik, diurutkan per timestamp agar statistik row group rapat."""
+    os.makedirs(os.path.dirname(partition_path), exist_ok=True)
+    df = df.sort_values(['timestamp', 'zone_id'], kind='stable')
+    table = pa.Table.from_pandas(df[SENSOR_SCHEMA.names], schema=SENSOR_SCHEMA, preserve_index=False)
+    # Diawali '.' agar file sementara tidak ikut terbaca oleh pyarrow.dataset jika proses terhenti
+    tmp_path = os.path.join(os.path.dirname(partition_path), '.' + os.path.basename(partition_path) + '.tmp')
+    pq.write_table(
+        table, tmp_path,
+        compression=PARQUET_COMPRESSION,
+        row_group_size=PARQUET_ROW_GROUP_SIZE,
+        write_statistics=True,
+    )
+    os.replace(tmp_path, partition_path)
+
+
+def write_sensor_partitions(df, curated_dir, replace_sources=None):
+    """
+    Menggabungkan data sensor baru (hasil read_sensor_csv / iter_sensor_csv) ke curated zone.
+    Baris lama dari replace_sources (default: semua source_file di df) diganti, sehingga file sumber
+    yang berubah ditulis ulang; file yang ditulis per potongan memberi () untuk potongan lanjutan agar
+    potongan sebelumnya tidak ikut terhapus. Hanya partisi yang tersentuh yang ditulis ulang.
+    Return jumlah partisi yang ditulis.
+    """
+    incoming_sources = sorted(df['source_file'].unique())
+    replace_sources = incoming_sources if replace_sources is None else sorted(replace_sources)
+    if df.empty and not replace_sources:
+        return 0
+
+    missing_ts = df['timestamp'].isna()
+    if missing_ts.any():
+        logging.warning(f"Curated zone: dropping {int(missing_ts.sum())} sensor row(s) without a valid timestamp.")
+        df = df[~missing_ts]
+    df = df.assign(**{PARTITION_KEY: df['timestamp'].dt.strftime('%Y-%m-%d')})
+
+    # Partisi lama yang memuat source_file yang diganti juga harus ditulis ulang (scan satu kolom saja)
+    affected = set(df[PARTITION_KEY].unique())
+    dataset = _open_sensor_dataset(curated_dir)
+    if dataset is not None and replace_sources:
+        old = dataset.to_table(columns=[PARTITION_KEY], filter=ds.field('source_file').isin(replace_sources))
+        affected.update(old.column(PARTITION_KEY).unique().to_pylist())
+
+    dataset_dir = sensor_dataset_dir(curated_dir)
+    for partition_date in sorted(affected):
+        partition_path = os.path.join(dataset_dir, partition_dir_name(partition_date), PARTITION_FILENAME)
+        new_rows = df[df[PARTITION_KEY] == partition_date].drop(columns=[PARTITION_KEY])
+        if os.path.exists(partition_path):
+            # Digabung sebagai tabel Arrow: tipe tetap mengikuti SENSOR_SCHEMA walau potongan baru kosong/NULL semua
+            existing = pq.read_table(partition_path, schema=SENSOR_SCHEMA)
+            replaced = pc.is_in(existing.column('source_file'), pa.array(replace_sources, pa.string()))
+            existing = existing.filter(pc.invert(replaced))
+            incoming = pa.Table.from_pandas(new_rows[SENSOR_SCHEMA.names], schema=SENSOR_SCHEMA, preserve_index=False)
+            new_rows = pa.concat_tables([existing, incoming]).to_pandas()
+        if new_rows.empty:
+            if os.path.exists(partition_path):
+                os.remove(partition_path)
+            continue
+        _write_partition(partition_path, new_rows)
+
+    logging.debug(f"Curated zone: wrote {len(affected)} sensor partition(s) for {len(incoming_sources)} source file(s).")
+    return len(affected)
+
+
+def remove_sensor_sources(curated_dir, source_files):
+    """Membuang semua baris source_files dari curated zone (mis. setelah konversi yang gagal di tengah)."""
+    empty = SENSOR_SCHEMA.empty_table().to_pandas()
+    return write_sensor_partitions(empty, curated_dir, replace_sources=source_files)
+
+
+def _sensor_filter(start_date=None, end_date=None, source_files=None, zone_required=False):
+    """Ekspresi filter pyarrow untuk read_sensor_curated / iter_sensor_curated (None jika tanpa filter)."""
+    expression = None
+    conditions = []
+    if start_date is not None:
+        conditions.append(ds.field(PARTITION_KEY) >= normalize_date(start_date))
+    if end_date is not None:
+        conditions.append(ds.field(PARTITION_KEY) <= normalize_date(end_date))
+    if source_files is not None:
+        conditions.append(ds.field('source_file').isin(list(source_files)))
+    if zone_required:
+        conditions.append(ds.field('zone_id').is_valid())
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def read_sensor_curated(curated_dir, columns=None, start_date=None, end_date=None, source_files=None, zone_required=False):
+    """
+    Membaca data sensor dari curated zone dengan column & predicate pushdown:
+    partisi di luar [start_date, end_date] tidak dibuka, row group dilewati berdasarkan
+    statistiknya, dan hanya kolom yang diminta yang didekode.
+    Return DataFrame (kosong jika curated zone belum ada).
+    """
+    columns = columns or SENSOR_SCHEMA.names
+    dataset = _open_sensor_dataset(curated_dir)
+    if dataset is None:
+        return pd.DataFrame({name: pd.Series(dtype='object') for name in columns})
+    expression = _sensor_filter(start_date, end_date, source_files, zone_required)
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+
+def iter_sensor_curated(curated_dir, columns=None, start_date=None, end_date=None, source_files=None,
+                        zone_required=False, batch_size=PARQUET_ROW_GROUP_SIZE):
+    """
+    Seperti read_sensor_curated, tetapi mengembalikan iterator DataFrame per batch (maks. batch_size
+    baris) sehingga memori tidak bergantung pada ukuran data. Dataset dibuka saat fungsi dipanggil,
+    jadi error metadata muncul di sini, bukan saat iterasi.
+    """
+    columns = columns or SENSOR_SCHEMA.names
+    dataset = _open_sensor_dataset(curated_dir)
+    if dataset is None:
+        return iter(())
+    scanner = dataset.scanner(
+        columns=columns,
+        filter=_sensor_filter(start_date, end_date, source_files, zone_required),
+        batch_size=batch_size,
+    )
+    return (batch.to_pandas() for batch in scanner.to_batches() if batch.num_rows)
@@ -0,0 +1,91 @@
+import hashlib
+import logging
+from datetime import datetime
+
+import pandas as pd
+from sqlalchemy import text
+
+from scripts.utils.bulk_load import bulk_upsert
+
+# Loader dimensi berbasis hash-diff: setiap baris punya row_hash (md5 atas kolom atribut) yang disimpan
+# di tabel dimensi. Hanya baris baru atau yang hash-nya berubah yang dikirim ke DW (bulk COPY + upsert);
+# baris yang tidak berubah tidak ditulis ulang.
+HASH_COLUMN = 'row_hash'
+
+# Riwayat Type-2 (opsional) disimpan di tabel terpisah <dimensi>_history, sehingga tabel dimensi tetap
+# satu baris per kunci alami dan foreign key dari tabel fakta tidak berubah.
+HISTORY_SUFFIX = '_history'
+VALID_FROM_COLUMN = 'valid_from'
+VALID_TO_COLUMN = 'valid_to'     # NULL = versi yang berlaku
+
+# Pemisah antar kolom dan penanda NULL di teks yang di-hash (tidak muncul di data biasa)
+_FIELD_SEPARATOR = '\x1f'
+_NULL_MARKER = '\x00'
+
+
+def row_hashes(df, columns):
+    """md5 hex per baris atas kolom columns (urutan kolom berpengaruh). NULL dibedakan dari string kosong."""
+    if not columns:
+        return pd.Series(hashlib.md5(b'').hexdigest(), index=df.index)
+    values = df[columns].astype('string').fillna(_NULL_MARKER)
+    joined = values.iloc[:, 0].str.cat([values[column] for column in columns[1:]], sep=_FIELD_SEPARATOR)
+    return joined.map(lambda value: hashlib.md5(value.encode('utf-8')).hexdigest())
+
+
+def ensure_dimension_columns(conn, table_name, history=False):
+    """Menambahkan kolom row_hash (dan tabel riwayat jika history=True) pada dimensi yang sudah ada."""
+    conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN IF NOT EXISTS {HASH_COLUMN} TEXT"))
+    if history:
+        history_table = f"{table_name}{HISTORY_SUFFIX}"
+        # LIKE tanpa INCLUDING: hanya kolom, tanpa PK/UNIQUE/default serial, agar satu kunci bisa punya banyak versi
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {history_table} (LIKE {table_name})"))
+        conn.execute(text(f"""
+            ALTER TABLE {history_table}
+                ADD COLUMN IF NOT EXISTS {VALID_FROM_COLUMN} TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                ADD COLUMN IF NOT EXISTS {VALID_TO_COLUMN} TIMESTAMP
+        """))
+
+
+def load_dimension(df, table_name, natural_key, db_engine, history=False):
+    """
+    Memuat dimensi dengan hash-diff terhadap row_hash yang tersimpan:
+    - kunci alami baru -> INSERT; hash berbeda -> UPDATE atribut; hash sama -> dilewati.
+    - history=True: versi terbuka di <table>_history untuk setiap kunci yang ditulis ditutup (valid_to),
+      lalu versi baru dicatat (valid_from).
+    Semua perubahan dalam satu transaksi. Return dict jumlah baris: inserted, updated, unchanged.
+    """
+    df = df.drop_duplicates(subset=[natural_key], keep='last')
+    attributes = [column for column in df.columns if column != natural_key]
+    df = df.assign(**{HASH_COLUMN: row_hashes(df, attributes)})
+
+    with db_engine.begin() as conn:
+        ensure_dimension_columns(conn, table_name, history)
+        stored = pd.read_sql(text(f"SELECT {natural_key}, {HASH_COLUMN} FROM {table_name}"), conn)
+        stored_hashes = dict(zip(stored[natural_key], stored[HASH_COLUMN]))
+
+        previous = df[natural_key].map(lambda key: stored_hashes.get(key, _NULL_MARKER))
+        is_new = ~df[natural_key].isin(stored_hashes.keys())
+        is_changed = ~is_new & (previous != df[HASH_COLUMN])
+        to_write = df[is_new | is_changed]
+
+        if not to_write.empty:
+            bulk_upsert(conn, to_write, table_name, [natural_key])
+
+            if history:
+                now = datetime.now()
+                history_table = f"{table_name}{HISTORY_SUFFIX}"
+                # Juga kunci baru: versi terbuka bisa tersisa jika dimensi dikosongkan tanpa riwayatnya
+                conn.execute(text(f"""
+                    UPDATE {history_table} SET {VALID_TO_COLUMN} = :now
+                    WHERE {natural_key} = ANY(:keys) AND {VALID_TO_COLUMN} IS NULL
+                """), {'now': now, 'keys': to_write[natural_key].tolist()})
+                bulk_upsert(conn, to_write.assign(**{VALID_FROM_COLUMN: now}), history_table)
+
+    counts = {
+        'inserted': int(is_new.sum()),
+        'updated': int(is_changed.sum()),
+        'unchanged': int(len(df) - is_new.sum() - is_changed.sum()),
+    }
+    logging.info(f"{table_name}: {counts['inserted']} inserted, {counts['updated']} updated, "
+                 f"{counts['unchanged']} unchanged{' (with history)' if history else ''}.")
+    return counts
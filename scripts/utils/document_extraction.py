@@ -0,0 +1,154 @@
+import os
+import time
+import sqlite3
+import logging
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz  # PyMuPDF
+import docx  # python-docx
+
+# Cache teks hasil ekstraksi dokumen (PDF/DOCX) per halaman, disimpan sebagai SQLite.
+# Kunci: sha256 isi file, sehingga dokumen yang tidak berubah (meski dipindah/diganti nama)
+# tidak perlu dibuka ulang dengan fitz/python-docx.
+CACHE_FILENAME = '_document_text_cache.sqlite'
+
+# Format yang diekstrak lewat cache; .txt cukup dibaca langsung
+CACHED_EXTENSIONS = ('.pdf', '.docx')
+
+# Naikkan jika cara ekstraksi berubah (membatalkan teks yang tersimpan)
+EXTRACTOR_VERSION = 1
+
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    sha256            TEXT PRIMARY KEY,
+    file_type         TEXT NOT NULL,      -- pdf / docx
+    page_count        INTEGER NOT NULL,
+    extractor_version INTEGER NOT NULL,
+    extracted_at      TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS document_pages (
+    sha256   TEXT NOT NULL,
+    page_no  INTEGER NOT NULL,            -- mulai dari 0; DOCX disimpan sebagai satu halaman
+    text     TEXT NOT NULL,
+    PRIMARY KEY (sha256, page_no)
+);
+"""
+
+
+def connect_cache(cache_dir):
+    """Membuka (dan membuat jika belum ada) cache teks dokumen di cache_dir."""
+    os.makedirs(cache_dir, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(cache_dir, CACHE_FILENAME))
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(CACHE_SCHEMA)
+    return conn
+
+
+def join_pages(file_path, pages):
+    """Menggabungkan halaman menjadi satu teks, sama seperti ekstraksi langsung sebelumnya."""
+    return "".join(pages) if file_path.lower().endswith('.pdf') else "\n".join(pages)
+
+
+def extract_pages(file_path):
+    """Ekstraksi teks per halaman. PDF: satu entri per halaman; DOCX/TXT: satu entri untuk seluruh isi; format lain: kosong."""
+    lower = file_path.lower()
+    if lower.endswith('.pdf'):
+        with fitz.open(file_path) as doc:
+            return [page.get_text() for page in doc]
+    if lower.endswith('.docx'):
+        return ["\n".join(p.text for p in docx.Document(file_path).paragraphs)]
+    if lower.endswith('.txt'):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return [f.read()]
+    return []
+
+
+def _extract_worker(file_path):
+    """Tugas satu worker: (file_path, pages, error). Error dikembalikan agar satu file rusak tidak menggagalkan batch."""
+    try:
+        return file_path, extract_pages(file_path), None
+    except Exception as e:
+        return file_path, None, str(e)
+
+
+def load_cached_pages(conn, sha256):
+    """List teks halaman untuk sha256, atau None jika belum ada di cache (atau dari versi ekstraktor lain)."""
+    row = conn.execute(
+        "SELECT page_count FROM documents WHERE sha256 = ? AND extractor_version = ?", (sha256, EXTRACTOR_VERSION)
+    ).fetchone()
+    if row is None:
+        return None
+    pages = [text for (text,) in conn.execute(
+        "SELECT text FROM document_pages WHERE sha256 = ? ORDER BY page_no", (sha256,)
+    )]
+    return pages if len(pages) == row[0] else None
+
+
+def store_pages(conn, sha256, file_path, pages):
+    now = datetime.now().isoformat(timespec='seconds')
+    with conn:
+        conn.execute("DELETE FROM document_pages WHERE sha256 = ?", (sha256,))
+        conn.execute("""
+            INSERT INTO documents (sha256, file_type, page_count, extractor_version, extracted_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (sha256) DO UPDATE SET
+                file_type = excluded.file_type, page_count = excluded.page_count,
+                extractor_version = excluded.extractor_version, extracted_at = excluded.extracted_at
+        """, (sha256, os.path.splitext(file_path)[1].lower().lstrip('.'), len(pages), EXTRACTOR_VERSION, now))
+        conn.executemany(
+            "INSERT INTO document_pages (sha256, page_no, text) VALUES (?, ?, ?)",
+            [(sha256, page_no, text) for page_no, text in enumerate(pages)]
+        )
+
+
+def extract_documents(file_hashes, cache_dir, max_workers=1):
+    """
+    Ekstraksi teks untuk banyak dokumen sekaligus.
+    file_hashes: dict file_path -> sha256 isi file (None jika tidak diketahui; dokumen tersebut
+    diekstrak tanpa cache). PDF/DOCX yang sha256-nya sudah ada di cache diambil dari cache; sisanya
+    diekstrak (paralel dengan process pool jika max_workers > 1) lalu disimpan ke cache.
+    Return dict file_path -> list teks halaman; file yang gagal diekstrak tidak ada di hasil (error di-log).
+    """
+    results, pending = {}, []
+    try:
+        conn = connect_cache(cache_dir)
+    except sqlite3.Error as e:
+        logging.warning(f"Document text cache unavailable, extracting all documents: {e}")
+        conn = None
+
+    try:
+        for file_path, sha256 in file_hashes.items():
+            cacheable = conn is not None and sha256 and file_path.lower().endswith(CACHED_EXTENSIONS)
+            pages = load_cached_pages(conn, sha256) if cacheable else None
+            if pages is None:
+                pending.append(file_path)
+            else:
+                results[file_path] = pages
+        hits = len(results)
+
+        started = time.perf_counter()
+        workers = max(1, min(max_workers or 1, len(pending)))
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                extracted = list(executor.map(_extract_worker, pending))
+        else:
+            extracted = [_extract_worker(file_path) for file_path in pending]
+
+        for file_path, pages, error in extracted:
+            if error is not None:
+                logging.error(f"Could not extract text from {os.path.basename(file_path)}. Error: {error}")
+                continue
+            results[file_path] = pages
+            sha256 = file_hashes[file_path]
+            if conn is not None and sha256 and file_path.lower().endswith(CACHED_EXTENSIONS):
+                store_pages(conn, sha256, file_path, pages)
+    finally:
+        if conn is not None:
+            conn.close()
+
+    logging.info(
+        f"Document text: {hits} document(s) served from cache, {len(pending)} extracted "
+        f"using {workers} process(es) in {time.perf_counter() - started:.2f}s."
+    )
+    return results
@@ -0,0 +1,152 @@
+import os
+import time
+import shutil
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# ioctl FICLONE (linux/fs.h): reflink copy-on-write pada Btrfs, XFS (reflink=1), dsb.
+FICLONE = 0x40049409
+
+# Jumlah thread default untuk transfer file (I/O-bound, jadi boleh lebih dari jumlah core)
+DEFAULT_MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Ukuran potongan per syscall saat menyalin lewat kernel (copy_file_range / sendfile)
+KERNEL_COPY_CHUNK = 64 * 1024 * 1024
+
+# Mode link yang didukung:
+# - 'auto'    : coba reflink, jika gagal salin lewat kernel (copy_file_range/sendfile)
+# - 'hardlink': hardlink jika satu filesystem, jika tidak sama seperti 'auto'.
+#               Hati-hati: hardlink berbagi inode dengan file sumber, jadi perubahan in-place
+#               pada input_data_sources/ juga mengubah isi data lake.
+# - 'copy'    : selalu salin lewat kernel
+LINK_MODES = ('auto', 'hardlink', 'copy')
+
+
+def _try_reflink(src, dst):
+    """Mencoba reflink (copy-on-write). Return True jika berhasil."""
+    if fcntl is None:
+        return False
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        return True
+    except OSError:
+        if os.path.exists(dst):
+            os.remove(dst)
+        return False
+
+
+def _kernel_copy(src, dst):
+    """Menyalin isi file tanpa melewati buffer userspace jika OS mendukung. Return nama metode."""
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        in_fd, out_fd = fsrc.fileno(), fdst.fileno()
+        size = os.fstat(in_fd).st_size
+        offset = 0
+
+        if hasattr(os, 'copy_file_range'):
+            try:
+                while offset < size:
+                    copied = os.copy_file_range(in_fd, out_fd, min(size - offset, KERNEL_COPY_CHUNK), offset, offset)
+                    if copied == 0:
+                        break
+                    offset += copied
+                if offset >= size:
+                    return 'copy_file_range'
+            except OSError:
+                pass  # Misal lintas filesystem pada kernel lama -> lanjut ke sendfile
+
+        if hasattr(os, 'sendfile'):
+            try:
+                os.lseek(out_fd, offset, os.SEEK_SET)
+                while offset < size:
+                    sent = os.sendfile(out_fd, in_fd, offset, min(size - offset, KERNEL_COPY_CHUNK))
+                    if sent == 0:
+                        break
+                    offset += sent
+                if offset >= size:
+                    return 'sendfile'
+            except OSError:
+                pass
+
+        # Fallback terakhir: salinan userspace biasa, lanjut dari posisi terakhir
+        fsrc.seek(offset)
+        fdst.seek(offset)
+        shutil.copyfileobj(fsrc, fdst, 1024 * 1024)
+        return 'userspace'
+
+
+def transfer_file(src, dst, link_mode='auto'):
+    """
+    Menyalin satu file ke dst secara atomik (tulis ke '<dst>.part' lalu os.replace).
+    Return (metode, jumlah_byte).
+    """
+    if link_mode not in LINK_MODES:
+        raise ValueError(f"Unknown link_mode '{link_mode}', expected one of {LINK_MODES}")
+
+    size = os.path.getsize(src)
+    tmp_dst = dst + '.part'
+    if os.path.exists(tmp_dst):
+        os.remove(tmp_dst)
+
+    try:
+        method = None
+        if link_mode == 'hardlink' and os.stat(src).st_dev == os.stat(os.path.dirname(dst)).st_dev:
+            try:
+                os.link(src, tmp_dst)
+                method = 'hardlink'
+            except OSError:
+                method = None
+        if method is None and link_mode in ('auto', 'hardlink') and _try_reflink(src, tmp_dst):
+            method = 'reflink'
+        if method is None:
+            method = _kernel_copy(src, tmp_dst)
+        if method != 'hardlink':
+            shutil.copystat(src, tmp_dst)  # Pertahankan mtime seperti shutil.copy2
+        os.replace(tmp_dst, dst)
+    except BaseException:
+        if os.path.exists(tmp_dst):
+            os.remove(tmp_dst)
+        raise
+    return method, size
+
+
+def transfer_files(jobs, max_workers=DEFAULT_MAX_WORKERS, link_mode='auto'):
+    """
+    Menyalin banyak file secara paralel dengan thread pool terbatas.
+    jobs: list of (src, dst). Folder tujuan harus sudah ada.
+    Return dict: succeeded (list of (src, dst, metode)), failed (list of (src, dst, error)),
+    bytes, seconds, bytes_per_second, methods (jumlah file per metode).
+    """
+    result = {'succeeded': [], 'failed': [], 'bytes': 0, 'seconds': 0.0, 'bytes_per_second': 0.0, 'methods': {}}
+    if not jobs:
+        return result
+
+    workers = max(1, min(max_workers, len(jobs)))
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(transfer_file, src, dst, link_mode): (src, dst) for src, dst in jobs}
+        for future in as_completed(futures):
+            src, dst = futures[future]
+            try:
+                method, size = future.result()
+                result['succeeded'].append((src, dst, method))
+                result['bytes'] += size
+                result['methods'][method] = result['methods'].get(method, 0) + 1
+            except Exception as e:
+                logging.error(f"Failed to transfer {src} to {dst}: {e}")
+                result['failed'].append((src, dst, e))
+
+    result['seconds'] = time.perf_counter() - started
+    if result['seconds'] > 0:
+        result['bytes_per_second'] = result['bytes'] / result['seconds']
+    logging.info(
+        f"Transferred {len(result['succeeded'])} file(s), {result['bytes'] / (1024 * 1024):.2f} MiB in "
+        f"{result['seconds']:.2f}s ({result['bytes_per_second'] / (1024 * 1024):.2f} MiB/s) "
+        f"using {workers} worker(s); methods: {result['methods']}; failed: {len(result['failed'])}."
+    )
+    return result
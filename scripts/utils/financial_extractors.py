@@ -0,0 +1,164 @@
+import re
+import numpy as np
+import pandas as pd
+
+# Ekstraktor data keuangan berbasis aturan. Pola dikompilasi sekali saat impor dan dijalankan
+# per halaman (bukan pada seluruh teks dokumen yang digabung), sehingga biaya ekstraksi linear
+# terhadap panjang dokumen dan berhenti lebih awal begitu semua field wajib ditemukan.
+
+# Kolom nominal yang diisi teks mentah oleh ekstraktor, lalu di-parse per jenis dokumen secara vektor
+AMOUNT_COLUMNS = ['extracted_revenue', 'extracted_net_profit']
+
+# Jarak maksimum (karakter) antara label dan nilainya, pengganti '.*?' tanpa batas
+FIELD_GAP_CHARS = 400
+# Ekor halaman sebelumnya yang ikut dipindai, agar label dan nilai yang terpisah batas halaman tetap cocok
+_PAGE_OVERLAP_CHARS = FIELD_GAP_CHARS + 100
+
+_MULTIPLIERS = {'triliun': 1_000_000_000_000, 'miliar': 1_000_000_000, 'juta': 1_000_000}
+
+_COMPETITOR_EVENTS = re.compile(
+    r"(?P<header>Competitor\s+(?P<company_name>[^\n]+?)\s+-\s+Year:\s+(?P<year>\d{4}))"
+    r"|Revenue:\s+IDR\s+(?P<revenue>[\d,]+)"
+    r"|Net\s+Income:\s+IDR\s+(?P<net_income>[\d,]+)",
+    re.IGNORECASE
+)
+
+_ADVENTUREWORKS_FIELDS = {
+    'report_year': re.compile(r'tahun fiskal (\d{4})', re.IGNORECASE),
+    'extracted_revenue': re.compile(
+        rf'pendapatan kotor.{{0,{FIELD_GAP_CHARS}}}? (IDR [\d.,]+ (?:Triliun|Miliar|Juta))', re.IGNORECASE | re.DOTALL
+    ),
+    'extracted_net_profit': re.compile(
+        rf'laba bersih.{{0,{FIELD_GAP_CHARS}}}? (IDR [\d.,]+ (?:Triliun|Miliar|Juta))', re.IGNORECASE | re.DOTALL
+    ),
+}
+
+
+def parse_indonesian_currency(value_str):
+    """Helper function untuk mengubah string '1.2 Triliun' menjadi angka."""
+    if not isinstance(value_str, str): return None
+    value_str = value_str.lower().replace('idr', '').strip()
+    num_part_match = re.search(r'([\d.,]+)', value_str)
+    if not num_part_match: return None
+    num_str = num_part_match.group(1).replace('.', '').replace(',', '.')
+    num = float(num_str)
+    if 'triliun' in value_str: num *= 1_000_000_000_000
+    elif 'miliar' in value_str: num *= 1_000_000_000
+    elif 'juta' in value_str: num *= 1_000_000
+    return int(num)
+
+
+def parse_indonesian_currency_series(values):
+    """
+    Versi vektor parse_indonesian_currency untuk satu Series: hasil sama per elemen, bertipe Int64.
+    Nilai bukan string dan teks tanpa angka yang valid menjadi <NA>.
+    """
+    values = pd.Series(values, dtype='object')
+    is_text = values.map(lambda value: isinstance(value, str))
+    text = values.where(is_text).astype('string').str.lower().str.replace('idr', '', regex=False).str.strip()
+    number = pd.to_numeric(
+        text.str.extract(r'([\d.,]+)', expand=False)
+        .str.replace('.', '', regex=False).str.replace(',', '.', regex=False),
+        errors='coerce'
+    ).astype('float64')
+    multiplier = np.select(
+        [text.str.contains(word, regex=False).fillna(False).to_numpy(bool) for word in _MULTIPLIERS],
+        list(_MULTIPLIERS.values()),
+        default=1
+    )
+    return pd.Series(np.trunc(number * multiplier), index=values.index).astype('Int64')
+
+
+def parse_grouped_amount_series(values):
+    """Nominal dengan pemisah ribuan koma ('533,187,140') menjadi Int64."""
+    values = pd.Series(values, dtype='object').astype('string').str.replace(',', '', regex=False)
+    return pd.to_numeric(values, errors='coerce').astype('Int64')
+
+
+def scan_fields(pages, patterns):
+    """
+    Mencari kemunculan pertama setiap pola (group 1) halaman demi halaman dan berhenti
+    begitu semua ditemukan. Return dict nama field -> teks (field yang tidak ditemukan tidak ada).
+    """
+    found, carry = {}, ''
+    for page in pages:
+        window = carry + page
+        for name, pattern in patterns.items():
+            if name not in found:
+                match = pattern.search(window)
+                if match:
+                    found[name] = match.group(1)
+        if len(found) == len(patterns):
+            break
+        carry = window[-_PAGE_OVERLAP_CHARS:]
+    return found
+
+
+def extract_competitor_statements(pages):
+    """
+    Laporan tahunan pesaing: satu record per blok 'Competitor X - Year: YYYY' yang diikuti
+    'Revenue: IDR ...' lalu 'Net Income: IDR ...'. Blok boleh terpotong batas halaman.
+    """
+    records, current = [], None
+    for page in pages:
+        for match in _COMPETITOR_EVENTS.finditer(page):
+            if match.group('header'):
+                name = match.group('company_name').strip()
+                current = {
+                    'company_name': name if 'competitor' in name.lower() else f"Competitor {name}",
+                    'report_year': int(match.group('year')),
+                }
+            elif current is None:
+                continue
+            elif match.group('revenue'):
+                current.setdefault('extracted_revenue', match.group('revenue'))
+            elif 'extracted_revenue' in current:
+                records.append({**current, 'report_type': 'Annual', 'extracted_net_profit': match.group('net_income')})
+                current = None
+    return records
+
+
+def extract_adventureworks_report(pages):
+    """Laporan tahunan AdventureWorks: satu record; field yang tidak ditemukan bernilai None."""
+    fields = scan_fields(pages, _ADVENTUREWORKS_FIELDS)
+    return [{
+        'company_name': 'AdventureWorks',
+        'report_year': int(fields['report_year']) if 'report_year' in fields else None,
+        'report_type': 'Annual',
+        'extracted_revenue': fields.get('extracted_revenue'),
+        'extracted_net_profit': fields.get('extracted_net_profit'),
+    }]
+
+
+# Registry ekstraktor per jenis dokumen: jenis -> (kata kunci nama file, fungsi ekstraksi, parser nominal).
+# Urutan menentukan prioritas pencocokan nama file; ekstraktor None = jenis dikenali tetapi tidak diekstrak.
+FINANCIAL_EXTRACTORS = {
+    'competitor': ('competitor', extract_competitor_statements, parse_grouped_amount_series),
+    'adventureworks': ('adventureworks', extract_adventureworks_report, parse_indonesian_currency_series),
+    'market_report': ('market_report', None, None),
+}
+
+
+def detect_document_type(filename):
+    """Jenis dokumen keuangan berdasarkan nama file, atau None jika tidak ada ekstraktor yang cocok."""
+    filename = filename.lower()
+    for document_type, (keyword, _, _) in FINANCIAL_EXTRACTORS.items():
+        if keyword in filename:
+            return document_type
+    return None
+
+
+def extract_records(document_type, pages):
+    """Menjalankan ekstraktor terdaftar untuk document_type; list record (nominal masih teks mentah)."""
+    extractor = FINANCIAL_EXTRACTORS[document_type][1]
+    return extractor(pages) if extractor else []
+
+
+def parse_record_amounts(df, type_column='document_type'):
+    """Mengubah kolom nominal teks menjadi Int64, dengan parser milik jenis dokumen masing-masing baris."""
+    parsed = {column: pd.Series(pd.NA, index=df.index, dtype='Int64') for column in AMOUNT_COLUMNS}
+    for document_type, index in df.groupby(type_column).groups.items():
+        parser = FINANCIAL_EXTRACTORS[document_type][2]
+        for column in AMOUNT_COLUMNS:
+            parsed[column].loc[index] = parser(df.loc[index, column])
+    return df.assign(**parsed)
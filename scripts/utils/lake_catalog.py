@@ -0,0 +1,158 @@
+import os
+import sqlite3
+import hashlib
+import logging
+from datetime import datetime
+
+from scripts.utils.lake_classification import classify_file
+from scripts.utils.lake_partitions import normalize_date, partition_date_of
+
+# Katalog metadata data lake: satu baris per objek di raw_data_lake/, disimpan sebagai SQLite
+# di dalam lake itu sendiri. Ditulis oleh ingest, dibaca oleh analisis (pengganti os.walk).
+CATALOG_FILENAME = '_catalog.sqlite'
+
+# Status pemrosesan objek
+STATUS_INGESTED = 'ingested'
+STATUS_ANALYZED = 'analyzed'
+STATUS_FAILED = 'failed'
+
+CATALOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS lake_objects (
+    path               TEXT PRIMARY KEY,   -- path relatif terhadap raw_data_lake/
+    file_type          TEXT NOT NULL,      -- csv / pdf / txt / others
+    category           TEXT,               -- sensors / social / financial (NULL jika tidak dikenali)
+    partition_date     TEXT,               -- YYYY-MM-DD, NULL untuk partisi default
+    sha256             TEXT NOT NULL,
+    size_bytes         INTEGER,
+    row_count          INTEGER,            -- jumlah baris data (CSV tanpa header, TXT per baris)
+    schema_fingerprint TEXT,               -- hash header CSV
+    status             TEXT NOT NULL DEFAULT 'ingested',
+    ingested_at        TEXT,
+    updated_at         TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_lake_objects_category_partition ON lake_objects (category, partition_date);
+CREATE INDEX IF NOT EXISTS idx_lake_objects_sha256 ON lake_objects (sha256);
+CREATE INDEX IF NOT EXISTS idx_lake_objects_status ON lake_objects (status);
+"""
+
+
+def connect_catalog(lake_dir):
+    """Membuka (dan membuat jika belum ada) katalog SQLite di lake_dir."""
+    os.makedirs(lake_dir, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(lake_dir, CATALOG_FILENAME))
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(CATALOG_SCHEMA)
+    return conn
+
+
+def catalog_exists(lake_dir):
+    return os.path.exists(os.path.join(lake_dir, CATALOG_FILENAME))
+
+
+def profile_object(full_path):
+    """Menghitung row_count dan schema_fingerprint untuk file teks/CSV. File biner: (None, None)."""
+    extension = os.path.splitext(full_path)[1].lower()
+    if extension not in ('.csv', '.txt'):
+        return None, None
+    with open(full_path, 'r', encoding='utf-8', errors='replace') as f:
+        header = f.readline() if extension == '.csv' else None
+        row_count = sum(1 for line in f if line.strip())
+    if extension == '.txt':
+        return row_count, None
+    columns = [column.strip().lower() for column in header.strip().split(',')] if header else []
+    fingerprint = hashlib.sha1(','.join(columns).encode('utf-8')).hexdigest()[:16] if columns else None
+    return row_count, fingerprint
+
+
+def sync_catalog(conn, lake_dir, lake_objects):
+    """
+    Menyelaraskan katalog dengan daftar objek lake saat ini.
+    lake_objects: dict path relatif -> sha256 (misal dari manifest ingest).
+    Baris untuk objek yang sudah tidak ada dihapus; objek baru/berubah diprofil dan di-upsert.
+    Objek yang isinya berubah kembali berstatus 'ingested'. Return jumlah baris yang di-upsert.
+    """
+    existing = {row['path']: row['sha256'] for row in conn.execute("SELECT path, sha256 FROM lake_objects")}
+    stale = [(path,) for path in existing if path not in lake_objects]
+    now = datetime.now().isoformat(timespec='seconds')
+
+    rows = []
+    for lake_rel_path, sha256 in sorted(lake_objects.items()):
+        if existing.get(lake_rel_path) == sha256:
+            continue
+        full_path = os.path.join(lake_dir, lake_rel_path)
+        try:
+            size_bytes = os.path.getsize(full_path)
+            row_count, fingerprint = profile_object(full_path)
+        except OSError as e:
+            logging.error(f"Catalog: could not profile {lake_rel_path}: {e}")
+            continue
+        rows.append((
+            lake_rel_path, lake_rel_path.split('/')[0], classify_file(lake_rel_path), partition_date_of(lake_rel_path),
+            sha256, size_bytes, row_count, fingerprint, STATUS_INGESTED, now, now,
+        ))
+
+    with conn:
+        conn.executemany("DELETE FROM lake_objects WHERE path = ?", stale)
+        conn.executemany("""
+            INSERT INTO lake_objects (path, file_type, category, partition_date, sha256, size_bytes,
+                                      row_count, schema_fingerprint, status, ingested_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (path) DO UPDATE SET
+                file_type = excluded.file_type, category = excluded.category,
+                partition_date = excluded.partition_date, sha256 = excluded.sha256,
+                size_bytes = excluded.size_bytes, row_count = excluded.row_count,
+                schema_fingerprint = excluded.schema_fingerprint, status = excluded.status,
+                ingested_at = excluded.ingested_at, updated_at = excluded.updated_at
+        """, rows)
+    logging.info(f"Catalog: {len(rows)} object(s) upserted, {len(stale)} stale object(s) removed.")
+    return len(rows)
+
+
+def query_objects(conn, category=None, start_date=None, end_date=None, include_undated=None, status=None):
+    """
+    Lookup objek lake lewat indeks (category, partition_date), tanpa menjelajah filesystem.
+    Semantik rentang tanggal sama dengan lake_partitions.list_partition_files.
+    Return list of sqlite3.Row.
+    """
+    if include_undated is None:
+        include_undated = start_date is None and end_date is None
+    clauses, params = [], []
+    if category is not None:
+        clauses.append("category = ?")
+        params.append(category)
+    date_clauses = []
+    if start_date is not None:
+        date_clauses.append("partition_date >= ?")
+        params.append(normalize_date(start_date))
+    if end_date is not None:
+        date_clauses.append("partition_date <= ?")
+        params.append(normalize_date(end_date))
+    if date_clauses:
+        dated = " AND ".join(date_clauses)
+        clauses.append(f"(({dated}) OR partition_date IS NULL)" if include_undated else f"({dated})")
+    elif not include_undated:
+        clauses.append("partition_date IS NOT NULL")
+    if status is not None:
+        clauses.append("status = ?")
+        params.append(status)
+    query = "SELECT * FROM lake_objects"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += " ORDER BY path"
+    return conn.execute(query, params).fetchall()
+
+
+def set_status(conn, paths, status):
+    """Memperbarui status pemrosesan untuk sekumpulan path relatif."""
+    now = datetime.now().isoformat(timespec='seconds')
+    with conn:
+        conn.executemany(
+            "UPDATE lake_objects SET status = ?, updated_at = ? WHERE path = ?",
+            [(status, now, path) for path in paths]
+        )
+
+
+def object_hashes(conn):
+    """dict path relatif -> sha256 untuk semua objek di katalog."""
+    return {row['path']: row['sha256'] for row in conn.execute("SELECT path, sha256 FROM lake_objects")}
@@ -0,0 +1,17 @@
+import os
+
+# Peta kata kunci nama file -> kategori data lake (urutan menentukan prioritas)
+KEYWORD_MAP = {
+    'sensors': ['sensor', 'gudang', 'pendingin', 'warehouse', 'temp'],
+    'social': ['tweet', 'social_media', 'socmed'],
+    'financial': ['financial', 'laporan', 'report', 'keuangan', 'market', 'competitor']
+}
+
+
+def classify_file(file_path):
+    """Mengembalikan kategori file berdasarkan kata kunci di namanya, atau None jika tidak cocok."""
+    file_lower = os.path.basename(file_path).lower()
+    for category, keywords in KEYWORD_MAP.items():
+        if any(keyword in file_lower for keyword in keywords):
+            return category
+    return None
@@ -0,0 +1,94 @@
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime
+
+# Nama file manifest yang disimpan di dalam raw_data_lake/
+# Diawali '_' supaya tidak ikut diklasifikasikan sebagai data oleh tahap analisis.
+MANIFEST_FILENAME = '_ingest_manifest.json'
+MANIFEST_VERSION = 1
+
+# Ukuran blok baca saat menghitung hash (1 MiB)
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def compute_file_hash(file_path, chunk_size=HASH_CHUNK_SIZE):
+    """Menghitung SHA-256 dari isi file secara bertahap (tidak memuat seluruh file ke memori)."""
+    hasher = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def empty_manifest():
+    """
+    Struktur manifest kosong.
+    - 'sources': path relatif file sumber -> {size, mtime, sha256, lake_path, ingested_at}
+    - 'objects': sha256 isi file -> path relatif objek di data lake (untuk deduplikasi)
+    """
+    return {'version': MANIFEST_VERSION, 'sources': {}, 'objects': {}}
+
+
+def load_manifest(lake_dir):
+    """Membaca manifest dari lake_dir. Jika tidak ada atau rusak, kembalikan manifest kosong."""
+    manifest_path = os.path.join(lake_dir, MANIFEST_FILENAME)
+    if not os.path.exists(manifest_path):
+        return empty_manifest()
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != MANIFEST_VERSION:
+            logging.warning(f"Ingest manifest version mismatch ({manifest.get('version')}), starting with an empty manifest.")
+            return empty_manifest()
+        manifest.setdefault('sources', {})
+        manifest.setdefault('objects', {})
+        return manifest
+    except (OSError, ValueError) as e:
+        logging.warning(f"Could not read ingest manifest {manifest_path}, starting with an empty manifest: {e}")
+        return empty_manifest()
+
+
+def save_manifest(manifest, lake_dir):
+    """Menyimpan manifest secara atomik (tulis ke file sementara lalu os.replace)."""
+    manifest_path = os.path.join(lake_dir, MANIFEST_FILENAME)
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+def is_source_unchanged(entry, stat_result):
+    """File sumber dianggap tidak berubah jika ukuran dan mtime sama dengan yang tercatat (tanpa hashing ulang)."""
+    return (
+        entry is not None
+        and entry.get('size') == stat_result.st_size
+        and entry.get('mtime') == stat_result.st_mtime
+    )
+
+
+def lake_path_shared(manifest, lake_rel_path, exclude_source=None):
+    """True jika objek data lake dirujuk oleh file sumber lain (hasil deduplikasi)."""
+    return any(
+        entry.get('lake_path') == lake_rel_path
+        for src, entry in manifest['sources'].items()
+        if src != exclude_source
+    )
+
+
+def record_source(manifest, source_rel_path, stat_result, sha256, lake_rel_path):
+    """Mencatat lineage satu file sumber -> objek data lake ke dalam manifest."""
+    previous = manifest['sources'].get(source_rel_path)
+    if previous and previous.get('sha256') != sha256 and previous.get('lake_path') == lake_rel_path:
+        # Objek lama ditimpa di tempat, jadi isi lama tidak lagi tersedia untuk deduplikasi
+        if manifest['objects'].get(previous.get('sha256')) == lake_rel_path:
+            manifest['objects'].pop(previous.get('sha256'))
+    manifest['sources'][source_rel_path] = {
+        'size': stat_result.st_size,
+        'mtime': stat_result.st_mtime,
+        'sha256': sha256,
+        'lake_path': lake_rel_path,
+        'ingested_at': datetime.now().isoformat(timespec='seconds'),
+    }
+    manifest['objects'][sha256] = lake_rel_path
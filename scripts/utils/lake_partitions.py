@@ -0,0 +1,115 @@
+import os
+import re
+from datetime import date, datetime
+
+# Layout partisi ala Hive: raw_data_lake/<tipe>/dt=YYYY-MM-DD/<file>
+PARTITION_KEY = 'dt'
+# Partisi untuk file yang tanggalnya tidak bisa disimpulkan (konvensi Hive)
+DEFAULT_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+
+# Tanggal di nama file: 20230101, 2023-01-01, atau 2023_01_05 (untuk rentang seperti
+# 2023_01_05_to_06 yang diambil adalah tanggal awal)
+FILENAME_DATE_PATTERN = re.compile(r'(?<!\d)(\d{4})[-_]?(\d{2})[-_]?(\d{2})(?!\d)')
+# Folder harian di input_data_sources/, misal input_data_sources/2023-01-01/
+FOLDER_DATE_PATTERN = re.compile(r'^(\d{4})-(\d{2})-(\d{2})$')
+
+
+def _valid_date(year, month, day):
+    try:
+        return date(int(year), int(month), int(day)).isoformat()
+    except ValueError:
+        return None
+
+
+def infer_partition_date(source_rel_path):
+    """
+    Menyimpulkan tanggal partisi ('YYYY-MM-DD') dari path relatif file sumber.
+    Tanggal di nama file (tanggal data) didahulukan, lalu folder tanggal terdekat
+    (tanggal dump). Return None jika tidak ada tanggal yang valid.
+    """
+    parts = source_rel_path.replace('\\', '/').split('/')
+    for match in FILENAME_DATE_PATTERN.finditer(os.path.splitext(parts[-1])[0]):
+        inferred = _valid_date(*match.groups())
+        if inferred:
+            return inferred
+    for folder in reversed(parts[:-1]):
+        match = FOLDER_DATE_PATTERN.match(folder)
+        if match:
+            inferred = _valid_date(*match.groups())
+            if inferred:
+                return inferred
+    return None
+
+
+def partition_dir_name(partition_date):
+    """Nama folder partisi untuk sebuah tanggal (atau partisi default jika None)."""
+    return f"{PARTITION_KEY}={partition_date or DEFAULT_PARTITION}"
+
+
+def parse_partition_dir(dir_name):
+    """Kebalikan dari partition_dir_name: return tanggal, DEFAULT_PARTITION, atau None jika bukan folder partisi."""
+    prefix = f"{PARTITION_KEY}="
+    if not dir_name.startswith(prefix):
+        return None
+    return dir_name[len(prefix):]
+
+
+def partition_date_of(lake_rel_path):
+    """Tanggal partisi ('YYYY-MM-DD') dari path relatif objek lake, atau None untuk partisi default/tanpa partisi."""
+    parts = lake_rel_path.split('/')
+    partition = parse_partition_dir(parts[-2]) if len(parts) >= 2 else None
+    return None if partition in (None, DEFAULT_PARTITION) else partition
+
+
+def normalize_date(value):
+    """Menerima str/date/datetime/Timestamp dan mengembalikan 'YYYY-MM-DD' (atau None)."""
+    if value is None:
+        return None
+    if isinstance(value, (date, datetime)) or hasattr(value, 'isoformat'):
+        return value.isoformat()[:10]
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').date().isoformat()
+
+
+def partition_in_range(partition_date, start_date=None, end_date=None, include_undated=None):
+    """True jika partisi lolos filter rentang tanggal (start/end inklusif)."""
+    if include_undated is None:
+        include_undated = start_date is None and end_date is None
+    if partition_date in (None, DEFAULT_PARTITION):
+        return include_undated
+    start_date, end_date = normalize_date(start_date), normalize_date(end_date)
+    if start_date and partition_date < start_date:
+        return False
+    if end_date and partition_date > end_date:
+        return False
+    return True
+
+
+def list_partition_files(lake_dir, file_types=None, start_date=None, end_date=None, include_undated=None):
+    """
+    Mendaftar file di data lake dengan partition pruning: hanya folder dt=... yang masuk
+    rentang [start_date, end_date] yang dibuka isinya. File tanpa tanggal (partisi default)
+    ikut jika tidak ada filter tanggal, atau jika include_undated=True.
+    Return list of (full_path, partition_date).
+    """
+    results = []
+    if not os.path.isdir(lake_dir):
+        return results
+
+    for file_type in sorted(os.listdir(lake_dir)):
+        type_dir = os.path.join(lake_dir, file_type)
+        if file_type.startswith('_') or not os.path.isdir(type_dir):
+            continue
+        if file_types is not None and file_type not in file_types:
+            continue
+        for partition in sorted(os.listdir(type_dir)):
+            partition_date = parse_partition_dir(partition)
+            partition_dir = os.path.join(type_dir, partition)
+            if partition_date is None or not os.path.isdir(partition_dir):
+                continue  # Bukan folder partisi (misal file dari layout lama yang datar)
+            if not partition_in_range(partition_date, start_date, end_date, include_undated):
+                continue
+            for filename in sorted(os.listdir(partition_dir)):
+                if filename.startswith('_') or filename.endswith('.part'):
+                    continue
+                results.append((os.path.join(partition_dir, filename), partition_date))
+    return results
@@ -0,0 +1,205 @@
+import os
+import re
+import sqlite3
+import logging
+from datetime import datetime
+
+from scripts.utils.lake_partitions import normalize_date, partition_date_of
+
+# Indeks full-text (SQLite FTS5) atas teks halaman dokumen dan tweet individual, disimpan di
+# samping katalog lake. Diperbarui oleh analisis per objek lake (berdasarkan sha256), dibaca oleh API.
+INDEX_FILENAME = '_search_index.sqlite'
+
+KIND_PAGE = 'page'
+KIND_TWEET = 'tweet'
+
+# Prefix tanggal tweet pada file .txt: "YYYY-MM-DD HH:MM:SS - "
+TWEET_DATE_PREFIX = re.compile(r'^\s*(\d{4}-\d{2}-\d{2})(?:[ T]\d{2}:\d{2}(?::\d{2})?)?\s+-\s+')
+
+# Panjang cuplikan hasil pencarian (jumlah token di sekitar kata yang cocok)
+SNIPPET_TOKENS = 16
+
+INDEX_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS search_entries USING fts5(
+    text,
+    lake_path UNINDEXED,    -- path relatif terhadap raw_data_lake/
+    kind UNINDEXED,         -- 'page' (halaman PDF/DOCX/TXT) atau 'tweet'
+    position UNINDEXED,     -- nomor halaman (mulai 1) atau urutan tweet dalam file (mulai 1)
+    entry_date UNINDEXED,   -- YYYY-MM-DD: tanggal tweet, atau tanggal partisi objek; NULL jika tidak diketahui
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+-- Peta rowid FTS5 -> objek lake: kolom UNINDEXED FTS5 tidak bisa dicari lewat indeks, jadi entri
+-- satu objek dihapus berdasarkan rowid yang dicatat di sini, bukan dengan memindai search_entries
+CREATE TABLE IF NOT EXISTS search_entry_rowids (
+    entry_rowid INTEGER PRIMARY KEY,
+    lake_path   TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS search_entry_rowids_lake_path ON search_entry_rowids (lake_path);
+CREATE TABLE IF NOT EXISTS indexed_objects (
+    lake_path   TEXT PRIMARY KEY,
+    sha256      TEXT,
+    entry_count INTEGER NOT NULL,
+    indexed_at  TEXT NOT NULL
+);
+"""
+
+
+def index_exists(lake_dir):
+    return os.path.exists(os.path.join(lake_dir, INDEX_FILENAME))
+
+
+def connect_index(lake_dir):
+    """Membuka (dan membuat jika belum ada) indeks pencarian di lake_dir."""
+    os.makedirs(lake_dir, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(lake_dir, INDEX_FILENAME))
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(INDEX_SCHEMA)
+    _backfill_rowids(conn)
+    return conn
+
+
+def _backfill_rowids(conn):
+    """Mengisi peta rowid sekali untuk indeks lama yang dibuat sebelum search_entry_rowids ada."""
+    if conn.execute("SELECT 1 FROM search_entry_rowids LIMIT 1").fetchone():
+        return
+    if not conn.execute("SELECT 1 FROM search_entries LIMIT 1").fetchone():
+        return
+    with conn:
+        conn.execute("INSERT INTO search_entry_rowids (entry_rowid, lake_path) SELECT rowid, lake_path FROM search_entries")
+
+
+def indexed_hashes(conn):
+    """dict lake_path -> sha256 untuk objek yang sudah diindeks."""
+    return {row['lake_path']: row['sha256'] for row in conn.execute("SELECT lake_path, sha256 FROM indexed_objects")}
+
+
+def page_entries(lake_path, pages):
+    """Entri indeks untuk halaman dokumen; tanggal diambil dari partisi objek."""
+    entry_date = partition_date_of(lake_path)
+    return [(text, KIND_PAGE, page_no, entry_date) for page_no, text in enumerate(pages, start=1) if text.strip()]
+
+
+def tweet_entries(lake_path, tweets):
+    """Entri indeks untuk tweet; tanggal dari prefix tweet jika ada, selain itu dari partisi objek."""
+    partition_date = partition_date_of(lake_path)
+    entries = []
+    for position, tweet in enumerate(tweets, start=1):
+        tweet = str(tweet)
+        match = TWEET_DATE_PREFIX.match(tweet)
+        text = tweet[match.end():] if match else tweet
+        if text.strip():
+            entries.append((text.strip(), KIND_TWEET, position, match.group(1) if match else partition_date))
+    return entries
+
+
+def _delete_object_entries(conn, lake_path):
+    """Menghapus entri FTS5 satu objek lewat peta rowid (di transaksi pemanggil)."""
+    conn.execute("""
+        DELETE FROM search_entries
+        WHERE rowid IN (SELECT entry_rowid FROM search_entry_rowids WHERE lake_path = ?)
+    """, (lake_path,))
+    conn.execute("DELETE FROM search_entry_rowids WHERE lake_path = ?", (lake_path,))
+
+
+def replace_object_entries(conn, lake_path, sha256, entries):
+    """Mengganti seluruh entri milik satu objek lake. entries: list of (text, kind, position, entry_date)."""
+    with conn:
+        _delete_object_entries(conn, lake_path)
+        # rowid ditentukan sendiri agar bisa dicatat di peta rowid tanpa membaca balik search_entries
+        next_rowid = conn.execute("SELECT COALESCE(MAX(entry_rowid), 0) + 1 FROM search_entry_rowids").fetchone()[0]
+        rows = [
+            (rowid, text, lake_path, kind, position, entry_date)
+            for rowid, (text, kind, position, entry_date) in enumerate(entries, start=next_rowid)
+        ]
+        conn.executemany(
+            "INSERT INTO search_entries (rowid, text, lake_path, kind, position, entry_date) VALUES (?, ?, ?, ?, ?, ?)",
+            rows
+        )
+        conn.executemany("INSERT INTO search_entry_rowids (entry_rowid, lake_path) VALUES (?, ?)",
+                         [(row[0], lake_path) for row in rows])
+        conn.execute("""
+            INSERT INTO indexed_objects (lake_path, sha256, entry_count, indexed_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT (lake_path) DO UPDATE SET
+                sha256 = excluded.sha256, entry_count = excluded.entry_count, indexed_at = excluded.indexed_at
+        """, (lake_path, sha256, len(entries), datetime.now().isoformat(timespec='seconds')))
+
+
+def remove_objects(conn, lake_paths):
+    """Menghapus entri objek yang sudah tidak ada di lake."""
+    with conn:
+        for lake_path in lake_paths:
+            _delete_object_entries(conn, lake_path)
+            conn.execute("DELETE FROM indexed_objects WHERE lake_path = ?", (lake_path,))
+
+
+def _quote(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+def keyword_query(keywords, match_all=True):
+    """
+    Ekspresi MATCH FTS5 untuk daftar kata kunci (atau satu string dipisah spasi).
+    Setiap kata dikutip sehingga karakter khusus FTS5 tidak ditafsirkan sebagai operator.
+    """
+    if isinstance(keywords, str):
+        keywords = keywords.split()
+    terms = [_quote(keyword) for keyword in keywords if keyword.strip()]
+    return (' AND ' if match_all else ' OR ').join(terms)
+
+
+def phrase_query(phrase):
+    """Ekspresi MATCH FTS5 untuk frasa persis (urutan kata harus sama)."""
+    return _quote(' '.join(phrase.split()))
+
+
+def search(conn, match_expression, kind=None, start_date=None, end_date=None, limit=50):
+    """
+    Menjalankan pencarian full-text. Hasil diurutkan berdasarkan relevansi (bm25).
+    Filter opsional: kind ('page'/'tweet') dan rentang entry_date (inklusif).
+    Return list of sqlite3.Row: lake_path, kind, position, entry_date, snippet, score.
+    """
+    if not match_expression:
+        return []
+    clauses, params = ["search_entries MATCH ?"], [match_expression]
+    if kind is not None:
+        clauses.append("kind = ?")
+        params.append(kind)
+    if start_date is not None:
+        clauses.append("entry_date >= ?")
+        params.append(normalize_date(start_date))
+    if end_date is not None:
+        clauses.append("entry_date <= ?")
+        params.append(normalize_date(end_date))
+    params.append(limit)
+    return conn.execute(f"""
+        SELECT lake_path, kind, position, entry_date,
+               snippet(search_entries, 0, '[', ']', '...', {SNIPPET_TOKENS}) AS snippet,
+               bm25(search_entries) AS score
+        FROM search_entries
+        WHERE {' AND '.join(clauses)}
+        ORDER BY rank
+        LIMIT ?
+    """, params).fetchall()
+
+
+def update_index(conn, object_hashes, load_entries, detect_removed=True):
+    """
+    Menyelaraskan indeks dengan objek lake saat ini.
+    object_hashes: dict lake_path -> sha256 (None = selalu diindeks ulang).
+    load_entries(lake_paths): dict lake_path -> list entri, hanya dipanggil untuk objek baru/berubah;
+    objek yang tidak ada di hasilnya (gagal dibaca) dilewati dan dicoba lagi pada run berikutnya.
+    detect_removed: hapus objek terindeks yang tidak ada di object_hashes (hanya jika mencakup seluruh lake).
+    Return (jumlah objek diindeks, jumlah objek dihapus).
+    """
+    indexed = indexed_hashes(conn)
+    changed = [path for path, sha256 in object_hashes.items() if sha256 is None or indexed.get(path) != sha256]
+    removed = [path for path in indexed if path not in object_hashes] if detect_removed else []
+    entries_by_path = load_entries(changed) if changed else {}
+    for lake_path in changed:
+        if lake_path in entries_by_path:
+            replace_object_entries(conn, lake_path, object_hashes[lake_path], entries_by_path[lake_path])
+    remove_objects(conn, removed)
+    logging.info(f"Search index: {len(entries_by_path)} object(s) (re)indexed, {len(removed)} removed, "
+                 f"{len(object_hashes) - len(changed)} unchanged.")
+    return len(entries_by_path), len(removed)
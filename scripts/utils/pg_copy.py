@@ -0,0 +1,58 @@
+import io
+import csv
+
+# Bulk load baris ke PostgreSQL lewat COPY ... FROM STDIN (format CSV dibingkai di buffer memori).
+# NULL ditulis sebagai \N agar string kosong tetap string kosong (bukan NULL) di tabel tujuan.
+COPY_NULL = r'\N'
+
+
+def _csv_value(value):
+    if value is None:
+        return COPY_NULL
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return '\\x' + bytes(value).hex()  # format hex bytea
+    return value
+
+
+def rows_to_csv(rows, positions=None):
+    """
+    Menyusun batch baris (tuple/Row) menjadi buffer CSV siap COPY.
+    positions: indeks kolom yang diambil dari setiap baris (None = semua kolom, urutan asli).
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    if positions is None:
+        writer.writerows([_csv_value(value) for value in row] for row in rows)
+    else:
+        writer.writerows([_csv_value(row[i]) for i in positions] for row in rows)
+    buffer.seek(0)
+    return buffer
+
+
+def copy_csv(conn, table_name, columns, buffer):
+    """
+    Menjalankan COPY table_name (columns) FROM STDIN untuk buffer CSV dari rows_to_csv,
+    memakai koneksi DBAPI milik conn (SQLAlchemy Connection), di dalam transaksi conn.
+    """
+    quote = conn.dialect.identifier_preparer.quote
+    statement = (
+        f"COPY {quote(table_name)} ({', '.join(quote(column) for column in columns)}) "
+        f"FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')"
+    )
+    cursor = conn.connection.cursor()
+    try:
+        if hasattr(cursor, 'copy_expert'):  # psycopg2
+            cursor.copy_expert(statement, buffer)
+        else:  # psycopg 3
+            with cursor.copy(statement) as copy:
+                copy.write(buffer.getvalue())
+    finally:
+        cursor.close()
+
+
+def copy_rows(conn, table_name, columns, rows, positions=None):
+    """rows_to_csv + copy_csv untuk satu batch. Return jumlah baris yang dimuat."""
+    rows = list(rows)
+    if rows:
+        copy_csv(conn, table_name, columns, rows_to_csv(rows, positions))
+    return len(rows)
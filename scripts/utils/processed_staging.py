@@ -0,0 +1,141 @@
+import os
+import logging
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Serah-terima hasil analyze_datalake -> load_datalake_to_dw di processed_staging/: file Arrow IPC
+# (tanpa kompresi) dengan skema eksplisit per dataset. Loader membacanya lewat memory map, sehingga
+# tidak ada parsing teks / tebak tipe ulang; CSV tetap ditulis di sampingnya untuk dibaca manusia.
+ARROW_EXTENSION = '.arrow'
+CSV_EXTENSION = '.csv'
+
+SENSOR_SUMMARY = 'warehouse_daily_sensor_summary'
+SOCIAL_SUMMARY = 'social_media_analysis_summary'
+FINANCIAL_SUMMARY = 'financial_reports_summary'
+
+SUMMARY_SCHEMAS = {
+    SENSOR_SUMMARY: pa.schema([
+        ('date', pa.date32()),
+        ('zone_id', pa.string()),
+        ('avg_temperature_c', pa.float64()),
+        ('avg_humidity_percent', pa.float64()),
+    ]),
+    SOCIAL_SUMMARY: pa.schema([
+        ('tweet_text', pa.string()),
+        ('sentiment_score', pa.float64()),
+        ('sentiment_category', pa.string()),
+        ('top_words_json', pa.string()),   # "[('kata', n), ...]", lihat batch_sentiment.parse_top_words
+        ('date_processed', pa.date32()),
+        ('original_filename', pa.string()),
+        ('source_file', pa.string()),
+    ]),
+    FINANCIAL_SUMMARY: pa.schema([
+        ('original_filename', pa.string()),
+        ('company_name', pa.string()),
+        ('report_year', pa.int32()),
+        ('report_type', pa.string()),
+        ('extracted_revenue', pa.int64()),
+        ('extracted_net_profit', pa.int64()),
+        ('source_file', pa.string()),
+    ]),
+}
+
+# Kolom integer Arrow dibaca sebagai Int64 pandas (nullable), bukan float
+_PANDAS_TYPES = {pa.int32(): pd.Int64Dtype(), pa.int64(): pd.Int64Dtype()}
+
+
+def summary_path(processed_dir, dataset, extension=ARROW_EXTENSION):
+    return os.path.join(processed_dir, dataset + extension)
+
+
+def _conform(df, schema):
+    """DataFrame -> pyarrow.Table tepat sesuai schema: kolom diurutkan, yang tidak ada diisi NULL, tipe di-cast."""
+    columns = {}
+    for field in schema:
+        values = df[field.name] if field.name in df.columns else pd.Series(None, index=df.index, dtype=object)
+        if pa.types.is_date(field.type):
+            values = pd.to_datetime(values, errors='coerce').dt.date
+            values = values.where(values.notna(), None)
+        elif pa.types.is_integer(field.type) or pa.types.is_floating(field.type):
+            values = pd.to_numeric(values, errors='coerce')
+            if pa.types.is_integer(field.type):
+                values = values.astype('Int64')
+        elif pa.types.is_string(field.type):
+            values = values.where(values.isna(), values.astype(str)).astype(object)
+        columns[field.name] = values
+    return pa.Table.from_pandas(pd.DataFrame(columns, index=df.index), schema=schema, preserve_index=False)
+
+
+def _write_table(table, dataset, processed_dir, write_csv):
+    path = summary_path(processed_dir, dataset)
+    tmp_path = os.path.join(processed_dir, '.' + os.path.basename(path) + '.tmp')
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+    if write_csv:
+        table.to_pandas().to_csv(summary_path(processed_dir, dataset, CSV_EXTENSION), index=False)
+    return path
+
+
+def write_summary(df, dataset, processed_dir, write_csv=True):
+    """
+    Menulis ringkasan dataset ke <processed_dir>/<dataset>.arrow (skema SUMMARY_SCHEMAS[dataset]) secara
+    atomik, dan (write_csv=True) salinan CSV-nya. Return path file Arrow.
+    """
+    return _write_table(_conform(df, SUMMARY_SCHEMAS[dataset]), dataset, processed_dir, write_csv)
+
+
+def merge_summary(df, dataset, processed_dir, key_column, replaced_keys, write_csv=True):
+    """
+    Memperbarui sebagian ringkasan (mode inkremental): baris lama dengan key_column di replaced_keys
+    dibuang lalu df ditambahkan. Baris lama disalin sebagai tabel Arrow tanpa dihitung ulang atau
+    dikonversi ke pandas; ringkasan yang belum ada ditulis dari df saja. Return path file Arrow.
+    """
+    schema = SUMMARY_SCHEMAS[dataset]
+    table = _conform(df, schema)
+    # Tanpa memory map: file lama ditimpa (os.replace) selagi tabelnya masih dipakai
+    existing = read_summary_table(dataset, processed_dir, memory_map=False)
+    if existing is not None:
+        replaced = pc.is_in(existing.column(key_column), pa.array(list(replaced_keys), schema.field(key_column).type))
+        table = pa.concat_tables([existing.filter(pc.invert(replaced)), table])
+    return _write_table(table, dataset, processed_dir, write_csv)
+
+
+def summary_exists(processed_dir, dataset):
+    return any(os.path.exists(summary_path(processed_dir, dataset, extension))
+               for extension in (ARROW_EXTENSION, CSV_EXTENSION))
+
+
+def read_summary_table(dataset, processed_dir, memory_map=True):
+    """
+    pyarrow.Table ringkasan dataset. File Arrow dibaca lewat memory map (zero-copy; memory_map=False
+    menyalinnya ke memori); jika belum ada (processed_staging dari versi lama), CSV dibaca lalu di-cast
+    ke skema yang sama. None jika keduanya tidak ada.
+    """
+    schema = SUMMARY_SCHEMAS[dataset]
+    path = summary_path(processed_dir, dataset)
+    if os.path.exists(path):
+        if memory_map:
+            table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+        else:
+            with pa.OSFile(path, 'rb') as source:
+                table = pa.ipc.open_file(source).read_all()
+        if not table.schema.equals(schema):
+            logging.warning(f"{os.path.basename(path)}: schema differs from the expected {dataset} schema; casting.")
+            table = _conform(table.to_pandas(), schema)
+        return table
+    csv_path = summary_path(processed_dir, dataset, CSV_EXTENSION)
+    if os.path.exists(csv_path):
+        logging.info(f"{os.path.basename(path)} not found, reading {os.path.basename(csv_path)} instead.")
+        return _conform(pd.read_csv(csv_path, dtype=str, keep_default_na=False, na_values=['']), schema)
+    return None
+
+
+def read_summary(dataset, processed_dir):
+    """Seperti read_summary_table, sebagai DataFrame: tanggal datetime64, integer Int64. None jika tidak ada."""
+    table = read_summary_table(dataset, processed_dir)
+    if table is None:
+        return None
+    return table.to_pandas(date_as_object=False, split_blocks=True, types_mapper=_PANDAS_TYPES.get)
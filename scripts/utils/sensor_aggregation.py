@@ -0,0 +1,195 @@
+import os
+import time
+import logging
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from scripts.utils.curated_zone import (
+    curated_sensor_partitions, curated_sensor_sources, iter_sensor_csv, iter_sensor_curated
+)
+
+# Agregasi sensor berbasis partial: setiap file diringkas menjadi sum/count per
+# (source_file, date, zone_id). Rata-rata harian = total sum / total count, sehingga partial
+# dari potongan, file, maupun proses yang berbeda bisa digabung tanpa mengubah hasil.
+SENSOR_PARTIAL_KEYS = ['source_file', 'date', 'zone_id']
+SENSOR_PARTIAL_VALUES = ['temperature_sum', 'temperature_count', 'humidity_sum', 'humidity_count']
+SENSOR_PARTIAL_COLUMNS = SENSOR_PARTIAL_KEYS + SENSOR_PARTIAL_VALUES
+
+# Jumlah baris per potongan saat membaca data sensor (menentukan memori puncak agregasi)
+SENSOR_CHUNK_ROWS = 100_000
+
+# Shard per worker pada mode multiproses; lebih dari satu agar beban tetap rata
+# jika ukuran file sangat bervariasi.
+SHARDS_PER_WORKER = 2
+# Di bawah total ukuran ini agregasi tetap satu proses: biaya menyalakan pool lebih besar dari parsing-nya
+PARALLEL_MIN_BYTES = 64 * 1024 * 1024
+
+
+def _lake_rel_path(file_path, lake_dir):
+    return os.path.relpath(file_path, lake_dir).replace(os.sep, '/')
+
+
+def iter_sensor_frames(file_list, lake_dir, curated_dir=None, chunk_size=None):
+    """
+    Menghasilkan potongan data sensor untuk file_list, masing-masing maks. chunk_size baris.
+    File yang tercatat di curated zone (source_file) dibaca dari Parquet per batch (hanya kolom yang
+    dibutuhkan dan hanya baris ber-zone_id); sisanya dibaca dari CSV mentah per chunk.
+    Curated zone dibaca per partisi tanggal: batch satu partisi dikumpulkan dulu baru diteruskan, sehingga
+    file Parquet yang rusak (error baru muncul saat batch didekode) dilewati tanpa ada barisnya yang sudah
+    terkirim, dan baris tanggal itu diambil dari CSV mentah file-file yang tercakup.
+    Setiap potongan membawa kolom source_file (path relatif objek terhadap lake_dir).
+    """
+    chunk_size = chunk_size or SENSOR_CHUNK_ROWS
+    rel_paths = {_lake_rel_path(f, lake_dir): f for f in file_list}
+    covered, partitions, failed_dates = set(), [], set()
+    if curated_dir:
+        try:
+            # Cakupan dari daftar source_file di curated zone (scan satu kolom), bukan dari baris yang
+            # dihasilkan: file tanpa baris ber-zone_id tetap tercakup dan tidak di-parse ulang dari CSV
+            covered = curated_sensor_sources(curated_dir) & rel_paths.keys()
+            partitions = curated_sensor_partitions(curated_dir) if covered else []
+        except Exception as e:
+            logging.warning(f"Could not read curated sensor zone, falling back to raw CSV: {e}")
+            covered, partitions = set(), []
+    for partition_date in partitions:
+        try:
+            frames = list(iter_sensor_curated(
+                curated_dir,
+                columns=['timestamp', 'zone_id', 'temperature_c', 'humidity_percent', 'source_file'],
+                start_date=partition_date,
+                end_date=partition_date,
+                source_files=covered,
+                zone_required=True,
+                batch_size=chunk_size,
+            ))
+        except Exception as e:
+            logging.warning(f"Could not read curated sensor partition {partition_date}, "
+                            f"falling back to raw CSV for that date: {e}")
+            failed_dates.add(partition_date)
+            continue
+        yield from frames
+    remaining = [f for rel, f in rel_paths.items() if rel not in covered]
+    logging.info(f"Read {len(covered)} sensor file(s) from the curated Parquet zone, {len(remaining)} from raw CSV.")
+    if failed_dates:
+        logging.info(f"Re-reading {len(failed_dates)} unreadable curated partition(s) from raw CSV.")
+        for rel in sorted(covered):
+            for chunk in iter_sensor_csv(rel_paths[rel], rel, chunk_size):
+                chunk = chunk[chunk['timestamp'].dt.strftime('%Y-%m-%d').isin(failed_dates)]
+                if not chunk.empty:
+                    yield chunk
+    for file_path in remaining:
+        yield from iter_sensor_csv(file_path, _lake_rel_path(file_path, lake_dir), chunk_size)
+
+
+def compute_sensor_partials(df):
+    """Agregat parsial per (source_file, date, zone_id) untuk satu potongan data sensor."""
+    df = df.assign(date=pd.to_datetime(df['timestamp']).dt.date)
+    return df.groupby(SENSOR_PARTIAL_KEYS).agg(
+        temperature_sum=('temperature_c', 'sum'),
+        temperature_count=('temperature_c', 'count'),
+        humidity_sum=('humidity_percent', 'sum'),
+        humidity_count=('humidity_percent', 'count')
+    ).reset_index()
+
+
+def combine_sensor_partials(partials_list):
+    """Menjumlahkan beberapa frame partial dengan kunci yang sama menjadi satu frame partial."""
+    partials_list = [p for p in partials_list if not p.empty]
+    if not partials_list:
+        return pd.DataFrame(columns=SENSOR_PARTIAL_COLUMNS)
+    if len(partials_list) == 1:
+        return partials_list[0]
+    return pd.concat(partials_list, ignore_index=True).groupby(SENSOR_PARTIAL_KEYS)[
+        SENSOR_PARTIAL_VALUES
+    ].sum().reset_index()
+
+
+def accumulate_sensor_partials(frames):
+    """
+    Streaming aggregation: setiap potongan langsung diringkas menjadi partial lalu digabung ke
+    akumulator berjalan, sehingga memori puncak sebanding dengan jumlah kunci (file, tanggal, zona),
+    bukan jumlah baris.
+    """
+    partials = pd.DataFrame(columns=SENSOR_PARTIAL_COLUMNS)
+    for chunk in frames:
+        if chunk.empty:
+            continue
+        partials = combine_sensor_partials([partials, compute_sensor_partials(chunk)])
+    return partials
+
+
+def reduce_sensor_partials(partials):
+    """Menggabungkan partial menjadi ringkasan harian per zona (date, zone_id, avg_temperature_c, avg_humidity_percent)."""
+    if partials.empty:
+        return pd.DataFrame(columns=['date', 'zone_id', 'avg_temperature_c', 'avg_humidity_percent'])
+    partials = partials.assign(date=pd.to_datetime(partials['date']).dt.date)
+    totals = partials.groupby(['date', 'zone_id'])[SENSOR_PARTIAL_VALUES].sum().reset_index()
+    summary_df = totals[['date', 'zone_id']].copy()
+    # count 0 (semua nilai kosong) menghasilkan NaN, sama seperti mean()
+    summary_df['avg_temperature_c'] = (totals['temperature_sum'] / totals['temperature_count']).round(2)
+    summary_df['avg_humidity_percent'] = (totals['humidity_sum'] / totals['humidity_count']).round(2)
+    return summary_df
+
+
+def aggregate_sensor_shard(file_list, lake_dir, curated_dir=None, chunk_size=None):
+    """Tugas 'map' satu worker: membaca satu shard file sensor dan mengembalikan partial-nya."""
+    return accumulate_sensor_partials(iter_sensor_frames(file_list, lake_dir, curated_dir, chunk_size))
+
+
+def _file_sizes(file_list):
+    sizes = {}
+    for file_path in file_list:
+        try:
+            sizes[file_path] = os.path.getsize(file_path)
+        except OSError:
+            sizes[file_path] = 0
+    return sizes
+
+
+def shard_files_by_size(file_list, shard_count, sizes=None):
+    """
+    Membagi file ke shard_count shard dengan beban (total byte) serata mungkin:
+    file terbesar lebih dulu dimasukkan ke shard yang saat ini paling ringan.
+    """
+    sizes = sizes or _file_sizes(file_list)
+    shards = [[] for _ in range(max(1, min(shard_count, len(file_list))))]
+    loads = [0] * len(shards)
+    for file_path in sorted(file_list, key=lambda f: sizes[f], reverse=True):
+        lightest = loads.index(min(loads))
+        shards[lightest].append(file_path)
+        loads[lightest] += sizes[file_path]
+    return [shard for shard in shards if shard]
+
+
+def aggregate_sensor_files(file_list, lake_dir, curated_dir=None, max_workers=1, chunk_size=None):
+    """
+    Menghitung partial sensor untuk file_list.
+    - max_workers <= 1: streaming di proses ini.
+    - max_workers > 1: map-reduce dengan process pool; setiap worker mem-parse satu shard dan
+      mengembalikan partial yang ringkas, lalu proses induk menjumlahkannya. Input yang lebih
+      kecil dari PARALLEL_MIN_BYTES tetap diproses di proses ini.
+    Hasil kedua mode identik.
+    """
+    if max_workers is None or max_workers <= 1 or len(file_list) <= 1:
+        return aggregate_sensor_shard(file_list, lake_dir, curated_dir, chunk_size)
+    sizes = _file_sizes(file_list)
+    if sum(sizes.values()) < PARALLEL_MIN_BYTES:
+        return aggregate_sensor_shard(file_list, lake_dir, curated_dir, chunk_size)
+
+    shards = shard_files_by_size(file_list, max_workers * SHARDS_PER_WORKER, sizes)
+    workers = min(max_workers, len(shards))
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        partials_list = list(executor.map(
+            aggregate_sensor_shard,
+            shards,
+            [lake_dir] * len(shards),
+            [curated_dir] * len(shards),
+            [chunk_size] * len(shards),
+        ))
+    partials = combine_sensor_partials(partials_list)
+    logging.info(
+        f"Aggregated {len(file_list)} sensor file(s) in {len(shards)} shard(s) using {workers} process(es) "
+        f"in {time.perf_counter() - started:.2f}s ({len(partials)} partial row(s))."
+    )
+    return partials
@@ -0,0 +1,151 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import pandas as pd
+
+from scripts.utils.batch_sentiment import SCORER_VERSION, analyze_texts
+
+# Cache hasil analisis tweet (skor, kategori, kata teratas) yang persisten antar-run, disimpan
+# sebagai SQLite. Kunci: sha256 dari teks ternormalisasi, sehingga tweet yang sama dengan prefix
+# tanggal berbeda (retweet, spam bot, file harian yang saling tumpang tindih) cukup dinilai sekali.
+CACHE_FILENAME = '_sentiment_cache.sqlite'
+
+# Batas jumlah entri; entri yang paling lama tidak dipakai (LRU) dibuang lebih dulu
+DEFAULT_MAX_ENTRIES = 500_000
+
+# Prefix "YYYY-MM-DD HH:MM:SS - " pada file tweet .txt tidak memengaruhi skor maupun kata teratas
+# (tidak ada di leksikon dan bukan huruf), jadi dibuang dari kunci.
+_DATE_PREFIX_PATTERN = r'^\s*\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}(?::\d{2})?)?\s+-\s+'
+
+# Jumlah kunci per query IN (di bawah batas variabel SQLite)
+_LOOKUP_BATCH = 500
+
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sentiment_cache (
+    text_hash          TEXT PRIMARY KEY,   -- sha256 teks ternormalisasi
+    sentiment_score    REAL NOT NULL,
+    sentiment_category TEXT NOT NULL,
+    top_words_json     TEXT NOT NULL,
+    last_used          REAL NOT NULL       -- epoch detik, untuk eviction LRU
+);
+CREATE INDEX IF NOT EXISTS idx_sentiment_cache_last_used ON sentiment_cache (last_used);
+CREATE TABLE IF NOT EXISTS sentiment_cache_meta (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def connect_cache(cache_dir):
+    """
+    Membuka (dan membuat jika belum ada) cache SQLite di cache_dir.
+    Jika cache ditulis oleh versi scorer yang berbeda, isinya dikosongkan.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(cache_dir, CACHE_FILENAME))
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(CACHE_SCHEMA)
+    row = conn.execute("SELECT value FROM sentiment_cache_meta WHERE key = 'scorer_version'").fetchone()
+    if row is None or row[0] != SCORER_VERSION:
+        with conn:
+            conn.execute("DELETE FROM sentiment_cache")
+            conn.execute("DELETE FROM sentiment_cache_meta")
+            conn.execute("INSERT INTO sentiment_cache_meta (key, value) VALUES ('scorer_version', ?)", (SCORER_VERSION,))
+        if row is not None:
+            logging.info(f"Sentiment cache: scorer version changed ({row[0]} -> {SCORER_VERSION}), cache cleared.")
+    return conn
+
+
+def normalize_texts(texts):
+    """Teks kunci cache: prefix tanggal dibuang, spasi di tepi dibuang dan spasi beruntun dirapatkan."""
+    return (
+        pd.Series(texts, dtype='object').astype(str)
+        .str.replace(_DATE_PREFIX_PATTERN, '', regex=True)
+        .str.replace(r'\s+', ' ', regex=True)
+        .str.strip()
+    )
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _lookup(conn, hashes):
+    found = {}
+    for start in range(0, len(hashes), _LOOKUP_BATCH):
+        batch = hashes[start:start + _LOOKUP_BATCH]
+        placeholders = ', '.join('?' * len(batch))
+        for row in conn.execute(
+            f"SELECT text_hash, sentiment_score, sentiment_category, top_words_json "
+            f"FROM sentiment_cache WHERE text_hash IN ({placeholders})", batch
+        ):
+            found[row[0]] = row[1:]
+    return found
+
+
+def cache_stats(conn):
+    """Statistik kumulatif cache: dict entries, hits, misses, hit_rate."""
+    counters = dict(conn.execute("SELECT key, value FROM sentiment_cache_meta WHERE key IN ('hits', 'misses')").fetchall())
+    hits, misses = counters.get('hits', 0), counters.get('misses', 0)
+    return {
+        'entries': conn.execute("SELECT COUNT(*) FROM sentiment_cache").fetchone()[0],
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+    }
+
+
+def analyze_texts_cached(texts, conn, max_entries=DEFAULT_MAX_ENTRIES):
+    """
+    Seperti batch_sentiment.analyze_texts, tetapi setiap teks unik (setelah normalisasi) hanya
+    dinilai sekali: duplikat dalam batch digabung, dan teks yang sudah pernah dinilai diambil dari cache.
+    Hasil baru disimpan, entri yang terpakai diperbarui waktu pakainya, lalu cache dipangkas ke max_entries.
+    """
+    normalized = normalize_texts(texts)
+    codes, uniques = pd.factorize(normalized)
+    hashes = [text_hash(text) for text in uniques]
+    cached = _lookup(conn, hashes)
+
+    missing = [i for i, h in enumerate(hashes) if h not in cached]
+    if missing:
+        scored = analyze_texts(pd.Series(uniques[missing], dtype='object'))
+        for i, row in zip(missing, scored.itertuples(index=False)):
+            cached[hashes[i]] = (float(row.sentiment_score), row.sentiment_category, row.top_words_json)
+
+    results = pd.DataFrame(
+        [cached[h] for h in hashes],
+        columns=['sentiment_score', 'sentiment_category', 'top_words_json'],
+    )
+    if results.empty:
+        results = results.astype({'sentiment_score': 'float64'})
+    results = results.iloc[codes]
+    results.index = normalized.index
+
+    now = time.time()
+    hits = len(hashes) - len(missing)
+    with conn:
+        conn.executemany(
+            "INSERT INTO sentiment_cache (text_hash, sentiment_score, sentiment_category, top_words_json, last_used) "
+            "VALUES (?, ?, ?, ?, ?) ON CONFLICT (text_hash) DO UPDATE SET last_used = excluded.last_used",
+            [(h, *cached[h], now) for h in hashes]
+        )
+        conn.executemany(
+            "INSERT INTO sentiment_cache_meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = value + excluded.value",
+            [('hits', hits), ('misses', len(missing))]
+        )
+        evicted = conn.execute("""
+            DELETE FROM sentiment_cache WHERE text_hash IN (
+                SELECT text_hash FROM sentiment_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?
+            )
+        """, (max_entries,)).rowcount
+
+    stats = cache_stats(conn)
+    logging.info(
+        f"Sentiment cache: {len(normalized)} tweet(s), {len(hashes)} unique text(s), "
+        f"{hits} cache hit(s) ({hits / len(hashes) if hashes else 0.0:.1%}), {len(missing)} scored, "
+        f"{evicted} evicted. Lifetime hit rate {stats['hit_rate']:.1%} over {stats['entries']} cached text(s)."
+    )
+    return results
@@ -0,0 +1,180 @@
+import json
+from datetime import datetime
+
+from sqlalchemy import text
+
+from scripts.utils.pg_copy import copy_rows
+
+# Status CDC (change data capture) AdventureWorks di DB staging: satu baris per tabel sumber.
+# watermark = ModifiedDate terbesar yang sudah disalin; run berikutnya hanya membaca baris dengan
+# ModifiedDate >= watermark (batas inklusif: baris di batas dibaca ulang, tetapi baris yang isinya sama
+# dengan staging dibuang sebelum upsert sehingga tidak dilaporkan sebagai perubahan).
+CDC_STATE_TABLE = 'adventureworks_cdc_state'
+WATERMARK_COLUMN = 'modifieddate'
+
+CDC_STATE_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS {CDC_STATE_TABLE} (
+    source_table TEXT PRIMARY KEY,   -- nama tabel sumber, mis. 'Sales.SalesOrderHeader'
+    watermark    TIMESTAMP,          -- NULL = tabel sumber kosong saat terakhir dibaca
+    source_rows  BIGINT,             -- jumlah baris sumber saat terakhir dibaca
+    extracted_at TIMESTAMP NOT NULL
+)
+"""
+
+# Kunci yang sudah dihapus dari staging tetapi penghapusannya belum diteruskan ke DW. Dicatat di transaksi
+# yang sama dengan DELETE di staging dan baru dibuang setelah load ke DW berhasil, sehingga run yang gagal
+# di tahap DW tidak kehilangan penghapusan (staging tidak lagi memuat kunci tersebut untuk dideteksi ulang).
+CDC_PENDING_DELETES_TABLE = 'adventureworks_cdc_pending_deletes'
+
+CDC_PENDING_DELETES_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS {CDC_PENDING_DELETES_TABLE} (
+    source_table TEXT NOT NULL,
+    key_values   JSONB NOT NULL,     -- tuple kunci (SOURCE_KEYS) sebagai array JSON
+    PRIMARY KEY (source_table, key_values)
+)
+"""
+
+# Tabel sementara per transaksi target (dibuang otomatis saat commit/rollback)
+CHANGES_TEMP_TABLE = '_cdc_changes'
+SOURCE_KEYS_TEMP_TABLE = '_cdc_source_keys'
+
+
+def load_watermarks(db_engine):
+    """Membaca status CDC: dict tabel sumber -> watermark (datetime atau None). Tabel dibuat jika belum ada."""
+    with db_engine.begin() as conn:
+        conn.execute(text(CDC_STATE_SCHEMA))
+        conn.execute(text(CDC_PENDING_DELETES_SCHEMA))
+        rows = conn.execute(text(f"SELECT source_table, watermark FROM {CDC_STATE_TABLE}")).fetchall()
+    return {row.source_table: row.watermark for row in rows}
+
+
+def save_watermarks(db_engine, watermarks, reset=False):
+    """
+    Mencatat watermark baru. watermarks: dict tabel sumber -> (watermark, source_rows).
+    reset=True mengosongkan status dulu, termasuk penghapusan tertunda (setelah muat penuh, atau saat
+    tabel staging dikosongkan).
+    """
+    now = datetime.now()
+    with db_engine.begin() as conn:
+        conn.execute(text(CDC_STATE_SCHEMA))
+        conn.execute(text(CDC_PENDING_DELETES_SCHEMA))
+        if reset:
+            conn.execute(text(f"DELETE FROM {CDC_STATE_TABLE}"))
+            conn.execute(text(f"DELETE FROM {CDC_PENDING_DELETES_TABLE}"))
+        if watermarks:
+            conn.execute(text(f"""
+                INSERT INTO {CDC_STATE_TABLE} (source_table, watermark, source_rows, extracted_at)
+                VALUES (:source_table, :watermark, :source_rows, :extracted_at)
+                ON CONFLICT (source_table) DO UPDATE SET
+                    watermark = EXCLUDED.watermark, source_rows = EXCLUDED.source_rows,
+                    extracted_at = EXCLUDED.extracted_at
+            """), [
+                {'source_table': source_table, 'watermark': watermark, 'source_rows': source_rows, 'extracted_at': now}
+                for source_table, (watermark, source_rows) in watermarks.items()
+            ])
+
+
+def _encode_key(key):
+    return json.dumps(list(key), default=str)
+
+
+def record_pending_deletes(conn, src_table, keys):
+    """Mencatat kunci yang dihapus dari staging di transaksi conn (bersama DELETE-nya), sampai DW diperbarui."""
+    if keys:
+        conn.execute(text(f"""
+            INSERT INTO {CDC_PENDING_DELETES_TABLE} (source_table, key_values)
+            VALUES (:source_table, CAST(:key_values AS JSONB))
+            ON CONFLICT DO NOTHING
+        """), [{'source_table': src_table, 'key_values': _encode_key(key)} for key in keys])
+
+
+def load_pending_deletes(db_engine):
+    """Penghapusan yang belum diteruskan ke DW: dict tabel sumber -> set tuple kunci."""
+    pending = {}
+    with db_engine.begin() as conn:
+        conn.execute(text(CDC_PENDING_DELETES_SCHEMA))
+        rows = conn.execute(text(f"SELECT source_table, key_values FROM {CDC_PENDING_DELETES_TABLE}")).fetchall()
+    for row in rows:
+        pending.setdefault(row.source_table, set()).add(tuple(row.key_values))
+    return pending
+
+
+def clear_pending_deletes(db_engine, pending):
+    """Membuang penghapusan tertunda (dict dari load_pending_deletes) setelah berhasil diteruskan ke DW."""
+    params = [
+        {'source_table': src_table, 'key_values': _encode_key(key)}
+        for src_table, keys in pending.items() for key in keys
+    ]
+    if params:
+        with db_engine.begin() as conn:
+            conn.execute(text(
+                f"DELETE FROM {CDC_PENDING_DELETES_TABLE} "
+                f"WHERE source_table = :source_table AND key_values = CAST(:key_values AS JSONB)"
+            ), params)
+
+
+def _key_match(key_columns, left, right):
+    return ' AND '.join(f"{left}.{column} = {right}.{column}" for column in key_columns)
+
+
+def begin_change_set(conn, dest_table):
+    """Membuat tabel sementara berstruktur sama dengan dest_table untuk menampung baris yang berubah."""
+    conn.execute(text(
+        f"CREATE TEMP TABLE {CHANGES_TEMP_TABLE} (LIKE {dest_table} INCLUDING DEFAULTS) ON COMMIT DROP"
+    ))
+
+
+def stage_changes(conn, columns, rows, positions=None):
+    """COPY satu batch baris berubah ke tabel sementara. Return jumlah baris."""
+    return copy_rows(conn, CHANGES_TEMP_TABLE, columns, rows, positions)
+
+
+def apply_change_set(conn, dest_table, key_columns, columns):
+    """
+    Upsert berbasis kunci dari tabel sementara ke dest_table. Baris yang isinya sama persis dengan baris
+    dest_table (watermark inklusif membaca ulang baris lama) dibuang dulu; untuk sisanya baris lama dengan
+    kunci yang sama dihapus, lalu versi barunya disisipkan (tabel raw_* tidak semuanya punya PRIMARY KEY
+    untuk ON CONFLICT). Return set tuple kunci yang benar-benar baru/berubah.
+    """
+    column_list = ', '.join(columns)
+    # Dibandingkan sebagai teks: tidak semua tipe kolom (mis. xml) punya operator kesamaan
+    unchanged = ' AND '.join(f"c.{column}::text IS NOT DISTINCT FROM d.{column}::text" for column in columns)
+    conn.execute(text(
+        f"DELETE FROM {CHANGES_TEMP_TABLE} AS c USING {dest_table} AS d "
+        f"WHERE {_key_match(key_columns, 'c', 'd')} AND {unchanged}"
+    ))
+    conn.execute(text(
+        f"DELETE FROM {dest_table} AS d USING {CHANGES_TEMP_TABLE} AS c WHERE {_key_match(key_columns, 'd', 'c')}"
+    ))
+    inserted = conn.execute(text(
+        f"INSERT INTO {dest_table} ({column_list}) SELECT {column_list} FROM {CHANGES_TEMP_TABLE} "
+        f"RETURNING {', '.join(key_columns)}"
+    )).fetchall()
+    return {tuple(row) for row in inserted}
+
+
+def begin_key_set(conn, dest_table, key_columns):
+    """Membuat tabel sementara berisi kolom kunci dest_table (tanpa data) untuk daftar kunci sumber."""
+    conn.execute(text(
+        f"CREATE TEMP TABLE {SOURCE_KEYS_TEMP_TABLE} ON COMMIT DROP AS "
+        f"SELECT {', '.join(key_columns)} FROM {dest_table} WITH NO DATA"
+    ))
+
+
+def stage_keys(conn, key_columns, rows):
+    """COPY satu batch kunci sumber ke tabel sementara. Return jumlah baris."""
+    return copy_rows(conn, SOURCE_KEYS_TEMP_TABLE, key_columns, rows)
+
+
+def delete_missing_keys(conn, dest_table, key_columns):
+    """
+    Menghapus baris dest_table yang kuncinya sudah tidak ada di sumber (anti-join dengan tabel
+    kunci sementara). Return set tuple kunci yang dihapus.
+    """
+    conn.execute(text(f"ANALYZE {SOURCE_KEYS_TEMP_TABLE}"))
+    deleted = conn.execute(text(f"""
+        DELETE FROM {dest_table} AS d
+        WHERE NOT EXISTS (SELECT 1 FROM {SOURCE_KEYS_TEMP_TABLE} AS k WHERE {_key_match(key_columns, 'd', 'k')})
+        RETURNING {', '.join(f'd.{column}' for column in key_columns)}
+    """)).fetchall()
+    return {tuple(row) for row in deleted}
@@ -0,0 +1,150 @@
+import io
+import logging
+from datetime import datetime
+
+import pandas as pd
+from sqlalchemy import bindparam, inspect, text
+
+from scripts.utils.pg_copy import COPY_NULL, copy_csv
+
+# Tabel checkpoint analisis di DB staging: satu baris per objek lake yang sudah dianalisis.
+# Objek yang path-nya belum ada atau sha256-nya berbeda dianggap belum dianalisis.
+CHECKPOINT_TABLE = 'datalake_analysis_checkpoint'
+
+CHECKPOINT_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS {CHECKPOINT_TABLE} (
+    lake_path   TEXT PRIMARY KEY,   -- path relatif terhadap raw_data_lake/
+    sha256      TEXT,
+    category    TEXT NOT NULL,
+    analyzed_at TIMESTAMP NOT NULL
+)
+"""
+
+# Kolom lineage di tabel staging: path relatif objek lake asal baris tersebut
+SOURCE_COLUMN = 'source_file'
+
+# Jumlah baris per perintah COPY (membatasi ukuran buffer CSV di memori)
+COPY_CHUNK_ROWS = 100_000
+# Akhiran tabel bayangan: tabel baru diisi penuh di sini lalu ditukar dengan tabel lama dalam satu transaksi
+SHADOW_SUFFIX = '__shadow'
+
+
+def load_checkpoint(db_engine):
+    """Membaca checkpoint: dict lake_path -> (sha256, category). Tabel dibuat jika belum ada."""
+    with db_engine.begin() as conn:
+        conn.execute(text(CHECKPOINT_SCHEMA))
+        rows = conn.execute(text(f"SELECT lake_path, sha256, category FROM {CHECKPOINT_TABLE}")).fetchall()
+    return {row.lake_path: (row.sha256, row.category) for row in rows}
+
+
+def save_checkpoint(db_engine, entries, removed_paths=(), reset=False):
+    """
+    Mencatat objek yang selesai dianalisis. entries: list of (lake_path, sha256, category).
+    removed_paths: objek yang sudah tidak ada di lake. reset=True mengosongkan checkpoint dulu (mode penuh).
+    """
+    now = datetime.now()
+    with db_engine.begin() as conn:
+        conn.execute(text(CHECKPOINT_SCHEMA))
+        if reset:
+            conn.execute(text(f"DELETE FROM {CHECKPOINT_TABLE}"))
+        for lake_path in removed_paths:
+            conn.execute(text(f"DELETE FROM {CHECKPOINT_TABLE} WHERE lake_path = :lake_path"), {'lake_path': lake_path})
+        if entries:
+            conn.execute(text(f"""
+                INSERT INTO {CHECKPOINT_TABLE} (lake_path, sha256, category, analyzed_at)
+                VALUES (:lake_path, :sha256, :category, :analyzed_at)
+                ON CONFLICT (lake_path) DO UPDATE SET
+                    sha256 = EXCLUDED.sha256, category = EXCLUDED.category, analyzed_at = EXCLUDED.analyzed_at
+            """), [
+                {'lake_path': lake_path, 'sha256': sha256, 'category': category, 'analyzed_at': now}
+                for lake_path, sha256, category in entries
+            ])
+
+
+def _quote(conn, name):
+    return conn.dialect.identifier_preparer.quote(name)
+
+
+def copy_dataframe(df, table_name, conn, chunk_rows=COPY_CHUNK_ROWS):
+    """
+    Menambahkan df ke tabel yang sudah ada lewat COPY ... FROM STDIN (format CSV yang dibingkai di
+    buffer memori, tanpa file sementara), per potongan chunk_rows baris, di dalam transaksi conn.
+    Tidak ada parameter terikat, jadi tidak terkena batas jumlah parameter seperti INSERT multi-baris.
+    Untuk DB selain PostgreSQL jatuh kembali ke to_sql per potongan.
+    """
+    if df.empty:
+        return
+    if conn.dialect.name != 'postgresql':
+        df.to_sql(table_name, con=conn, if_exists='append', index=False, chunksize=chunk_rows)
+        return
+    columns = [str(column) for column in df.columns]
+    for start in range(0, len(df), chunk_rows):
+        buffer = io.StringIO()
+        # NULL ditulis \N (bukan field kosong) agar string kosong tetap string kosong, seperti to_sql
+        df.iloc[start:start + chunk_rows].to_csv(buffer, index=False, header=False, na_rep=COPY_NULL)
+        buffer.seek(0)
+        copy_csv(conn, table_name, columns, buffer)
+
+
+def replace_table(df, table_name, conn):
+    """
+    Mengganti isi tabel secara atomik: tabel bayangan dibuat (tipe kolom diinfer dari df seperti
+    to_sql), diisi lewat COPY, lalu tabel lama di-drop dan bayangan di-rename, semuanya di transaksi conn.
+    Pembaca tetap melihat tabel lama yang utuh sampai transaksi di-commit.
+    """
+    shadow = f"{table_name}{SHADOW_SUFFIX}"
+    conn.execute(text(f"DROP TABLE IF EXISTS {_quote(conn, shadow)}"))
+    conn.execute(text(pd.io.sql.get_schema(df, shadow, con=conn)))
+    copy_dataframe(df, shadow, conn)
+    conn.execute(text(f"DROP TABLE IF EXISTS {_quote(conn, table_name)}"))
+    conn.execute(text(f"ALTER TABLE {_quote(conn, shadow)} RENAME TO {_quote(conn, table_name)}"))
+
+
+def write_staging_table(df, table_name, db_engine, replaced_sources=None, key_column=SOURCE_COLUMN):
+    """
+    Menulis df ke tabel staging dengan bulk COPY.
+    - replaced_sources=None: tabel diganti seluruhnya lewat tabel bayangan (perilaku mode penuh).
+    - replaced_sources=iterable: baris lama dengan key_column (default source_file) di dalamnya dihapus
+      lalu df ditambahkan, dalam satu transaksi. Baris lain tidak disentuh.
+    """
+    with db_engine.begin() as conn:
+        table_exists = inspect(conn).has_table(table_name)
+        if replaced_sources is not None and not table_exists and df.empty:
+            return
+        if replaced_sources is None or not table_exists:
+            replace_table(df, table_name, conn)
+            return
+        replaced_sources = sorted(set(replaced_sources))
+        if replaced_sources:
+            delete_stmt = text(f"DELETE FROM {table_name} WHERE {_quote(conn, key_column)} IN :sources").bindparams(
+                bindparam('sources', expanding=True)
+            )
+            deleted = conn.execute(delete_stmt, {'sources': replaced_sources}).rowcount
+            logging.info(f"Staging table '{table_name}': removed {deleted} row(s) for {len(replaced_sources)} "
+                         f"replaced {key_column} value(s).")
+        copy_dataframe(df, table_name, conn)
+
+
+def staging_table_exists(table_name, db_engine):
+    with db_engine.connect() as conn:
+        return inspect(conn).has_table(table_name)
+
+
+def source_values(table_name, column, sources, db_engine):
+    """Nilai berbeda kolom column pada baris dengan source_file di sources (set kosong jika tabel belum ada)."""
+    sources = sorted(set(sources))
+    with db_engine.connect() as conn:
+        if not sources or not inspect(conn).has_table(table_name):
+            return set()
+        stmt = text(
+            f"SELECT DISTINCT {_quote(conn, column)} FROM {table_name} WHERE {SOURCE_COLUMN} IN :sources"
+        ).bindparams(bindparam('sources', expanding=True))
+        return {row[0] for row in conn.execute(stmt, {'sources': sources})}
+
+
+def read_staging_table(table_name, db_engine):
+    """Membaca seluruh isi tabel staging (DataFrame kosong jika tabel belum ada)."""
+    with db_engine.connect() as conn:
+        if not inspect(conn).has_table(table_name):
+            return pd.DataFrame()
+        return pd.read_sql(text(f"SELECT * FROM {table_name}"), conn)
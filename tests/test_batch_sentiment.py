@@ -0,0 +1,92 @@
+import os
+import random
+import sys
+
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+textblob = pytest.importorskip('textblob')
+
+from scripts.utils import batch_sentiment  # noqa: E402
+from scripts.utils.batch_sentiment import SCORE_TOLERANCE, analyze_texts, analyze_texts_textblob  # noqa: E402
+
+INPUT_DIR = os.path.join(PROJECT_ROOT, 'input_data_sources')
+
+# Kasus tepi tokenisasi/penilaian PatternAnalyzer: modifier, negasi, tanda seru, emotikon, kontraksi,
+# singkatan (dinilai lewat TextBlob), dan teks kosong
+EDGE_CASES = [
+    '',
+    '   ',
+    'good',
+    'not good',
+    'not a good bike',
+    'very good',
+    'really not good',
+    'very very bad!!',
+    'I do not like it... at all',
+    "I don't love it, I can't stand it",
+    'Great!!! (!)',
+    'Amazing service :) but slow delivery :(',
+    "It's :'( so sad",
+    'xD what a day XD :D :d',
+    'Mr. Smith said the U.S. store is great, e.g. the bikes.',
+    'Terrible quality, never again.',
+    '"Awesome" gear -- highly recommended!',
+    '#AdventureWorks rocks! @store thanks',
+    'never bad, never good',
+    'no',
+    'The new helmet is not very comfortable, but really quite nice!',
+]
+
+_WORDS = [
+    'good', 'bad', 'great', 'terrible', 'very', 'really', 'extremely', 'not', 'never', 'no', "n't", 'bike',
+    'gear', 'service', 'the', 'a', 'is', 'quite', 'slightly', 'amazing', 'awful', 'happy', 'sad', 'love',
+    'hate', 'fast', 'slow', 'nice', 'quality', 'Mr.', 'U.S.', 'e.g.', ':)', ':(', ':D', 'xD', '!', '!!', '...',
+    ',', '.', '(!)', '"cool"', "don't", "isn't", '#fitness', '@store',
+]
+
+
+def _generated_corpus(count=2000, seed=20240101):
+    rng = random.Random(seed)
+    return [' '.join(rng.choice(_WORDS) for _ in range(rng.randint(1, 14))) for _ in range(count)]
+
+
+def _sample_tweets():
+    tweets = []
+    for root, _, files in os.walk(INPUT_DIR):
+        for name in sorted(files):
+            if name.endswith('.txt') and 'tweets' in name:
+                with open(os.path.join(root, name), encoding='utf-8') as f:
+                    tweets.extend(f.read().splitlines())
+    return tweets
+
+
+@pytest.fixture(scope='module')
+def corpus():
+    return pd.Series(EDGE_CASES + _sample_tweets() + _generated_corpus(), dtype='object')
+
+
+def test_scores_match_textblob(corpus):
+    result = analyze_texts(corpus)
+    expected = [textblob.TextBlob(text).sentiment.polarity for text in corpus]
+    differences = (result['sentiment_score'] - pd.Series(expected, index=corpus.index)).abs()
+    assert differences.max() <= SCORE_TOLERANCE, corpus[differences.idxmax()]
+
+
+def test_categories_match_textblob(corpus):
+    result = analyze_texts(corpus)
+    expected = analyze_texts_textblob(corpus)
+    pd.testing.assert_series_equal(result['sentiment_category'], expected['sentiment_category'], check_dtype=False)
+
+
+def test_falls_back_to_textblob_without_internals(corpus, monkeypatch):
+    sample = corpus.head(200)
+    monkeypatch.setattr(batch_sentiment, '_lexicon', {})
+    result = analyze_texts(sample)
+    expected = [textblob.TextBlob(text).sentiment.polarity for text in sample]
+    assert result['sentiment_score'].tolist() == expected
+    assert result['top_words_json'].map(type).eq(str).all()